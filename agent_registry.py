@@ -0,0 +1,44 @@
+# ==========================================
+# LAZY AGENT REGISTRY
+# ==========================================
+# Importing trip_planner used to import google.adk and build all eight
+# LlmAgents (and with them the shared Gemini client) before the CLI could
+# show its prompt, even when the user only typed "quit". Agents are now
+# registered as factories under their old module attribute names and built
+# on first use. A factory imports what it needs when it runs, so importing
+# trip_agents or trip_planner is cheap. Each agent is built once per process
+# and shared, as the module-level agents were.
+
+_factories = {}
+_agents = {}
+
+
+def agent_factory(key):
+    """Decorator that registers a function building the agent `key`."""
+    def _register(build):
+        _factories[key] = build
+        return build
+    return _register
+
+
+def get_agent(key):
+    """Returns the agent registered as `key`, building it on first use."""
+    if key not in _agents:
+        if key not in _factories:
+            raise KeyError(f"No agent registered as '{key}'. Registered: {', '.join(_factories)}")
+        _agents[key] = _factories[key]()
+    return _agents[key]
+
+
+def built_agents():
+    """Keys of the agents built so far in this process."""
+    return list(_agents)
+
+
+def reset_agents():
+    """Forgets every built agent, so the next get_agent() builds it again.
+
+    Agents take their model from the model registry when they are built;
+    call this after register_model() to rebuild them with the replacement.
+    """
+    _agents.clear()
@@ -0,0 +1,344 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from queue import Empty
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# ==========================================
+# BATCH PLANNING
+# ==========================================
+# Plans many trip briefs offline (e.g. for pre-generated destination guides):
+#
+#   python batch.py briefs.jsonl plans.jsonl --concurrency 4 --workers 2
+#
+# Every input line is {"id": "...", "brief": "..."}; every output line is one
+# structured result. Each worker process builds the agent graph and a single
+# Runner once and reuses it for all of its briefs, so model clients and the
+# rate limiter are shared. With several workers, the requests/tokens per
+# minute quota is split between them. Results are appended and flushed one
+# line at a time, and ids already planned successfully are skipped when the
+# same command is run again, so a crashed batch resumes where it stopped.
+#
+# Agent modules are imported inside the worker functions: the quota split
+# must be in the environment before rate_limiter is first imported.
+
+BATCH_APP_NAME = "trip_planner_batch"
+BATCH_USER = "batch"
+
+# Seconds a single brief may take. It is the brief's turn deadline
+# (deadline.py): specialists still running near the end are dropped and the
+# report is compiled from the rest.
+BRIEF_TIMEOUT = 900
+
+
+def load_briefs(path):
+    """Reads {"id", "brief"} records; lines without an id are numbered."""
+    briefs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            brief_id = str(record.get("id") or f"line-{number}")
+            briefs.append({"id": brief_id, "brief": record["brief"]})
+    return briefs
+
+
+def load_done_ids(path, retry_failed=False):
+    """Ids already in the output file (successful ones only with retry_failed)."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by a crash; that brief is simply planned again.
+                continue
+            if record.get("status") == "ok" or not retry_failed:
+                done.add(record["id"])
+    return done
+
+
+def open_output(path):
+    """Opens the results file for appending, repairing a line cut short by a crash."""
+    needs_newline = False
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    output = open(path, "a", encoding="utf-8")
+    if needs_newline:
+        output.write("\n")
+    return output
+
+
+def split_quota(workers):
+    """Gives each worker process an equal share of the model quota."""
+    import rate_limiter
+    return {
+        "TRIP_PLANNER_RPM": str(max(1, rate_limiter.REQUESTS_PER_MINUTE // workers)),
+        "TRIP_PLANNER_TPM": str(max(1, rate_limiter.TOKENS_PER_MINUTE // workers)),
+        "TRIP_PLANNER_MAX_CONCURRENCY": str(max(1, rate_limiter.MAX_CONCURRENCY // workers)),
+    }
+
+
+def build_runner(mode, offline=False):
+    """One Runner (and one set of agents and model clients) per process."""
+    if offline:
+        import tempfile
+        from benchmark import load_graph
+        from fake_llm import FakeGemini
+        cache_dir = os.environ.get("TRIP_PLANNER_CACHE_DIR") or tempfile.mkdtemp(prefix="trip_batch_")
+        trip_planner = load_graph(FakeGemini(), cache_dir)
+    else:
+        import trip_planner
+
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from budget import BudgetPlugin
+    return Runner(
+        agent=trip_planner.get_coordinator(mode),
+        session_service=InMemorySessionService(),
+        app_name=BATCH_APP_NAME,
+        plugins=[BudgetPlugin()],
+    )
+
+
+async def plan_brief(runner, record, timeout=BRIEF_TIMEOUT):
+    """Plans one brief in its own session and returns its result record."""
+    from google.genai import types
+    from brief_precheck import MISSING_STATE_KEY
+    from budget import plan_budget
+    from deadline import ABORT_GRACE, turn_deadline
+    from link_check import link_checker, verification_enabled
+    from plan_table import PLAN_ROWS_STATE_KEY
+    from streaming import RESPONDING_AGENT
+
+    session_id = f"batch_{record['id']}"
+    result = {"id": record["id"], "brief": record["brief"]}
+    start = time.perf_counter()
+    texts = []
+    limit_reached = False
+
+    async def _run():
+        nonlocal limit_reached
+        await runner.session_service.create_session(
+            app_name=runner.app_name, user_id=BATCH_USER, session_id=session_id
+        )
+        message = types.Content(role="user", parts=[types.Part(text=record["brief"])])
+        async with turn_deadline(timeout) as deadline:
+            async for event in runner.run_async(user_id=BATCH_USER, session_id=session_id, new_message=message,
+                                                abort_signal=deadline.abort_signal):
+                if event.author == RESPONDING_AGENT and not event.partial and event.content and event.content.parts:
+                    texts.extend(part.text for part in event.content.parts if part.text and not part.thought)
+            limit_reached = deadline.cut_off or deadline.abort_signal.is_set()
+        session = await runner.session_service.get_session(
+            app_name=runner.app_name, user_id=BATCH_USER, session_id=session_id
+        )
+        return session.state.get(PLAN_ROWS_STATE_KEY) or [], session.state.get(MISSING_STATE_KEY) or []
+
+    budget = None
+    try:
+        with plan_budget() as budget:
+            rows, missing = await asyncio.wait_for(_run(), timeout + ABORT_GRACE)
+    except asyncio.TimeoutError:
+        result.update(status="error", error=f"timed out after {timeout}s")
+    except Exception as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+    else:
+        report = "\n".join(texts).strip()
+        if missing and not rows:
+            # Answered with clarifying questions; there is nobody to answer them.
+            result.update(status="error", error=f"brief is missing: {', '.join(missing)}", report=report)
+        elif report:
+            dead = []
+            if verification_enabled():
+                report, dead = await link_checker.verify_text(report)
+            result.update(status="ok", report=report, plan_rows=rows, dead_links=dead,
+                          time_limit_reached=limit_reached)
+        else:
+            result.update(status="error", error="empty response")
+    finally:
+        # Thousands of sessions would otherwise stay in memory.
+        await runner.session_service.delete_session(
+            app_name=runner.app_name, user_id=BATCH_USER, session_id=session_id
+        )
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    if budget is not None:
+        result["usage"] = budget.report()
+    return result
+
+
+async def plan_briefs(runner, records, emit, concurrency=4, timeout=BRIEF_TIMEOUT):
+    """Plans `records` with at most `concurrency` in flight, calling `emit`
+    with each result as soon as it is ready."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(record):
+        async with semaphore:
+            emit(await plan_brief(runner, record, timeout))
+
+    await asyncio.gather(*(_one(record) for record in records))
+
+
+def merged_calls():
+    """Specialist runs and searches this process merged into identical ones."""
+    from single_flight import merge_stats
+    return sum(stats["merged"] for stats in merge_stats().values())
+
+
+def _worker(records, queue, mode, concurrency, timeout, offline, environment):
+    """Entry point of one worker process: results go back through `queue`."""
+    os.environ.update(environment)
+    try:
+        runner = build_runner(mode, offline)
+        asyncio.run(plan_briefs(runner, records, queue.put, concurrency, timeout))
+    finally:
+        from rate_limiter import rate_limiter
+        queue.put({"worker_stats": {**rate_limiter.stats(), "merged_calls": merged_calls()}})
+
+
+class BatchReport:
+    """Counts results as they are written and reports throughput."""
+
+    def __init__(self, skipped=0):
+        self.started_at = time.perf_counter()
+        self.ok = 0
+        self.failed = 0
+        self.skipped = skipped
+        self.seconds = []
+        self.throttled_calls = 0
+        self.llm_calls = 0
+        self.tokens = 0
+        self.merged_calls = 0
+
+    def add(self, result):
+        if result["status"] == "ok":
+            self.ok += 1
+        else:
+            self.failed += 1
+        self.seconds.append(result["seconds"])
+        usage = result.get("usage") or {}
+        self.llm_calls += usage.get("llm_calls", 0)
+        self.tokens += usage.get("tokens", 0)
+
+    def to_dict(self):
+        from benchmark import percentile
+        elapsed = time.perf_counter() - self.started_at
+        done = self.ok + self.failed
+        return {
+            "ok": self.ok,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "elapsed_seconds": round(elapsed, 2),
+            "plans_per_minute": round(done / elapsed * 60, 2) if elapsed else 0.0,
+            "brief_p50_seconds": percentile(self.seconds, 50),
+            "brief_p95_seconds": percentile(self.seconds, 95),
+            "throttled_calls": self.throttled_calls,
+            "llm_calls": self.llm_calls,
+            "tokens": self.tokens,
+            "tokens_per_plan": round(self.tokens / done) if done else 0,
+            "merged_calls": self.merged_calls,
+        }
+
+
+def run_batch(args):
+    briefs = load_briefs(args.input)
+    done = load_done_ids(args.output, retry_failed=args.retry_failed)
+    pending = [record for record in briefs if record["id"] not in done]
+    report = BatchReport(skipped=len(briefs) - len(pending))
+    print(f"📦 {len(pending)} briefs to plan ({report.skipped} already done), "
+          f"{args.workers} worker(s) x {args.concurrency} concurrent")
+
+    output = open_output(args.output)
+
+    def write(result):
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+        report.add(result)
+        mark = "✅" if result["status"] == "ok" else "❌"
+        print(f"   {mark} {result['id']} ({result['seconds']:.1f}s)", flush=True)
+
+    try:
+        if args.workers <= 1 or len(pending) <= 1:
+            runner = build_runner(args.mode, args.offline)
+            asyncio.run(plan_briefs(runner, pending, write, args.concurrency, args.timeout))
+            from rate_limiter import rate_limiter
+            report.throttled_calls = rate_limiter.stats()["throttled_calls"]
+            report.merged_calls = merged_calls()
+        else:
+            _run_workers(args, pending, write, report)
+    finally:
+        output.close()
+
+    summary = report.to_dict()
+    print(f"\n📊 {summary['ok']} planned, {summary['failed']} failed, {summary['skipped']} skipped "
+          f"in {summary['elapsed_seconds']:.1f}s ({summary['plans_per_minute']:.1f} plans/min)")
+    print(f"💰 {summary['llm_calls']} LLM calls, {summary['tokens']:,} tokens "
+          f"({summary['tokens_per_plan']:,} per plan), {summary['merged_calls']} duplicate calls merged")
+    return summary
+
+
+def _run_workers(args, pending, write, report):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    environment = split_quota(args.workers)
+    shards = [pending[i::args.workers] for i in range(args.workers)]
+    workers = [
+        context.Process(
+            target=_worker,
+            args=(shard, queue, args.mode, args.concurrency, args.timeout, args.offline, environment),
+        )
+        for shard in shards if shard
+    ]
+    for worker in workers:
+        worker.start()
+    # One stats message closes every worker's stream of results.
+    finished = 0
+    while finished < len(workers):
+        try:
+            message = queue.get(timeout=1)
+        except Empty:
+            if not any(worker.is_alive() for worker in workers):
+                # A worker died without reporting; its unfinished briefs are
+                # planned again on the next run.
+                break
+            continue
+        if "worker_stats" in message:
+            finished += 1
+            report.throttled_calls += message["worker_stats"]["throttled_calls"]
+            report.merged_calls += message["worker_stats"]["merged_calls"]
+        else:
+            write(message)
+    for worker in workers:
+        worker.join()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Plan trip briefs from a JSONL file")
+    parser.add_argument("input", help='JSONL file of {"id": ..., "brief": ...} records')
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--mode", default=None, help="Orchestration mode (default: TRIP_PLANNER_MODE or hierarchical)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Briefs in flight per worker")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (the quota is split between them)")
+    parser.add_argument("--timeout", type=float, default=BRIEF_TIMEOUT, help="Seconds per brief")
+    parser.add_argument("--retry-failed", action="store_true", help="Plan briefs that failed in an earlier run again")
+    parser.add_argument("--offline", action="store_true", help="Use the local stand-in model (no API calls)")
+    args = parser.parse_args(argv)
+    args.mode = args.mode or os.environ.get("TRIP_PLANNER_MODE", "hierarchical")
+    return args
+
+
+def main(argv=None):
+    return run_batch(parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
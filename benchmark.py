@@ -0,0 +1,253 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from google.adk.apps import App
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+
+from budget import STRUCTURED_ANSWER_TOOL
+from fake_llm import FakeGemini, estimate_tokens
+
+# ==========================================
+# OFFLINE ORCHESTRATION BENCHMARK
+# ==========================================
+# Replays every case in test/evalset.json through the real agent graph from
+# trip_planner.py, with FakeGemini standing in for the model and the
+# web_search agent. No API key or quota is used, so orchestration and caching
+# changes can be compared run against run:
+#
+#   python benchmark.py --mode all --repeat 5 --json bench.json
+#   python benchmark.py --mode fast --baseline bench.json
+
+EVALSET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test", "evalset.json")
+
+
+class RunMetricsPlugin(BasePlugin):
+    """Counts model calls, tool calls and tokens across the whole agent tree."""
+
+    def __init__(self):
+        super().__init__(name="run_metrics")
+        self.reset()
+
+    def reset(self):
+        self.llm_calls = 0
+        self.tool_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.layer_tokens = 0
+        self.calls_by_agent = {}
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        self.llm_calls += 1
+        name = callback_context.agent_name
+        self.calls_by_agent[name] = self.calls_by_agent.get(name, 0) + 1
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        usage = llm_response.usage_metadata
+        if usage and not llm_response.partial:
+            self.input_tokens += usage.prompt_token_count or 0
+            self.output_tokens += usage.candidates_token_count or 0
+        return None
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        if tool.name != STRUCTURED_ANSWER_TOOL:
+            self.tool_calls += 1
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        # Tool results are what one layer hands up to the layer above it.
+        if tool.name != STRUCTURED_ANSWER_TOOL:
+            self.layer_tokens += estimate_tokens(json.dumps(result, default=str))
+        return None
+
+    def snapshot(self):
+        return {
+            "llm_calls": self.llm_calls,
+            "tool_calls": self.tool_calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "layer_tokens": self.layer_tokens,
+            "calls_by_agent": dict(self.calls_by_agent),
+        }
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def load_eval_cases(path=EVALSET_PATH):
+    with open(path, "r") as f:
+        return json.load(f)["eval_cases"]
+
+
+def case_turns(case):
+    return [turn["user_content"]["parts"][0]["text"] for turn in case["conversation"]]
+
+
+def load_graph(fake_model, cache_dir):
+    """Imports the agent graph with the stand-in model and an empty cache dir.
+
+    Must run before any agent is built, since agents take their model from
+    the registry when they are built (on first use, see agent_registry.py).
+    """
+    os.environ["TRIP_PLANNER_CACHE_DIR"] = cache_dir
+    # The stand-in's source URLs are made up.
+    os.environ["TRIP_PLANNER_VERIFY_LINKS"] = "0"
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+    import model_registry
+    model_registry.register_model(fake_model)
+
+    import trip_planner
+    return trip_planner
+
+
+def clear_caches():
+    import specialist_cache
+    import trip_agents
+    specialist_cache.specialist_cache.invalidate()
+    trip_agents.web_search.cache.invalidate()
+
+
+async def run_case(runner, metrics, case, run_index):
+    metrics.reset()
+    session_id = f"bench_{case['eval_id']}_{run_index}"
+    start = time.perf_counter()
+    for text in case_turns(case):
+        await runner.run_debug(text, user_id="bench", session_id=session_id, quiet=True)
+    result = metrics.snapshot()
+    result["wall_seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def summarize(runs):
+    walls = [run["wall_seconds"] for run in runs]
+    last = runs[-1]
+    return {
+        "runs": len(runs),
+        "wall_p50": percentile(walls, 50),
+        "wall_p95": percentile(walls, 95),
+        "llm_calls": last["llm_calls"],
+        "tool_calls": last["tool_calls"],
+        "input_tokens": last["input_tokens"],
+        "output_tokens": last["output_tokens"],
+        "layer_tokens": last["layer_tokens"],
+        "calls_by_agent": last["calls_by_agent"],
+    }
+
+
+async def run_benchmark(args):
+    fake_model = FakeGemini(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+    )
+    trip_planner = load_graph(fake_model, args.cache_dir or tempfile.mkdtemp(prefix="trip_bench_"))
+    modes = list(trip_planner.ORCHESTRATION_MODES) if args.mode == "all" else [args.mode]
+    cases = [case for case in load_eval_cases() if not args.cases or case["eval_id"] in args.cases]
+
+    report = {
+        "config": {
+            "latency": args.latency,
+            "tokens_per_second": args.tokens_per_second,
+            "output_tokens": args.output_tokens,
+            "repeat": args.repeat,
+            "keep_cache": args.keep_cache,
+        },
+        "results": {},
+    }
+    for mode in modes:
+        metrics = RunMetricsPlugin()
+        runner = Runner(
+            app=App(name="trip_planner_bench", root_agent=trip_planner.get_coordinator(mode), plugins=[metrics]),
+            session_service=InMemorySessionService(),
+        )
+        report["results"][mode] = {}
+        for case in cases:
+            runs = []
+            for run_index in range(args.repeat):
+                if not args.keep_cache:
+                    clear_caches()
+                runs.append(await run_case(runner, metrics, case, run_index))
+            report["results"][mode][case["eval_id"]] = summarize(runs)
+    return report
+
+
+def _delta(current, previous):
+    if previous in (None, 0) or current is None:
+        return ""
+    change = (current - previous) / previous * 100
+    return f" ({change:+.0f}%)"
+
+
+def print_report(report, baseline=None):
+    header = f"{'mode':<13}{'case':<30}{'p50 s':>9}{'p95 s':>9}{'LLM':>6}{'tools':>7}{'in tok':>9}{'out tok':>9}{'layer tok':>11}"
+    print(header)
+    print("-" * len(header))
+    for mode, cases in report["results"].items():
+        for case_id, row in cases.items():
+            base = (baseline or {}).get("results", {}).get(mode, {}).get(case_id, {})
+            print(
+                f"{mode:<13}{case_id[:29]:<30}"
+                f"{row['wall_p50']:>9.3f}{row['wall_p95']:>9.3f}"
+                f"{row['llm_calls']:>6}{row['tool_calls']:>7}"
+                f"{row['input_tokens']:>9}{row['output_tokens']:>9}{row['layer_tokens']:>11}"
+            )
+            if base:
+                print(
+                    f"{'':<13}{'  vs baseline':<30}"
+                    f"{_delta(row['wall_p50'], base.get('wall_p50')):>9}{'':>9}"
+                    f"{_delta(row['llm_calls'], base.get('llm_calls')):>6}"
+                    f"{_delta(row['tool_calls'], base.get('tool_calls')):>7}"
+                    f"{_delta(row['input_tokens'], base.get('input_tokens')):>9}"
+                    f"{_delta(row['output_tokens'], base.get('output_tokens')):>9}"
+                    f"{_delta(row['layer_tokens'], base.get('layer_tokens')):>11}"
+                )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the trip planner agent graph")
+    parser.add_argument("--mode", default="all", help="Orchestration mode to run, or 'all'")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case (for p50/p95)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake model latency per call, seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Fake output speed; 0 = instant")
+    parser.add_argument("--output-tokens", type=int, default=200, help="Size of every fake text answer")
+    parser.add_argument("--cases", nargs="*", help="Only run these eval_ids")
+    parser.add_argument("--keep-cache", action="store_true", help="Do not clear caches between runs")
+    parser.add_argument("--cache-dir", help="Cache directory (default: a fresh temporary directory)")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Compare against a report written earlier with --json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.json}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+from trip_brief import REQUIRED_SLOTS, clarifying_questions, parse_conversation
+
+# ==========================================
+# BRIEF PRE-CHECK
+# ==========================================
+# Finding out that a brief has no destination used to take a model
+# round-trip: the InteractiveAgent read the conversation and asked. The
+# slots are now extracted locally before any model call. While a required
+# slot (REQUIRED_SLOTS) is missing, the turn is answered right here with
+# clarifying questions and no agent runs. Each slot is asked about once; if
+# the user answers without it, the turn goes to the agents, which can plan
+# with what they have. Either way the extracted brief is kept in session
+# state, so the agents start from a pre-filled brief. While the user
+# answers, the specialists that already have their slots start in the
+# background (see speculation.py).
+
+# Required slots already asked about in this session.
+ASKED_STATE_KEY = "brief_slots_asked"
+
+# Required slots the conversation still lacks after the latest message.
+MISSING_STATE_KEY = "brief_missing"
+
+# The extracted brief as one line, for the agents' instructions.
+PREFILL_STATE_KEY = "trip_brief_prefill"
+
+# The extracted brief's slots (TripBrief.to_dict()).
+CONVERSATION_BRIEF_KEY = "conversation_brief"
+
+
+def precheck(messages, state):
+    """Checks the brief of a conversation before any model call.
+
+    Returns (brief, questions, state_delta). `questions` is the reply to send
+    instead of running the agents, or None when they should run.
+    """
+    brief = parse_conversation(messages)
+    missing = brief.missing_slots(REQUIRED_SLOTS)
+    asked = list(state.get(ASKED_STATE_KEY) or [])
+    state_delta = {
+        MISSING_STATE_KEY: missing,
+        PREFILL_STATE_KEY: brief.describe(),
+        CONVERSATION_BRIEF_KEY: brief.to_dict(),
+    }
+    unasked = [slot for slot in missing if slot not in asked]
+    if not unasked:
+        return brief, None, state_delta
+    state_delta[ASKED_STATE_KEY] = asked + unasked
+    return brief, clarifying_questions(brief, missing), state_delta
+
+
+def clarify_brief(callback_context):
+    """before_agent_callback: replies with clarifying questions instead of
+    running the agent while the brief lacks a required slot."""
+    from google.genai import types
+    # Imported here: fast_path builds on this module.
+    from fast_path import conversation_messages
+    from research_stage import specialist_agents
+    from speculation import speculator
+
+    messages = conversation_messages(callback_context.session)
+    brief, questions, state_delta = precheck(messages, callback_context.state)
+    for key, value in state_delta.items():
+        callback_context.state[key] = value
+    invocation_context = callback_context.get_invocation_context()
+    if questions:
+        speculator.start(invocation_context, brief, "\n".join(messages), specialist_agents())
+        return types.Content(role="model", parts=[types.Part(text=questions)])
+    speculator.cancel_stale(invocation_context, brief)
+    return None
@@ -0,0 +1,204 @@
+import contextvars
+import os
+from contextlib import contextmanager
+
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+# ==========================================
+# PER-PLAN BUDGETS
+# ==========================================
+# Nothing used to bound what one plan costs: the PlannerAgent may send the
+# ResearchInstructionAgent back for more research as often as it likes, and
+# every specialist may search as often as it likes. Each turn now runs under
+# a PlanBudget, set by the entry point in a context variable like the turn
+# deadline (deadline.py). BudgetPlugin, which AgentTool sub-runners inherit,
+# counts LLM calls, tool calls and tokens across the whole agent tree
+# against it.
+#
+# Past the soft limit (SOFT_SHARE of any hard limit) the plan gets cheaper:
+# PackingAgent is skipped, AttractionsAgent is asked for fewer places,
+# specialists get fewer searches and a research tool called a second time
+# is refused. Past the hard limit, model and tool calls are answered with a
+# stop notice instead of being made. budget.report() says what was used and
+# what was cut.
+
+PLAN_LLM_CALLS = int(os.environ.get("TRIP_PLANNER_PLAN_LLM_CALLS", "60"))
+PLAN_TOOL_CALLS = int(os.environ.get("TRIP_PLANNER_PLAN_TOOL_CALLS", "60"))
+PLAN_TOKENS = int(os.environ.get("TRIP_PLANNER_PLAN_TOKENS", "400000"))
+
+# Share of a hard limit at which the plan switches to cheaper behaviour.
+SOFT_SHARE = 0.75
+
+# web_search calls a specialist may make in one run, normally and past the soft limit.
+SEARCHES_PER_SPECIALIST = 4
+SOFT_SEARCHES_PER_SPECIALIST = 1
+
+SEARCH_TOOL = "web_search"
+
+# Tools that (re-)run research; past the soft limit each runs once per plan.
+RESEARCH_TOOLS = ("ResearchInstructionAgent", "dispatch_specialists", "update_research")
+
+# Specialists left out past the soft limit.
+SOFT_SKIPPED_SPECIALISTS = ("PackingAgent",)
+
+# Extra instructions past the soft limit.
+SOFT_INSTRUCTIONS = {
+    "AttractionsAgent": "The plan is over budget: recommend at most 3 places in total and search at most once.",
+}
+
+# ADK's tool for an agent's final answer when it has both tools and an
+# output_schema. It is an answer, not a tool call, so it is not counted.
+STRUCTURED_ANSWER_TOOL = "set_model_response"
+
+STOP_NOTICE = "⚠️ This plan reached its usage limit and was stopped before it was finished."
+
+_current = contextvars.ContextVar("trip_planner_budget", default=None)
+
+
+class PlanBudget:
+    """Usage of one plan against its limits."""
+
+    def __init__(self, llm_calls=None, tool_calls=None, tokens=None, soft_share=SOFT_SHARE):
+        self.limits = {
+            "llm_calls": PLAN_LLM_CALLS if llm_calls is None else llm_calls,
+            "tool_calls": PLAN_TOOL_CALLS if tool_calls is None else tool_calls,
+            "tokens": PLAN_TOKENS if tokens is None else tokens,
+        }
+        self.soft_share = soft_share
+        self.llm_calls = 0
+        self.tool_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        # What was cut to stay within the budget, in order.
+        self.cuts = []
+        self._searches = {}
+        self._research_calls = {}
+
+    def used(self):
+        return {
+            "llm_calls": self.llm_calls,
+            "tool_calls": self.tool_calls,
+            "tokens": self.input_tokens + self.output_tokens,
+        }
+
+    def share_used(self):
+        """The largest share of any limit used so far."""
+        used = self.used()
+        return max(used[name] / limit if limit else 0.0 for name, limit in self.limits.items())
+
+    @property
+    def soft_reached(self):
+        return self.share_used() >= self.soft_share
+
+    @property
+    def hard_reached(self):
+        return self.share_used() >= 1.0
+
+    def cut(self, what):
+        if what not in self.cuts:
+            self.cuts.append(what)
+
+    def allow_search(self, run_key):
+        """Counts a search of one specialist run; False once it has had its share."""
+        limit = SOFT_SEARCHES_PER_SPECIALIST if self.soft_reached else SEARCHES_PER_SPECIALIST
+        self._searches[run_key] = self._searches.get(run_key, 0) + 1
+        return self._searches[run_key] <= limit
+
+    def allow_research(self, tool_name):
+        """Counts a research tool call; False when it would re-research past the soft limit."""
+        self._research_calls[tool_name] = self._research_calls.get(tool_name, 0) + 1
+        return self._research_calls[tool_name] == 1 or not self.soft_reached
+
+    def report(self):
+        return {
+            **self.used(),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "limits": dict(self.limits),
+            "soft_limit_reached": self.soft_reached,
+            "hard_limit_reached": self.hard_reached,
+            "cuts": list(self.cuts),
+        }
+
+    def summary(self):
+        text = (f"{self.llm_calls} LLM calls · {self.tool_calls} tool calls · "
+                f"{self.input_tokens:,} in / {self.output_tokens:,} out tokens")
+        if self.hard_reached:
+            text += " · usage limit reached"
+        elif self.soft_reached:
+            text += " · over the soft limit"
+        if self.cuts:
+            text += f" ({'; '.join(self.cuts)})"
+        return text
+
+
+def current_budget():
+    """The PlanBudget of the plan being run, or None outside of one."""
+    return _current.get()
+
+
+def clear_budget():
+    """Runs the rest of the current task without a budget (background work)."""
+    _current.set(None)
+
+
+@contextmanager
+def plan_budget(**limits):
+    """Runs the body (one turn) under a new PlanBudget, which it yields."""
+    budget = PlanBudget(**limits)
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        try:
+            _current.reset(token)
+        except ValueError:
+            # Closed from another context (an abandoned stream); nothing to restore.
+            pass
+
+
+class BudgetPlugin(BasePlugin):
+    """Counts and limits the calls of the current PlanBudget."""
+
+    def __init__(self):
+        super().__init__(name="plan_budget")
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        budget = current_budget()
+        if budget is None:
+            return None
+        if budget.hard_reached:
+            budget.cut(f"stopped {callback_context.agent_name}")
+            return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=STOP_NOTICE)]))
+        instruction = SOFT_INSTRUCTIONS.get(callback_context.agent_name)
+        if instruction and budget.soft_reached:
+            llm_request.append_instructions([instruction])
+            budget.cut(f"fewer results from {callback_context.agent_name}")
+        budget.llm_calls += 1
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        budget = current_budget()
+        usage = llm_response.usage_metadata
+        if budget is not None and usage and not llm_response.partial:
+            budget.input_tokens += usage.prompt_token_count or 0
+            budget.output_tokens += usage.candidates_token_count or 0
+        return None
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        budget = current_budget()
+        if budget is None or tool.name == STRUCTURED_ANSWER_TOOL:
+            return None
+        if budget.hard_reached:
+            budget.cut(f"stopped {tool.name} calls")
+            return {"error": "This plan's usage limit is reached. Answer with what you already have."}
+        if tool.name == SEARCH_TOOL and not budget.allow_search((tool_context.invocation_id, tool_context.agent_name)):
+            budget.cut(f"limited searches of {tool_context.agent_name}")
+            return {"error": "Search limit reached. Answer from what you have found so far."}
+        if tool.name in RESEARCH_TOOLS and not budget.allow_research(tool.name):
+            budget.cut("no re-research")
+            return {"note": "No further research within this plan's budget. Continue with the findings you have."}
+        budget.tool_calls += 1
+        return None
@@ -0,0 +1,112 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Directory for on-disk caches shared by every process on this machine.
+CACHE_DIR = os.environ.get(
+    "TRIP_PLANNER_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"),
+)
+
+
+def cache_path(filename):
+    """Returns the path of a cache file inside CACHE_DIR, creating the directory."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    return os.path.join(CACHE_DIR, filename)
+
+
+class SqliteCache:
+    """Small persistent key/value cache on SQLite.
+
+    Every entry has its own TTL. When the table grows past `max_entries` the
+    least recently used entries are evicted. Values must be JSON serializable.
+    Hit and miss counters are kept per instance (i.e. per process).
+    """
+
+    def __init__(self, path, max_entries=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used)")
+
+    def get(self, key):
+        """Returns the cached value for `key`, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        """Stores `value` under `key` for `ttl` seconds."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, last_used)"
+                " VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM entries ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def invalidate(self, key=None, prefix=None):
+        """Removes one key, every key starting with `prefix`, or everything.
+
+        Returns the number of entries removed.
+        """
+        with self._lock:
+            if key is not None:
+                cursor = self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            elif prefix is not None:
+                escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+                cursor = self._conn.execute(
+                    "DELETE FROM entries WHERE key LIKE ? ESCAPE '\\'", (escaped + "%",)
+                )
+            else:
+                cursor = self._conn.execute("DELETE FROM entries")
+        return cursor.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self),
+        }
+
+    def close(self):
+        self._conn.close()
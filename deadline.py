@@ -0,0 +1,134 @@
+import asyncio
+import contextvars
+import os
+import time
+from contextlib import asynccontextmanager
+
+# ==========================================
+# TURN DEADLINES
+# ==========================================
+# A turn used to have no time limit: one specialist stuck in retry backoff
+# held up the whole Interactive -> Planner -> ResearchInstruction chain, and
+# Ctrl+C could only kill the process. Every turn now runs under a Deadline,
+# set by the entry point (main.py, server.py, batch.py) in a context
+# variable. asyncio copies context variables into the tasks it creates, so
+# the deadline reaches every AgentTool sub-runner without being passed down.
+#
+# A deadline has two limits:
+#   - the research cutoff, `reserve` seconds before the end: the research
+#     stage cancels the specialists still running (and with them their model
+#     and search calls) and marks their sections missing, so the compiler
+#     still has time to write a report from the ones that finished;
+#   - the hard limit: the invocation is aborted through ADK's abort signal
+#     and the turn ends with whatever was answered so far. ADK only checks
+#     that signal between events, so a call still in flight ABORT_GRACE
+#     seconds later is cancelled (see streaming.iter_turn).
+#
+# `cut_short()` moves the research cutoff to now (the CLI's first Ctrl+C).
+
+TURN_DEADLINE = float(os.environ.get("TRIP_PLANNER_TURN_DEADLINE", "240"))
+
+# Share of the deadline kept back for compiling the report.
+COMPILE_SHARE = 0.25
+
+# Seconds after the hard limit before calls still in flight are cancelled.
+ABORT_GRACE = 1.0
+
+_current = contextvars.ContextVar("trip_planner_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Work was cancelled because the turn ran out of time."""
+
+
+class Deadline:
+    """Time limit of one turn, on the monotonic clock."""
+
+    def __init__(self, seconds=None, reserve=None):
+        self.seconds = TURN_DEADLINE if seconds is None else seconds
+        self.reserve = self.seconds * COMPILE_SHARE if reserve is None else reserve
+        self.at = time.monotonic() + self.seconds
+        self.research_at = self.at - self.reserve
+        self.abort_signal = asyncio.Event()
+        self.cut_off = False
+        self._changed = asyncio.Event()
+
+    def remaining(self):
+        return max(0.0, self.at - time.monotonic())
+
+    def research_left(self):
+        """Seconds until the research cutoff (0 once it has passed)."""
+        return max(0.0, self.research_at - time.monotonic())
+
+    def cut_short(self):
+        """Ends the research now; the compiler keeps its reserve."""
+        now = time.monotonic()
+        self.research_at = min(self.research_at, now)
+        self.at = min(self.at, now + self.reserve)
+        self._changed.set()
+
+    async def _until(self, limit):
+        while True:
+            left = getattr(self, limit) - time.monotonic()
+            if left <= 0:
+                return
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), left)
+            except asyncio.TimeoutError:
+                pass
+
+    async def watch(self):
+        """Sets the abort signal at the hard limit."""
+        await self._until("at")
+        self.abort_signal.set()
+
+    async def within(self, awaitable, timeout=None, research=True):
+        """Awaits `awaitable`, cancelling it once `timeout` seconds pass or
+        the research cutoff (the hard limit with research=False) does.
+
+        Raises asyncio.TimeoutError for `timeout` and DeadlineExceeded for
+        the deadline.
+        """
+        task = asyncio.ensure_future(awaitable)
+        cutoff = asyncio.ensure_future(self._until("research_at" if research else "at"))
+        try:
+            done, _ = await asyncio.wait([task, cutoff], timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            cutoff.cancel()
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        if task in done or (task.done() and not task.cancelled()):
+            return task.result()
+        if cutoff in done:
+            self.cut_off = True
+            raise DeadlineExceeded("not finished within the turn's time limit")
+        raise asyncio.TimeoutError()
+
+
+def current_deadline():
+    """The Deadline of the turn being run, or None outside of one."""
+    return _current.get()
+
+
+def clear_deadline():
+    """Runs the rest of the current task without a deadline (background work)."""
+    _current.set(None)
+
+
+@asynccontextmanager
+async def turn_deadline(seconds=None, reserve=None):
+    """Runs the body (one turn) under a new Deadline, which it yields."""
+    deadline = Deadline(seconds, reserve)
+    token = _current.set(deadline)
+    watchdog = asyncio.create_task(deadline.watch())
+    try:
+        yield deadline
+    finally:
+        watchdog.cancel()
+        try:
+            _current.reset(token)
+        except ValueError:
+            # Closed from another context (an abandoned stream); nothing to restore.
+            pass
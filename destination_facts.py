@@ -0,0 +1,356 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from cache_store import cache_path
+
+# ==========================================
+# LOCAL DESTINATION FACTS
+# ==========================================
+# Some of what the specialists search for hardly ever changes: plug types
+# and voltage (PackingAgent), currency and tipping (FinanceAgent), visa-free
+# stays and emergency numbers (ResearchAgent), airport-to-city transit
+# (LogisticsAgent). Those facts live in destination_facts.json, with a
+# source link each, and are built into an indexed SQLite file keyed by
+# country and city. The specialists that need them get the
+# lookup_destination_facts tool, which answers from that file without a
+# model call, and use web_search only for the topics it reports missing or
+# older than the topic's TOPIC_MAX_AGE_DAYS.
+#
+#   python destination_facts.py build      # (re)build from the JSON file
+#   python destination_facts.py refresh    # re-search stale facts online
+#   python destination_facts.py stats
+#   python destination_facts.py lookup Tokyo plug_type visa_free
+#
+# A city has its own facts (airport_transit) and those of its country.
+
+SEED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "destination_facts.json")
+FACTS_DB = os.environ.get("TRIP_PLANNER_FACTS_DB") or cache_path("destination_facts.sqlite")
+
+DAY = 24 * 60 * 60
+
+# How long a checked fact may be used before it must be searched again.
+TOPIC_MAX_AGE_DAYS = {
+    "plug_type": 3650,
+    "voltage": 3650,
+    "currency": 3650,
+    "emergency_number": 3650,
+    "tipping": 730,
+    "airport_transit": 730,
+    "visa_free": 180,
+}
+
+# Facts kept per city; all other topics are kept per country.
+CITY_TOPICS = ("airport_transit",)
+
+# What `refresh` searches for, after the place name.
+TOPIC_QUERIES = {
+    "plug_type": "power plug types",
+    "voltage": "mains voltage and frequency",
+    "currency": "currency and card or cash use",
+    "emergency_number": "emergency phone numbers",
+    "tipping": "tipping customs",
+    "airport_transit": "airport to city center transport options",
+    "visa_free": "visa-free entry for tourists, which nationalities and how long",
+}
+
+# Topics each specialist looks up; the others do not get the tool.
+SPECIALIST_TOPICS = {
+    "ResearchAgent": ["visa_free", "emergency_number"],
+    "LogisticsAgent": ["airport_transit"],
+    "FinanceAgent": ["currency", "tipping"],
+    "PackingAgent": ["plug_type", "voltage"],
+}
+
+FACTS_INSTRUCTION = """
+
+**Stable destination facts**: Before searching, call `lookup_destination_facts`
+for the destination with the topics {topics}. Use the facts it returns
+with their source links. Use `web_search` only for the topics it lists under
+`search_for`, and for everything else you need.
+"""
+
+_MARKDOWN_LINK = re.compile(r"\[[^\]]*\]\((https?://[^)\s]+)\)")
+
+
+def _checked_timestamp(text):
+    return time.mktime(date.fromisoformat(text).timetuple())
+
+
+def build(path=None, seed_path=SEED_PATH):
+    """Builds the facts database from the JSON seed file; returns the number of facts.
+
+    Written to a temporary file first, so processes reading the old file
+    never see a half-built one.
+    """
+    path = path or FACTS_DB
+    with open(seed_path, "r") as f:
+        seed = json.load(f)
+    default_checked = seed.get("checked")
+
+    tmp_path = f"{path}.building"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.executescript(
+        "CREATE TABLE places (name TEXT PRIMARY KEY, country TEXT);"
+        "CREATE TABLE aliases (alias TEXT PRIMARY KEY, place TEXT NOT NULL);"
+        "CREATE TABLE facts ("
+        " place TEXT NOT NULL, topic TEXT NOT NULL, value TEXT NOT NULL,"
+        " source TEXT NOT NULL, checked REAL NOT NULL,"
+        " PRIMARY KEY (place, topic)) WITHOUT ROWID;"
+    )
+    count = 0
+    for kind in ("countries", "cities"):
+        for name, entry in seed.get(kind, {}).items():
+            conn.execute("INSERT INTO places VALUES (?, ?)", (name, entry.get("country")))
+            for alias in [name.lower(), *entry.get("aliases", [])]:
+                conn.execute("INSERT OR IGNORE INTO aliases VALUES (?, ?)", (alias.lower(), name))
+            for topic, fact in entry.get("facts", {}).items():
+                checked = _checked_timestamp(fact.get("checked", default_checked))
+                conn.execute("INSERT INTO facts VALUES (?, ?, ?, ?, ?)",
+                             (name, topic, fact["value"], fact["source"], checked))
+                count += 1
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, path)
+    return count
+
+
+class FactStore:
+    """Read access to the facts database, with per-process hit counters."""
+
+    def __init__(self, path=None):
+        self.path = path or FACTS_DB
+        if not os.path.exists(self.path):
+            build(self.path)
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._load_places()
+
+    def _load_places(self):
+        # A few hundred names at most; matching them in memory beats a query per word.
+        self._countries = dict(self._conn.execute("SELECT name, country FROM places"))
+        self._aliases = dict(self._conn.execute("SELECT alias, place FROM aliases"))
+        alternatives = sorted(self._aliases, key=len, reverse=True)
+        self._alias_pattern = re.compile(r"\b(" + "|".join(map(re.escape, alternatives)) + r")\b") if alternatives else None
+
+    def resolve(self, destination):
+        """The known place named in `destination` (a name or a whole brief),
+        preferring a city to a country; None if there is none."""
+        if not self._alias_pattern:
+            return None
+        places = [self._aliases[alias] for alias in self._alias_pattern.findall(destination.lower())]
+        cities = [place for place in places if self._countries.get(place)]
+        return (cities or places or [None])[0]
+
+    def lookup(self, destination, topics=None, now=None):
+        """Fresh facts about `destination` for `topics` (default: all), and
+        the topics to search for instead."""
+        now = now or time.time()
+        topics = [topic for topic in topics or [] if topic in TOPIC_MAX_AGE_DAYS] or list(TOPIC_MAX_AGE_DAYS)
+        place = self.resolve(destination or "")
+        result = {"destination": place, "facts": [], "search_for": []}
+        rows = {}
+        if place:
+            places = [place, self._countries.get(place)]
+            marks = ",".join("?" for _ in topics)
+            with self._lock:
+                for row_place in filter(None, reversed(places)):
+                    for topic, value, source, checked in self._conn.execute(
+                        f"SELECT topic, value, source, checked FROM facts WHERE place = ? AND topic IN ({marks})",
+                        (row_place, *topics),
+                    ):
+                        # City facts, read last, win over country facts.
+                        rows[topic] = (row_place, value, source, checked)
+
+        with self._lock:
+            self.lookups += 1
+            for topic in topics:
+                row = rows.get(topic)
+                if row is None:
+                    self.misses += 1
+                    result["search_for"].append(topic)
+                elif now - row[3] > TOPIC_MAX_AGE_DAYS[topic] * DAY:
+                    self.stale += 1
+                    result["search_for"].append(topic)
+                else:
+                    self.hits += 1
+                    result["facts"].append({
+                        "topic": topic,
+                        "place": row[0],
+                        "fact": row[1],
+                        "source": row[2],
+                        "checked": date.fromtimestamp(row[3]).isoformat(),
+                    })
+        if not place:
+            result["note"] = "No stored facts for this destination; search for them."
+        return result
+
+    def due(self, now=None):
+        """(place, topic) pairs that are missing or stale, oldest first."""
+        now = now or time.time()
+        with self._lock:
+            checked = {(place, topic): at for place, topic, at in
+                       self._conn.execute("SELECT place, topic, checked FROM facts")}
+        pairs = []
+        for place, country in self._countries.items():
+            for topic, max_age in TOPIC_MAX_AGE_DAYS.items():
+                if (topic in CITY_TOPICS) != bool(country):
+                    continue
+                at = checked.get((place, topic), 0.0)
+                if now - at > max_age * DAY:
+                    pairs.append((at, place, topic))
+        return [(place, topic) for _, place, topic in sorted(pairs)]
+
+    def update(self, place, topic, value, source, checked=None):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO facts VALUES (?, ?, ?, ?, ?)",
+                               (place, topic, value, source, checked or time.time()))
+
+    def stats(self):
+        answered = self.hits + self.misses + self.stale
+        with self._lock:
+            facts = self._conn.execute("SELECT COUNT(*) FROM facts").fetchone()[0]
+        return {
+            "places": len(self._countries),
+            "facts": facts,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": round(self.hits / answered, 3) if answered else 0.0,
+        }
+
+
+_store = None
+
+
+def get_fact_store():
+    global _store
+    if _store is None:
+        _store = FactStore()
+    return _store
+
+
+def fact_stats():
+    """Hit rate of this process's lookups (empty before the first one)."""
+    return _store.stats() if _store is not None else {}
+
+
+def lookup_destination_facts(destination: str, topics: list[str]) -> dict:
+    """Looks up stable facts about a country or city from the local fact store.
+
+    Args:
+        destination: The city or country, e.g. "Tokyo" or "Japan".
+        topics: Any of plug_type, voltage, currency, tipping, visa_free,
+            emergency_number, airport_transit.
+
+    Returns:
+        The facts found, each with its source link, and `search_for`: the
+        topics that are missing or out of date, to look up with web_search.
+    """
+    return get_fact_store().lookup(destination, topics)
+
+
+def facts_instruction(agent_name):
+    """Instruction to add for a specialist that gets the tool ("" if it does not)."""
+    topics = SPECIALIST_TOPICS.get(agent_name)
+    if not topics:
+        return ""
+    return FACTS_INSTRUCTION.format(topics=", ".join(topics))
+
+
+def _answer_fact(answer):
+    """The fact and its first source link from a search answer, or None without a link."""
+    match = _MARKDOWN_LINK.search(answer or "")
+    if not match:
+        return None
+    fact = " ".join(_MARKDOWN_LINK.sub("", answer).split())
+    return fact[:500], match.group(1)
+
+
+async def refresh(store, search, limit=None, now=None):
+    """Searches again for missing or stale facts and stores the answers.
+
+    `search` is an async callable from a query to an answer with markdown
+    source links. Answers without a link are not stored. Returns the
+    refreshed (place, topic) pairs.
+    """
+    refreshed = []
+    for place, topic in store.due(now)[:limit]:
+        found = _answer_fact(await search(f"{place} {TOPIC_QUERIES[topic]}"))
+        if found:
+            store.update(place, topic, *found, checked=now)
+            refreshed.append((place, topic))
+    return refreshed
+
+
+def web_search():
+    """Async query -> answer, through the same grounded search agent the specialists use."""
+    # Imported here: only `refresh` needs the model and google.adk.
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from model_registry import configure_api_key, get_model
+    from search_cache import create_search_agent
+
+    configure_api_key()
+    runner = Runner(agent=create_search_agent(get_model()), session_service=InMemorySessionService(),
+                    app_name="destination_facts", auto_create_session=True)
+
+    async def search(query):
+        events = await runner.run_debug(query, quiet=True)
+        texts = [part.text for event in events if event.content for part in event.content.parts or [] if part.text]
+        return texts[-1] if texts else ""
+
+    return search
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build, refresh and query the local destination facts")
+    parser.add_argument("command", choices=["build", "refresh", "stats", "lookup"])
+    parser.add_argument("args", nargs="*", help="lookup: destination, then topics")
+    parser.add_argument("--limit", type=int, help="refresh: most facts to search for")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "build":
+        print(f"📚 Built {build()} facts into {FACTS_DB}")
+        return
+    store = get_fact_store()
+    if args.command == "refresh":
+        print(f"🔄 {len(store.due())} facts missing or out of date")
+        refreshed = asyncio.run(refresh(store, web_search(), limit=args.limit))
+        for place, topic in refreshed:
+            print(f"   ✅ {place}: {topic}")
+        print(f"📚 Refreshed {len(refreshed)} facts")
+    elif args.command == "stats":
+        stats = store.stats()
+        print(f"📚 {stats['facts']} facts about {stats['places']} places in {store.path}; "
+              f"{len(store.due())} missing or out of date")
+    elif args.command == "lookup":
+        if not args.args:
+            sys.exit("lookup needs a destination")
+        started = time.perf_counter()
+        result = store.lookup(args.args[0], args.args[1:])
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        print(f"⚡ {(time.perf_counter() - started) * 1e6:.0f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark import case_turns, load_eval_cases, percentile
+
+# ==========================================
+# PARALLEL EVALUATION
+# ==========================================
+# Runs the test/evalset.json cases against the real agent graph, several
+# at a time, and scores every turn that has a `final_response`:
+#
+#   python evaluate.py --concurrency 3 --json eval.json
+#   python evaluate.py --offline --baseline eval.json
+#
+# All cases share one Runner, so they also share the process-wide rate
+# limiter, caches and model clients, as users of server.py do. Each turn
+# runs under its own PlanBudget (budget.py), which counts the LLM calls,
+# tool calls and tokens of that turn alone while other cases run alongside.
+#
+# The score is `key_phrase_recall`: the share of the reference's words
+# (with repeats) found in the answer, i.e. ROUGE-1 recall. The references in
+# the evalset are key phrases ("MASTER PLAN TABLE"), not whole answers, so
+# ADK's response_match_score (ROUGE-1 F-measure) would mark every full plan
+# down for being longer than the phrase. Its threshold lives in
+# test/key_phrase_config.json, apart from ADK's test_config.json.
+#
+# The run fails (exit status 1) when a case scores below the threshold or,
+# with --baseline, when quality or performance regressed against that
+# report beyond the tolerances below. --offline uses the stand-in model
+# from fake_llm.py: no API key or quota.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = os.path.join(ROOT, "test", "key_phrase_config.json")
+
+# Allowed growth over the baseline before a run counts as a regression.
+LATENCY_TOLERANCE = 0.25
+# Latency differences below this many seconds are noise, whatever the ratio.
+LATENCY_SLACK = 0.1
+USAGE_TOLERANCE = 0.10
+# Allowed drop of a case's score below its baseline score.
+SCORE_TOLERANCE = 0.05
+
+
+def load_threshold(path=CONFIG_PATH):
+    with open(path, "r") as f:
+        return json.load(f)["criteria"]["key_phrase_recall"]
+
+
+def _words(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def key_phrase_recall(response, reference):
+    """Share of the reference's words (with repeats) found in the response."""
+    expected = _words(reference)
+    if not expected:
+        return 1.0
+    available = {}
+    for word in _words(response):
+        available[word] = available.get(word, 0) + 1
+    matched = 0
+    for word in expected:
+        if available.get(word, 0) > 0:
+            available[word] -= 1
+            matched += 1
+    return round(matched / len(expected), 3)
+
+
+def reference_texts(case):
+    """The expected final response of each turn, or None where there is none."""
+    references = []
+    for turn in case["conversation"]:
+        parts = (turn.get("final_response") or {}).get("parts") or []
+        text = "".join(part.get("text", "") for part in parts)
+        references.append(text or None)
+    return references
+
+
+async def run_case(runner, case, run_index, threshold):
+    """Plays one case in its own session; returns its scores and costs."""
+    from budget import plan_budget
+    from deadline import turn_deadline
+    from streaming import stream_turn
+
+    eval_id = case["eval_id"]
+    user_id = f"eval_{eval_id}_{run_index}"
+    result = {"eval_id": eval_id, "run": run_index, "scores": [], "turn_seconds": [],
+              "llm_calls": 0, "tool_calls": 0, "input_tokens": 0, "output_tokens": 0}
+    started = time.perf_counter()
+    try:
+        for text, reference in zip(case_turns(case), reference_texts(case)):
+            with plan_budget() as budget:
+                async with turn_deadline():
+                    answer, metrics = await stream_turn(runner, user_id, user_id, text)
+            result["turn_seconds"].append(round(metrics.total, 3))
+            usage = budget.report()
+            for key in ("llm_calls", "tool_calls", "input_tokens", "output_tokens"):
+                result[key] += usage[key]
+            if reference is not None:
+                result["scores"].append(key_phrase_recall(answer, reference))
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    result["score"] = min(result["scores"]) if result["scores"] else None
+    result["passed"] = "error" not in result and all(score >= threshold for score in result["scores"])
+    return result
+
+
+def summarize_case(runs):
+    seconds = [run["seconds"] for run in runs]
+    scores = [run["score"] for run in runs if run["score"] is not None]
+    return {
+        "runs": len(runs),
+        "pass_rate": round(sum(run["passed"] for run in runs) / len(runs), 3),
+        "score": min(scores) if scores else None,
+        "latency_p50": percentile(seconds, 50),
+        "latency_p95": percentile(seconds, 95),
+        "llm_calls": max(run["llm_calls"] for run in runs),
+        "tool_calls": max(run["tool_calls"] for run in runs),
+        "tokens": max(run["input_tokens"] + run["output_tokens"] for run in runs),
+        "errors": sorted({run["error"] for run in runs if "error" in run}),
+    }
+
+
+def summarize(runs, threshold):
+    seconds = [run["seconds"] for run in runs]
+    return {
+        "threshold": threshold,
+        "runs": len(runs),
+        "passed": sum(run["passed"] for run in runs),
+        "pass_rate": round(sum(run["passed"] for run in runs) / len(runs), 3) if runs else 0.0,
+        "latency_p50": percentile(seconds, 50),
+        "latency_p95": percentile(seconds, 95),
+        "latency_p99": percentile(seconds, 99),
+        "llm_calls": sum(run["llm_calls"] for run in runs),
+        "tokens": sum(run["input_tokens"] + run["output_tokens"] for run in runs),
+    }
+
+
+def build_runner(mode, offline, latency):
+    """One Runner for all cases. Imports the agent graph, so call it after
+    TRIP_PLANNER_CACHE_DIR is set."""
+    if offline:
+        from benchmark import load_graph
+        from fake_llm import FakeGemini
+        trip_planner = load_graph(FakeGemini(latency=latency), os.environ["TRIP_PLANNER_CACHE_DIR"])
+    else:
+        from model_registry import configure_api_key
+        configure_api_key()
+        import trip_planner
+
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from budget import BudgetPlugin
+    return Runner(
+        agent=trip_planner.get_coordinator(mode),
+        session_service=InMemorySessionService(),
+        app_name="trip_planner_eval",
+        plugins=[BudgetPlugin()],
+        auto_create_session=True,
+    )
+
+
+async def run_eval(args):
+    from benchmark import clear_caches
+
+    threshold = args.threshold if args.threshold is not None else load_threshold()
+    cases = [case for case in load_eval_cases() if not args.cases or case["eval_id"] in args.cases]
+    runner = build_runner(args.mode, args.offline, args.latency)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def _one(case, run_index):
+        async with semaphore:
+            return await run_case(runner, case, run_index, threshold)
+
+    runs = []
+    for run_index in range(args.repeat):
+        # Every round starts cold, so repeats measure the same work.
+        clear_caches()
+        runs.extend(await asyncio.gather(*(_one(case, run_index) for case in cases)))
+    from destination_facts import fact_stats
+    return {
+        "config": {"mode": args.mode, "offline": args.offline, "concurrency": args.concurrency,
+                   "repeat": args.repeat, "latency": args.latency if args.offline else None},
+        "summary": summarize(runs, threshold),
+        "destination_facts": fact_stats(),
+        "cases": {case["eval_id"]: summarize_case([run for run in runs if run["eval_id"] == case["eval_id"]])
+                  for case in cases},
+        "runs": runs,
+    }
+
+
+def _grew(current, previous, tolerance, slack=0.0):
+    if current is None or not previous:
+        return False
+    return current > previous * (1 + tolerance) and current - previous > slack
+
+
+def regressions(report, baseline):
+    """What got worse than `baseline`, as readable lines (empty when nothing did)."""
+    found = []
+    for eval_id, row in report["cases"].items():
+        base = baseline.get("cases", {}).get(eval_id)
+        if not base:
+            continue
+        if row["pass_rate"] < base["pass_rate"]:
+            found.append(f"{eval_id}: pass rate {base['pass_rate']:.0%} -> {row['pass_rate']:.0%}")
+        if row["score"] is not None and base["score"] is not None and row["score"] < base["score"] - SCORE_TOLERANCE:
+            found.append(f"{eval_id}: score {base['score']:.2f} -> {row['score']:.2f}")
+        if _grew(row["latency_p95"], base["latency_p95"], LATENCY_TOLERANCE, LATENCY_SLACK):
+            found.append(f"{eval_id}: p95 latency {base['latency_p95']:.2f}s -> {row['latency_p95']:.2f}s")
+        for key in ("llm_calls", "tokens"):
+            if _grew(row[key], base[key], USAGE_TOLERANCE):
+                found.append(f"{eval_id}: {key} {base[key]} -> {row[key]}")
+    return found
+
+
+def print_report(report):
+    header = f"{'case':<30}{'pass':>6}{'score':>7}{'p50 s':>8}{'p95 s':>8}{'LLM':>6}{'tools':>7}{'tokens':>9}"
+    print(header)
+    print("-" * len(header))
+    for eval_id, row in report["cases"].items():
+        mark = "✅" if row["pass_rate"] == 1 else "❌"
+        score = f"{row['score']:.2f}" if row["score"] is not None else "-"
+        print(f"{eval_id[:29]:<30}{mark:>5}{score:>7}{row['latency_p50']:>8.2f}{row['latency_p95']:>8.2f}"
+              f"{row['llm_calls']:>6}{row['tool_calls']:>7}{row['tokens']:>9}")
+        for error in row["errors"]:
+            print(f"   ⚠️ {error}")
+    summary = report["summary"]
+    print(f"\n📊 {summary['passed']}/{summary['runs']} runs passed (threshold {summary['threshold']}) · "
+          f"p50 {summary['latency_p50']:.2f}s · p95 {summary['latency_p95']:.2f}s · p99 {summary['latency_p99']:.2f}s")
+    facts = report.get("destination_facts")
+    if facts:
+        print(f"📚 Destination facts: {facts['hits']} of {facts['hits'] + facts['misses'] + facts['stale']} "
+              f"topics answered locally ({facts['hit_rate']:.0%})")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate the trip planner on test/evalset.json")
+    # Not imported from trip_planner: the agent graph must load after the cache dir is set.
+    parser.add_argument("--mode", default=os.environ.get("TRIP_PLANNER_MODE", "hierarchical"),
+                        help="Orchestration mode (hierarchical or fast)")
+    parser.add_argument("--concurrency", type=int, default=3, help="Cases run at the same time")
+    parser.add_argument("--repeat", type=int, default=1, help="Rounds over all cases (for p50/p95)")
+    parser.add_argument("--cases", nargs="*", help="Only run these eval_ids")
+    parser.add_argument("--threshold", type=float, help="Passing key_phrase_recall (default: test/key_phrase_config.json)")
+    parser.add_argument("--offline", action="store_true", help="Use the local stand-in model (no API calls)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stand-in model latency per call, seconds")
+    parser.add_argument("--cache-dir", help="Cache directory (default: a fresh temporary directory)")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Fail on regressions against a report written earlier with --json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Answers cached by an earlier run would make the runs incomparable.
+    os.environ["TRIP_PLANNER_CACHE_DIR"] = args.cache_dir or tempfile.mkdtemp(prefix="trip_eval_")
+    report = asyncio.run(run_eval(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to {args.json}")
+
+    failed = report["summary"]["passed"] < report["summary"]["runs"]
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            found = regressions(report, json.load(f))
+        for line in found:
+            print(f"❌ Regression: {line}")
+        failed = failed or bool(found)
+    if failed:
+        sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
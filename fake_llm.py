@@ -0,0 +1,216 @@
+import asyncio
+import json
+import re
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.tools import AgentTool
+from google.genai import types
+
+# ==========================================
+# OFFLINE STAND-IN MODEL
+# ==========================================
+# A deterministic replacement for Gemini so the real agent graph can run
+# without an API key or quota. It calls every tool it is offered once per
+# turn (which walks the whole Interactive -> Planner -> ResearchInstruction
+# -> specialist -> web_search chain), then answers with canned text of a
+# configurable size. The web_search agent's answers stand in for
+# google_search results.
+
+# Registered name must look like a Gemini model: google_search refuses others.
+FAKE_MODEL_NAME = "gemini-2.5-flash-lite"
+
+LOREM = (
+    "travellers should plan ahead check official sources compare prices book early "
+    "keep copies of documents and allow extra time for transfers between areas"
+).split()
+
+
+# Plausible values for short string fields of structured answers.
+SHORT_STRINGS = {"currency": "USD"}
+
+# Tools a real model only calls on follow-up turns, instead of delegating.
+FOLLOW_UP_TOOLS = {"update_research"}
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def _request_text(llm_request):
+    chunks = [str(llm_request.config.system_instruction or "")]
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            if part.text:
+                chunks.append(part.text)
+            elif part.function_call:
+                chunks.append(str(part.function_call.args))
+            elif part.function_response:
+                chunks.append(str(part.function_response.response))
+    return "\n".join(chunks)
+
+
+def _last_user_text(llm_request):
+    for content in reversed(llm_request.contents or []):
+        if content.role == "user":
+            texts = [part.text for part in content.parts or [] if part.text]
+            if texts:
+                return "\n".join(texts)
+    return ""
+
+
+def _researched_before(llm_request):
+    """Whether an earlier turn of the conversation called any tool."""
+    contents = list(llm_request.contents or [])
+    index = len(contents)
+    for index in range(len(contents) - 1, -1, -1):
+        content = contents[index]
+        if content.role == "user" and any(part.text for part in content.parts or []):
+            break
+    return any(part.function_call for content in contents[:index] for part in content.parts or [])
+
+
+def agent_name(llm_request):
+    """Name of the calling agent, from the identity line ADK adds to every request."""
+    instruction = str(llm_request.config.system_instruction or "")
+    match = re.search(r'Your internal name is "([^"]+)"', instruction)
+    return match.group(1) if match else "Agent"
+
+
+def sample_from_schema(schema, name="value", defs=None, index=0):
+    """Builds a small value that validates against a JSON schema."""
+    defs = schema.get("$defs", defs or {})
+    if "$ref" in schema:
+        return sample_from_schema(defs[schema["$ref"].split("/")[-1]], name, defs, index)
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return sample_from_schema(options[0], name, defs, index)
+    kind = schema.get("type", "string")
+    if kind == "object":
+        return {
+            prop: sample_from_schema(sub, prop, defs, index)
+            for prop, sub in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [sample_from_schema(schema.get("items", {}), name, defs, i) for i in range(2)]
+    if kind in ("number", "integer"):
+        return 100 * (index + 1)
+    if kind == "boolean":
+        return True
+    if schema.get("default") is not None:
+        return schema["default"]
+    if name in SHORT_STRINGS:
+        return SHORT_STRINGS[name]
+    if "url" in name.lower():
+        # Every other URL repeats, like real specialists citing the same page.
+        return f"https://example.com/{name.lower()}/{index % 2}"
+    return " ".join(LOREM[(index + i) % len(LOREM)] for i in range(8))
+
+
+class FakeGemini(BaseLlm):
+    """Deterministic stand-in for Gemini with configurable latency and size."""
+
+    model: str = FAKE_MODEL_NAME
+    latency: float = 0.05
+    """Fixed seconds per call (network + queueing)."""
+    tokens_per_second: float = 0.0
+    """Output generation speed; 0 means output takes no extra time."""
+    output_tokens: int = 200
+    """Approximate size of every text answer."""
+
+    calls: int = 0
+    input_tokens: int = 0
+    output_token_count: int = 0
+
+    def reset_counters(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_token_count = 0
+
+    def _answer(self, llm_request):
+        role = agent_name(llm_request)
+        subject = _last_user_text(llm_request).splitlines()[0][:80] if _last_user_text(llm_request) else "the trip"
+        words = [LOREM[i % len(LOREM)] for i in range(max(1, self.output_tokens - 40))]
+        body = " ".join(words)
+        slug = role.lower()
+        if role == "InteractiveAgent":
+            # The Master Plan Table is rendered from record_plan_rows.
+            return f"# Trip Plan\n\n{body}\n"
+        return f"{role} findings for {subject}: {body} [Source](https://example.com/{slug})"
+
+    def _tool_call(self, llm_request):
+        """Calls the first offered tool not yet answered in this turn.
+
+        Returns the call and whether the answer text goes with it: like a real
+        model, the last plain function call (e.g. record_plan_rows) is made in
+        the same response as the written answer.
+        """
+        answered = set()
+        for content in reversed(llm_request.contents or []):
+            if content.role == "user" and any(part.text for part in content.parts or []):
+                break
+            for part in content.parts or []:
+                if part.function_response:
+                    answered.add(part.function_response.name)
+        # set_model_response carries the structured final answer of agents with
+        # an output_schema, so it goes last, after the real tools.
+        tools = sorted(llm_request.tools_dict.items(), key=lambda item: item[0] == "set_model_response")
+        if _researched_before(llm_request) and FOLLOW_UP_TOOLS & set(llm_request.tools_dict):
+            # A follow-up refreshes the research instead of delegating again.
+            tools = [(name, tool) for name, tool in tools if not isinstance(tool, AgentTool)]
+        else:
+            tools = [(name, tool) for name, tool in tools if name not in FOLLOW_UP_TOOLS]
+        pending = [(name, tool) for name, tool in tools if name not in answered]
+        if not pending:
+            return None, False
+        name, tool = pending[0]
+        declaration = tool._get_declaration()
+        schema = declaration.parameters_json_schema or {}
+        if name == "set_model_response":
+            return types.FunctionCall(name=name, args=sample_from_schema(schema)), False
+        properties = schema.get("properties", {})
+        if not properties and declaration.parameters and declaration.parameters.properties:
+            properties = {prop: {"type": "string"} for prop in declaration.parameters.properties}
+        text = _last_user_text(llm_request)
+        args = {
+            prop: text if sub.get("type", "string") == "string" else sample_from_schema({**sub, "$defs": schema.get("$defs", {})}, prop)
+            for prop, sub in properties.items()
+        }
+        with_answer = len(pending) == 1 and not isinstance(tool, AgentTool)
+        return types.FunctionCall(name=name, args=args), with_answer
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls += 1
+        prompt_tokens = estimate_tokens(_request_text(llm_request))
+        self.input_tokens += prompt_tokens
+
+        call, with_answer = self._tool_call(llm_request) if llm_request.tools_dict else (None, False)
+        if call:
+            parts = [types.Part(function_call=call)]
+            if with_answer:
+                parts.insert(0, types.Part(text=self._answer(llm_request)))
+            output = estimate_tokens(json.dumps(call.args)) + sum(estimate_tokens(p.text) for p in parts if p.text)
+            await asyncio.sleep(self.latency)
+            usage = types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens, candidates_token_count=output, total_token_count=prompt_tokens + output
+            )
+            self.output_token_count += output
+            yield LlmResponse(content=types.Content(role="model", parts=parts), usage_metadata=usage)
+            return
+
+        text = self._answer(llm_request)
+        output = estimate_tokens(text)
+        self.output_token_count += output
+        generation_time = output / self.tokens_per_second if self.tokens_per_second else 0.0
+        usage = types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens, candidates_token_count=output, total_token_count=prompt_tokens + output
+        )
+        await asyncio.sleep(self.latency)
+        if stream:
+            chunks = [text[i:i + 200] for i in range(0, len(text), 200)]
+            for chunk in chunks:
+                await asyncio.sleep(generation_time / len(chunks))
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=chunk)]), partial=True)
+        else:
+            await asyncio.sleep(generation_time)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]), usage_metadata=usage)
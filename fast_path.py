@@ -0,0 +1,108 @@
+from typing import AsyncGenerator, Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.context import Context
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from brief_precheck import precheck
+
+from findings import FINDINGS_SOURCES_KEY, FINDINGS_STATE_KEY
+from replanning import replan
+from research_stage import specialist_agents
+from session_store import USER_LINE_PREFIX
+from speculation import speculator
+
+# ==========================================
+# FAST-PATH ORCHESTRATION
+# ==========================================
+# The PlannerAgent and ResearchInstructionAgent mostly forward the brief down
+# and the findings back up, which costs two extra model round-trips and sends
+# the findings through the context twice. The fast path does that plumbing in
+# Python: collect the brief from the conversation, run the specialists
+# concurrently, and hand the findings to the compiler (the InteractiveAgent
+# role) through session state. Follow-up turns only re-run the specialists
+# affected by what changed (see replanning.py), and a brief that lacks a
+# required slot is answered with clarifying questions before anything runs
+# (see brief_precheck.py).
+
+
+def conversation_messages(session):
+    """Everything the user has said in this session, oldest first."""
+    messages = []
+    for event in session.events:
+        compaction = event.actions.compaction if event.actions else None
+        if compaction and compaction.compacted_content:
+            for part in compaction.compacted_content.parts or []:
+                messages.extend(
+                    line[len(USER_LINE_PREFIX):].strip()
+                    for line in (part.text or "").splitlines()
+                    if line.startswith(USER_LINE_PREFIX)
+                )
+            continue
+        if event.author != "user" or not event.content or not event.content.parts:
+            continue
+        text = " ".join(part.text for part in event.content.parts if part.text)
+        if text.strip():
+            messages.append(text.strip())
+    return messages
+
+
+class FastPathCoordinator(BaseAgent):
+    """Deterministic orchestrator: brief -> concurrent specialists -> compiler.
+
+    Only the specialists and the compiler call the model. While the brief
+    lacks a required slot, the clarifying questions are answered locally.
+    When it still has no destination after that, the compiler is run
+    without findings so it can ask the user for the missing details.
+    """
+
+    compiler: LlmAgent
+    specialists: Optional[list[BaseAgent]] = None
+    """Specialists to dispatch; defaults to research_stage.specialist_agents()."""
+
+    def __init__(self, name, compiler, specialists=None, description=""):
+        super().__init__(
+            name=name,
+            description=description,
+            compiler=compiler,
+            specialists=specialists,
+            sub_agents=[compiler],
+        )
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        messages = conversation_messages(ctx.session)
+        brief_text = "\n".join(messages)
+        brief, questions, state_delta = precheck(messages, ctx.session.state)
+
+        if questions:
+            speculator.start(ctx, brief, brief_text, self.specialists or specialist_agents())
+            # Answered in the compiler's name: it is the agent the user talks to.
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.compiler.name,
+                branch=ctx.branch,
+                content=types.Content(role="model", parts=[types.Part(text=questions)]),
+                actions=EventActions(state_delta=state_delta),
+            )
+            return
+
+        speculator.cancel_stale(ctx, brief)
+        if brief.destination:
+            findings = await replan(brief_text, brief, Context(ctx), agents=self.specialists)
+            state_delta.update(findings.state_delta())
+        else:
+            state_delta.update({FINDINGS_STATE_KEY: "", FINDINGS_SOURCES_KEY: []})
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta=state_delta),
+        )
+
+        async for event in self.compiler.run_async(ctx):
+            yield event
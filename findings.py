@@ -0,0 +1,160 @@
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from pydantic import BaseModel, Field
+
+# ==========================================
+# COMPACT STRUCTURED FINDINGS
+# ==========================================
+# Specialists used to answer in long Markdown prose, which was then re-sent
+# as context by every layer above them. They now answer with this schema
+# (set as their output_schema). The research stage merges all answers into
+# one compact text block with a single de-duplicated source list, and only
+# the InteractiveAgent receives it. The layers in between get a short digest.
+
+# Session state keys the compiled findings and their numbered sources are
+# delivered through.
+FINDINGS_STATE_KEY = "research_findings"
+FINDINGS_SOURCES_KEY = "research_sources"
+# Per-specialist results and the brief they answered, kept so a follow-up
+# turn can re-run only the specialists its change affects.
+FINDINGS_RESULTS_KEY = "research_results"
+FINDINGS_BRIEF_KEY = "research_brief"
+
+
+class Fact(BaseModel):
+    text: str = Field(description="One short sentence.")
+    url: Optional[str] = Field(default=None, description="Source URL for this fact.")
+
+
+class Cost(BaseModel):
+    item: str
+    amount: float
+    currency: str = Field(description="ISO code, e.g. USD, JPY.")
+    per: str = Field(default="trip", description="day, night, person or trip.")
+    url: Optional[str] = None
+
+
+class Section(BaseModel):
+    title: str
+    facts: list[Fact] = []
+    costs: list[Cost] = []
+
+
+class Link(BaseModel):
+    title: str
+    url: str
+
+
+class SpecialistFindings(BaseModel):
+    """Output schema shared by all specialists."""
+
+    sections: list[Section] = []
+    links: list[Link] = Field(default=[], description="Booking or info pages not tied to one fact.")
+
+
+# Appended to every specialist's instruction.
+FINDINGS_FORMAT_INSTRUCTION = """
+**OUTPUT FORMAT**:
+Answer with structured findings only: one section per numbered topic above.
+Facts are single short sentences; put each source URL in that fact's `url`.
+Give costs as numbers with a currency code. No prose, no Markdown, no repetition.
+"""
+
+_MARKDOWN_LINK = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)")
+
+
+def normalize_url(url):
+    """Key used to spot the same page cited twice (case, trailing slash,
+    fragment and utm_* tracking parameters are ignored)."""
+    parts = urlsplit(url.strip())
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.lower().startswith("utm_")])
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), query, ""))
+
+
+class LinkTable:
+    """Numbers every distinct source once; facts refer to it as [n].
+
+    URLs in `skip` (e.g. dead links) are never numbered or cited.
+    """
+
+    def __init__(self, skip=()):
+        self.links = []
+        self._ids = {}
+        self._skip = {normalize_url(url) for url in skip}
+
+    def ref(self, url, title=""):
+        if not url:
+            return None
+        key = normalize_url(url)
+        if key in self._skip:
+            return None
+        if key not in self._ids:
+            self.links.append({"title": title, "url": url.strip()})
+            self._ids[key] = len(self.links)
+        elif title and not self.links[self._ids[key] - 1]["title"]:
+            self.links[self._ids[key] - 1]["title"] = title
+        return self._ids[key]
+
+    def cite(self, url, title=""):
+        ref = self.ref(url, title)
+        return f" [{ref}]" if ref else ""
+
+    def __len__(self):
+        return len(self.links)
+
+
+def _render_structured(findings, links):
+    lines = []
+    for section in findings.get("sections", []):
+        lines.append(f"### {section['title']}")
+        for fact in section.get("facts", []):
+            lines.append(f"- {fact['text']}{links.cite(fact.get('url'))}")
+        for cost in section.get("costs", []):
+            lines.append(
+                f"- $ {cost['item']}: {cost['amount']:g} {cost['currency']}/{cost.get('per', 'trip')}"
+                f"{links.cite(cost.get('url'))}"
+            )
+    for link in findings.get("links", []):
+        links.ref(link["url"], link["title"])
+    return lines
+
+
+def _render_prose(text, links):
+    # Specialists without the schema (or older cached answers) still get
+    # their links folded into the shared source list.
+    return [_MARKDOWN_LINK.sub(lambda m: f"{m.group(1)}{links.cite(m.group(2), m.group(1))}", text.strip())]
+
+
+def render_findings(results, errors=None, links=None):
+    """Renders specialist results (structured dicts or prose) as one compact
+    block: a section per specialist, then one numbered source list. Pass a
+    LinkTable to keep the numbered sources."""
+    links = LinkTable() if links is None else links
+    lines = []
+    for agent_name, result in results.items():
+        lines.append(f"## {agent_name}")
+        if isinstance(result, dict):
+            lines.extend(_render_structured(result, links))
+        else:
+            lines.extend(_render_prose(str(result), links))
+    for agent_name, message in (errors or {}).items():
+        lines.append(f"## {agent_name}")
+        lines.append(f"_No findings: {message}_")
+    if links:
+        lines.append("## Sources")
+        for number, link in enumerate(links.links, 1):
+            title = f"{link['title']}: " if link["title"] else ""
+            lines.append(f"[{number}] {title}{link['url']}")
+    return "\n".join(lines)
+
+
+def summarize_result(result):
+    """One-line description of a specialist result, for the digest."""
+    if not isinstance(result, dict):
+        return f"{len(str(result))} characters of notes"
+    sections = result.get("sections", [])
+    facts = sum(len(section.get("facts", [])) + len(section.get("costs", [])) for section in sections)
+    titles = ", ".join(section["title"] for section in sections)
+    return f"{facts} facts: {titles}"
@@ -0,0 +1,198 @@
+import asyncio
+import os
+import re
+from urllib.parse import urlsplit
+
+import httpx
+
+from cache_store import SqliteCache, cache_path
+from findings import normalize_url
+from search_cache import DAY, HOUR
+
+# ==========================================
+# LINK VERIFICATION
+# ==========================================
+# Specialists are asked to cite a source for every fact, but nothing checked
+# that those pages exist; a hallucinated or moved URL went straight into the
+# Master Plan Table. After the research stage, every cited URL is checked
+# concurrently. Dead sources are left out of the findings, so the compiler
+# never sees them, and dead links in a finished report can be annotated or
+# dropped.
+#
+# All checks share one pooled async HTTP client, make at most MAX_PER_HOST
+# requests to the same host at a time, and cache outcomes by URL (a dead
+# page is checked again sooner than a live one). Only a 404 or 410 marks a
+# link dead; a host that cannot be reached (DNS, TLS, refused connection)
+# may be a blip, so it counts as unknown and is tried again within minutes.
+# A batch stops after CHECK_TIME_LIMIT; links it did not get to are kept. If
+# every check in a batch fails to connect, the network is assumed to be
+# down and nothing is cached.
+
+MAX_PER_HOST = 4
+
+# Seconds a single check may take; slow sites count as "unknown", not dead.
+LINK_TIMEOUT = 0.8
+# Seconds one batch of checks may take in all, so one slow host cannot hold
+# up a turn. Links not checked by then count as "unknown" and are not cached.
+CHECK_TIME_LIMIT = float(os.environ.get("TRIP_PLANNER_LINK_CHECK_SECONDS", "0.9"))
+
+# Status of a checked URL.
+ALIVE, DEAD, UNKNOWN = "alive", "dead", "unknown"
+
+STATUS_TTLS = {ALIVE: 7 * DAY, DEAD: 1 * DAY, UNKNOWN: 1 * HOUR}
+# For a host that could not be reached at all.
+UNREACHABLE_TTL = 5 * 60
+
+# Statuses that mean the page is gone. Anything else that is not a success
+# (403, 429, 5xx) is often a bot filter or a blip, so it is not held
+# against the link.
+DEAD_STATUS_CODES = {404, 410}
+
+# Some servers reject HEAD; those are checked again with GET.
+RETRY_WITH_GET = {403, 405, 501}
+
+MARKDOWN_LINK = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)")
+BARE_URL = re.compile(r"https?://[^\s)\]>\"'|]+")
+
+USER_AGENT = "Mozilla/5.0 (compatible; TripPlannerLinkCheck/1.0)"
+
+
+def verification_enabled():
+    """Link checks can be switched off (e.g. offline runs with made-up URLs)."""
+    return os.environ.get("TRIP_PLANNER_VERIFY_LINKS", "1") != "0"
+
+
+def extract_links(text):
+    """Every distinct http(s) URL in a text (Markdown links and bare URLs), in order."""
+    urls = []
+    for match in BARE_URL.finditer(text or ""):
+        url = match.group(0).rstrip(".,;:")
+        if url not in urls:
+            urls.append(url)
+    return urls
+
+
+def annotate_dead_links(text, dead, drop=False):
+    """Marks Markdown links to dead URLs as unavailable, or with `drop`
+    keeps only their title."""
+    dead = {normalize_url(url) for url in dead}
+
+    def _replace(match):
+        title, url = match.group(1), match.group(2)
+        if normalize_url(url) not in dead:
+            return match.group(0)
+        return title if drop else f"{match.group(0)} _(link unavailable)_"
+
+    return MARKDOWN_LINK.sub(_replace, text)
+
+
+class LinkChecker:
+    """Checks URLs concurrently with one pooled client and a TTL cache."""
+
+    def __init__(self, cache=None, max_per_host=MAX_PER_HOST, timeout=LINK_TIMEOUT,
+                 time_limit=CHECK_TIME_LIMIT):
+        if cache is None:
+            cache = SqliteCache(cache_path("link_cache.sqlite"), max_entries=5000)
+        self.cache = cache
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.time_limit = time_limit
+        self.requests = 0
+        self._client = None
+        self._client_loop = None
+        self._hosts = {}
+
+    def _http(self):
+        # httpx clients belong to the event loop they were created in.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=self.timeout,
+                headers={"User-Agent": USER_AGENT},
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+            self._client_loop = loop
+            self._hosts = {}
+        return self._client
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc.lower()
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.max_per_host)
+        return self._hosts[host]
+
+    async def _fetch_status(self, url):
+        """(status, connected) for one URL."""
+        client = self._http()
+        async with self._host_slot(url):
+            try:
+                self.requests += 1
+                response = await client.head(url)
+                if response.status_code in RETRY_WITH_GET:
+                    self.requests += 1
+                    async with client.stream("GET", url) as response:
+                        pass
+            except httpx.TimeoutException:
+                return UNKNOWN, True
+            except (httpx.ConnectError, httpx.UnsupportedProtocol):
+                # Unresolvable host, failed TLS handshake or nothing listening.
+                return UNKNOWN, False
+            except httpx.HTTPError:
+                return UNKNOWN, True
+        if response.status_code < 400:
+            return ALIVE, True
+        if response.status_code in DEAD_STATUS_CODES:
+            return DEAD, True
+        return UNKNOWN, True
+
+    async def check(self, urls):
+        """{url: "alive" | "dead" | "unknown"} for every URL."""
+        statuses = {}
+        pending = []
+        for url in dict.fromkeys(urls):
+            cached = self.cache.get(url)
+            if cached is None:
+                pending.append(url)
+            else:
+                statuses[url] = cached
+        if not pending:
+            return statuses
+
+        tasks = {url: asyncio.ensure_future(self._fetch_status(url)) for url in pending}
+        done, unfinished = await asyncio.wait(tasks.values(), timeout=self.time_limit)
+        for task in unfinished:
+            task.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+        results = {url: task.result() for url, task in tasks.items() if task in done}
+        offline = not any(connected for _, connected in results.values())
+        for url in pending:
+            if url not in results or offline:
+                # Out of time, or every check failed to connect: say nothing, cache nothing.
+                statuses[url] = UNKNOWN
+                continue
+            status, connected = results[url]
+            statuses[url] = status
+            self.cache.set(url, status, STATUS_TTLS[status] if connected else UNREACHABLE_TTL)
+        return statuses
+
+    async def dead_links(self, urls):
+        statuses = await self.check(urls)
+        return {url for url, status in statuses.items() if status == DEAD}
+
+    async def verify_text(self, text, drop=False):
+        """Checks every link in a report; returns the annotated text and the dead URLs."""
+        dead = await self.dead_links(extract_links(text))
+        return (annotate_dead_links(text, dead, drop) if dead else text), sorted(dead)
+
+    def stats(self):
+        return {"requests": self.requests, **self.cache.stats()}
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Shared by every agent and session in the process.
+link_checker = LinkChecker()
@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from benchmark import percentile
+
+# ==========================================
+# SERVICE LOAD TEST
+# ==========================================
+# Simulates many users talking to server.py at once. Each user creates a
+# session and sends one brief; the answer is read as SSE. Run it against a
+# server using the stand-in model to measure the service itself:
+#
+#   python server.py --offline --in-memory --max-plans 8 &
+#   python load_test.py --users 200
+
+DEFAULT_BRIEF = "Plan a 1-week work trip to Tokyo in October. Budget $2000."
+
+
+async def read_events(response):
+    """Yields (event, data) pairs from an SSE response."""
+    event = None
+    async for line in response.aiter_lines():
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: ") and event:
+            yield event, json.loads(line[len("data: "):])
+            event = None
+
+
+async def run_user(client, user_id, text):
+    """One user's session: returns status, timings and answer size."""
+    result = {"user_id": user_id}
+    try:
+        return await _run_user(client, user_id, text, result)
+    except httpx.HTTPError as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+        return result
+
+
+async def _run_user(client, user_id, text, result):
+    started = time.perf_counter()
+    response = await client.post(f"/users/{user_id}/sessions")
+    session_id = response.json()["session_id"]
+    async with client.stream("POST", f"/users/{user_id}/sessions/{session_id}/messages",
+                             json={"text": text}) as response:
+        if response.status_code != 200:
+            result.update(status=response.status_code)
+            await response.aread()
+            return result
+        chars = 0
+        async for event, data in read_events(response):
+            if event == "text":
+                if chars == 0:
+                    result["first_text_seconds"] = time.perf_counter() - started
+                chars += len(data["text"])
+            elif event == "done":
+                result.update(status="ok", plan_rows=len(data["plan_rows"]))
+            elif event == "error":
+                result.update(status="error", error=data["error"])
+        result.setdefault("status", "error")
+        result["chars"] = chars
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+async def run_load(base_url, users, text=DEFAULT_BRIEF, timeout=300):
+    """Starts `users` users at once and summarizes how the service coped."""
+    # No keep-alive: with hundreds of streams in flight a user's pooled
+    # connection can sit idle past the server's keep-alive timeout and be
+    # closed under it, which would show up as spurious errors.
+    limits = httpx.Limits(max_connections=users + 10, max_keepalive_connections=0)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        results = await asyncio.gather(*(run_user(client, f"user-{i}", text) for i in range(users)))
+        elapsed = time.perf_counter() - started
+        # Identical specialist runs and searches merged by the server (single_flight.py)
+        merged = (await client.get("/health")).json().get("merged_calls", {})
+    ok = [result for result in results if result["status"] == "ok"]
+    seconds = [result["seconds"] for result in ok]
+    first = [result["first_text_seconds"] for result in ok if "first_text_seconds" in result]
+    summary = {
+        "users": users,
+        "ok": len(ok),
+        "rejected": sum(1 for result in results if result["status"] == 429),
+        "errors": sum(1 for result in results if result["status"] not in ("ok", 429)),
+        "elapsed_seconds": round(elapsed, 2),
+        "plans_per_minute": round(len(ok) / elapsed * 60, 1) if elapsed else 0.0,
+        "p50_seconds": percentile(seconds, 50),
+        "p95_seconds": percentile(seconds, 95),
+        "first_text_p50_seconds": percentile(first, 50),
+        "merged_calls": merged,
+    }
+    return summary, results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the trip planner service")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=100, help="Users sending a brief at the same time")
+    parser.add_argument("--text", default=DEFAULT_BRIEF, help="Brief every user sends")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    summary, _ = asyncio.run(run_load(args.url, args.users, args.text))
+    print(f"📊 {summary['ok']}/{summary['users']} answered, {summary['rejected']} rejected (429), "
+          f"{summary['errors']} errors in {summary['elapsed_seconds']:.1f}s "
+          f"({summary['plans_per_minute']:.1f} plans/min)")
+    if summary["ok"]:
+        print(f"   p50 {summary['p50_seconds']:.2f}s · p95 {summary['p95_seconds']:.2f}s · "
+              f"first text p50 {summary['first_text_p50_seconds']:.2f}s")
+    for name, stats in summary["merged_calls"].items():
+        print(f"   🔀 {name}: {stats['calls']} calls made, {stats['merged']} merged into them")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
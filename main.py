@@ -1,98 +1,94 @@
+import argparse
 import asyncio
 import os
 import sys
 import datetime
-import re
+import signal
+import threading
 
 # Add the current directory to sys.path to ensure imports work
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-# Import the API Key setup first to ensure env vars are set
-try:
-    from api.api import API_Key
-    os.environ["GOOGLE_API_KEY"] = API_Key
-except ImportError:
-    print("Warning: api.api module not found or API_Key missing.")
-except Exception as e:
-    print(f"Warning setting API Key: {e}")
-
-try:
-    from google.adk.runners import Runner
-    from google.adk.sessions import InMemorySessionService
-    from trip_planner import trip_coordinator
-except ImportError as e:
-    print(f"Error importing dependencies: {e}")
-    sys.exit(1)
-
-def save_transcript(user_input, agent_response, session_id):
-    """Saves the conversation exchange to a markdown file."""
-    filename = f"transcript_{session_id}.md"
-    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    # Create file with header if it doesn't exist
-    if not os.path.exists(filename):
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(f"# Trip Planner Session Transcript: {session_id}\n")
-            f.write(f"Started: {timestamp}\n\n")
-    
-    with open(filename, "a", encoding="utf-8") as f:
-        f.write(f"## {timestamp}\n\n")
-        f.write(f"**User**: {user_input}\n\n")
-        f.write(f"**TripCoordinator**: {agent_response}\n\n")
-        f.write("---\n\n")
-
-def extract_markdown_tables(text):
-    """Extracts markdown tables from text."""
-    lines = text.split('\n')
-    table_lines = []
-    tables = []
-    inside_table = False
-    
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        # Check for table row (starts and ends with | usually, or just contains |)
-        # Robust check: look for pipe and ensure it's not just a sentence with a pipe.
-        # Markdown tables usually start with a header row, then a separator row |---|
-        
-        if stripped.startswith('|'):
-            if not inside_table:
-                # Potential start of table. Check if next line is separator.
-                if i + 1 < len(lines) and set(lines[i+1].strip()) <= set('| -:'):
-                     inside_table = True
-            
-            if inside_table:
-                table_lines.append(line)
+# Only light modules are imported up front. google.adk, the agent graph and
+# the model client load in a background thread while the user types (see
+# CliRuntime), so the prompt appears at once and "quit" never pays for them.
+from trip_planner import DEFAULT_MODE, ORCHESTRATION_MODES
+
+CLI_USER = "cli_user"
+
+class TranscriptWriter:
+    """Writes the transcript incrementally while a response streams in.
+
+    The file stays open for the whole session and is flushed after every
+    chunk, so a crash mid-turn still leaves the partial answer on disk.
+    Without streaming, each turn's answer is written in one chunk.
+    """
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.filename = f"transcript_{session_id}.md"
+        self.file = None
+
+    def _open(self):
+        is_new = not os.path.exists(self.filename)
+        self.file = open(self.filename, "a", encoding="utf-8")
+        if is_new:
+            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.file.write(f"# Trip Planner Session Transcript: {self.session_id}\n")
+            self.file.write(f"Started: {timestamp}\n\n")
+
+    def start_turn(self, user_input):
+        if self.file is None:
+            self._open()
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.file.write(f"## {timestamp}\n\n")
+        self.file.write(f"**User**: {user_input}\n\n")
+        self.file.write("**TripCoordinator**: ")
+        self.file.flush()
+
+    def write(self, chunk):
+        self.file.write(chunk)
+        self.file.flush()
+
+    def end_turn(self, metrics=None):
+        if metrics:
+            self.file.write(f"\n\n_⏱️ {metrics.summary()}_\n\n")
         else:
-            if inside_table:
-                # Table ended
-                tables.append("\n".join(table_lines))
-                table_lines = []
-                inside_table = False
-    
-    # Capture last table if text ended
-    if inside_table and table_lines:
-        tables.append("\n".join(table_lines))
-        
-    return tables
-
-def save_plan_table(agent_response, session_id):
-    """Extracts and saves the plan table."""
-    tables = extract_markdown_tables(agent_response)
-    
-    if not tables:
-        print("No structured table found in the response to save.")
+            self.file.write("\n\n")
+        self.file.write("---\n\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+def save_plan_table(rows, session_id):
+    """Saves the plan rows as a Markdown table, JSON and CSV."""
+    from plan_table import render_table, write_csv, write_json
+
+    if not rows:
+        print("No structured plan rows to save.")
         return
 
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"trip_plan_{session_id}_{timestamp}.md"
-    
-    with open(filename, "w", encoding="utf-8") as f:
+    base = f"trip_plan_{session_id}_{timestamp}"
+
+    with open(f"{base}.md", "w", encoding="utf-8") as f:
         f.write(f"# Trip Plan Summary - {timestamp}\n\n")
-        for i, table in enumerate(tables):
-            f.write(table)
-            f.write("\n\n")
-            
-    print(f"Plan table saved to {filename}")
+        f.write(render_table(rows))
+        f.write("\n")
+    write_json(rows, f"{base}.json")
+    write_csv(rows, f"{base}.csv")
+
+    print(f"Plan table saved to {base}.md, {base}.json and {base}.csv")
+
+async def current_plan_rows(runner, session_id):
+    """Plan rows the InteractiveAgent recorded in the session, if any."""
+    from plan_table import PLAN_ROWS_STATE_KEY
+    session = await runner.session_service.get_session(
+        app_name=runner.app_name, user_id=CLI_USER, session_id=session_id
+    )
+    return session.state.get(PLAN_ROWS_STATE_KEY) if session else None
 
 async def print_agent_response(response_events):
     """Helper to extract and print the final text response from the agent.
@@ -120,34 +116,346 @@ async def print_agent_response(response_events):
     
     return found_text
 
-async def main():
+def print_activity(kind, agent_name, running):
+    """Shows which agent is currently working while a turn streams."""
+    if kind == "start":
+        print(f"   ⏳ {agent_name} is working...", flush=True)
+    else:
+        print(f"   ✅ {agent_name} finished", flush=True)
+
+async def run_streaming_turn(runner, user_input, session_id, transcript):
+    """Runs one turn, printing and saving the response as it streams in.
+       Returns the full response text.
+    """
+    from rate_limiter import rate_limiter
+    from streaming import stream_turn
+
+    started = False
+
+    def on_text(chunk):
+        nonlocal started
+        if not started:
+            print("\nTripCoordinator:")
+            started = True
+        print(chunk, end="", flush=True)
+        transcript.write(chunk)
+
+    waited_before = rate_limiter.stats()["total_wait_seconds"]
+    transcript.start_turn(user_input)
+    try:
+        agent_text, metrics = await stream_turn(
+            runner, CLI_USER, session_id, user_input, on_text=on_text
+        )
+    except Exception:
+        transcript.write("\n\n_(turn failed)_\n\n---\n\n")
+        raise
+    except asyncio.CancelledError:
+        transcript.write("\n\n_(turn cancelled)_\n\n---\n\n")
+        raise
+    transcript.end_turn(metrics)
+    print(f"\n\n⏱️ {metrics.summary()}")
+    limiter = rate_limiter.stats()
+    queued = limiter["total_wait_seconds"] - waited_before
+    if queued > 0.05:
+        print(f"   (waited {queued:.1f}s for API quota; {limiter['throttled_calls']} throttled calls so far)")
+    print()
+    return agent_text
+
+async def run_plain_turn(runner, user_input, session_id, transcript):
+    """Runs one turn and prints the whole response at the end.
+       Returns the response text.
+    """
+    from deadline import DeadlineExceeded, current_deadline
+
+    deadline = current_deadline()
+    try:
+        # Use run_debug as run() seems to have signature issues in this version
+        try:
+            response = await deadline.within(
+                runner.run_debug(user_input, user_id=CLI_USER, session_id=session_id), research=False
+            )
+        except TypeError:
+            # Fallback if run_debug doesn't accept session_id
+            response = await deadline.within(runner.run_debug(user_input), research=False)
+    except DeadlineExceeded:
+        print(f"\n⏱️ No answer within the {deadline.seconds:.0f}s time limit.\n")
+        return ""
+
+    agent_text = await print_agent_response(response)
+
+    # Save to transcript
+    if agent_text:
+        transcript.start_turn(user_input)
+        transcript.write(agent_text)
+        transcript.end_turn()
+    return agent_text
+
+async def run_with_deadline(turn):
+    """Runs one turn (a coroutine) under the turn deadline (deadline.py).
+
+    The first Ctrl+C stops the research and has the report compiled from the
+    specialists that finished; the second cancels the turn. Either way the
+    prompt comes back instead of the process ending. Returns the turn's text.
+    """
+    from deadline import turn_deadline
+
+    async with turn_deadline() as deadline:
+        task = asyncio.create_task(turn)
+        interrupts = 0
+
+        def on_interrupt():
+            nonlocal interrupts
+            interrupts += 1
+            if interrupts == 1:
+                print("\n⏹️ Stopping the research; compiling what was found so far "
+                      "(Ctrl+C again to cancel the turn)...", flush=True)
+                deadline.cut_short()
+            else:
+                task.cancel()
+
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGINT, on_interrupt)
+            handling = True
+        except (NotImplementedError, RuntimeError):
+            # No signal handlers here (e.g. Windows): Ctrl+C ends the session as before
+            handling = False
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if interrupts < 2:
+                raise
+            print("\n⏹️ Turn cancelled.\n")
+            return ""
+        finally:
+            if handling:
+                loop.remove_signal_handler(signal.SIGINT)
+
+def print_profile(tracer, session_id):
+    """Prints the per-agent summary of the last turn and saves its trace."""
+    from tracing import format_summary, trace_filename
+
+    if not tracer.traces:
+        return
+    trace = tracer.traces[-1]
+    print("\n📊 Agent profile for this turn:")
+    print(format_summary(trace))
+    print(f"Trace saved to {tracer.export(trace_filename(session_id), trace)}\n")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="AI Trip Planner CLI")
+    parser.add_argument(
+        "--mode",
+        choices=list(ORCHESTRATION_MODES),
+        default=DEFAULT_MODE,
+        help="hierarchical: Interactive -> Planner -> ResearchInstruction agents; "
+             "fast: specialists are dispatched directly from Python (fewer LLM calls)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream the response as it is generated and report time-to-first-token",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Trace every agent, model and tool call; print a per-agent table and save a JSON trace each turn",
+    )
+    replay = parser.add_mutually_exclusive_group()
+    replay.add_argument(
+        "--record",
+        metavar="LOG",
+        help="Append every event, model response and search result of the session to a JSONL log",
+    )
+    replay.add_argument(
+        "--replay",
+        metavar="LOG",
+        help="Re-run the user messages of a recorded log, answering from the log (no API calls)",
+    )
+    parser.add_argument(
+        "--session",
+        default="user_session_1",
+        help="Conversation to continue; sessions are saved in TRIP_PLANNER_SESSION_DB "
+             "(default: .cache/sessions.sqlite)",
+    )
+    return parser.parse_args()
+
+class CliRuntime:
+    """The runner and its plugins: everything that needs google.adk."""
+
+    def __init__(self, args):
+        from google.adk.apps import App
+        from google.adk.runners import Runner
+        from google.adk.sessions import InMemorySessionService
+        from budget import BudgetPlugin
+        from model_registry import configure_api_key
+        from recording import RecorderPlugin, ReplayPlugin
+        from session_store import CompactingSessionService, compaction_config
+        from streaming import AgentActivityPlugin
+        from tracing import TracingPlugin
+        from trip_planner import get_coordinator
+
+        configure_api_key()
+        # Counts every call of the agent tree against the turn's PlanBudget
+        plugins = [BudgetPlugin()]
+        if args.stream:
+            plugins.append(AgentActivityPlugin(on_change=print_activity))
+        self.tracer = TracingPlugin() if args.profile else None
+        if self.tracer:
+            plugins.append(self.tracer)
+        self.recorder = RecorderPlugin(args.record) if args.record else None
+        self.replay = ReplayPlugin(args.replay) if args.replay else None
+        if self.recorder:
+            plugins.append(self.recorder)
+        if self.replay:
+            # Before any other plugin, so recorded answers short-circuit the model
+            plugins.insert(0, self.replay)
+        # Sessions persist in SQLite; old turns are compacted into a summary.
+        # A replay starts from a fresh, throwaway session like the recording did.
+        self.session_service = InMemorySessionService() if self.replay else CompactingSessionService()
+        self.runner = Runner(
+            app=App(
+                name="trip_planner_cli",
+                root_agent=get_coordinator(args.mode),
+                plugins=plugins,
+                events_compaction_config=compaction_config(),
+            ),
+            session_service=self.session_service,
+            auto_create_session=True,
+        )
+        self.resumed = False
+        self.warm_up_task = None
+
+    async def start(self, session_id):
+        """Checks for a saved session and opens the model connection."""
+        from model_registry import warm_up
+
+        # Only checks that the session exists; its events are loaded on the first turn
+        saved = await self.session_service.list_sessions(app_name=self.runner.app_name, user_id=CLI_USER)
+        self.resumed = any(session.id == session_id for session in saved.sessions)
+        if not self.replay:
+            self.warm_up_task = asyncio.create_task(warm_up())
+        return self
+
+    async def close(self):
+        if self.recorder:
+            await self.recorder.close()
+        if self.warm_up_task and not self.warm_up_task.done():
+            self.warm_up_task.cancel()
+
+
+def load_in_background(load, name="runtime-loader"):
+    """Runs `load` in a daemon thread and returns a future for its result.
+
+    Unlike asyncio.to_thread, whose worker threads are joined when the event
+    loop shuts down, quitting never waits for it.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def _resolve(result, error):
+        if future.done():
+            return
+        if error:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _run():
+        result, error = None, None
+        try:
+            result = load()
+        except Exception as e:
+            error = e
+        try:
+            loop.call_soon_threadsafe(_resolve, result, error)
+        except RuntimeError:
+            # The loop is closed: the user quit before loading finished.
+            pass
+
+    threading.Thread(target=_run, name=name, daemon=True).start()
+    return future
+
+
+async def read_input(prompt):
+    """input() that does not block the event loop.
+
+    Runs on a daemon thread rather than asyncio.to_thread: asyncio.run joins
+    its executor threads on exit, so Ctrl+C at a pending prompt would wait
+    for Enter.
+    """
+    return await load_in_background(lambda: input(prompt), name="input-reader")
+
+
+async def load_runtime(args, session_id):
+    runtime = await load_in_background(lambda: CliRuntime(args))
+    return await runtime.start(session_id)
+
+
+async def wait_for_runtime(runtime_task, session_id):
+    """The loaded runtime, or None if its dependencies are missing."""
+    try:
+        runtime = await runtime_task
+    except ImportError as e:
+        print(f"Error importing dependencies: {e}")
+        return None
+    if runtime.resumed:
+        print(f"💾 Resuming saved session '{session_id}'.")
+    return runtime
+
+
+async def main(args):
     print("\n" + "="*50)
     print("🌍 WELCOME TO THE AI TRIP PLANNER 🌍")
     print("="*50)
     print("I can help you plan trips (Work, Study, or Travel).")
     print("Tell me your destination, budget, and purpose.")
     print("Type 'quit', 'exit', or 'bye' to end the session.")
+    print(f"Orchestration mode: {args.mode}")
     print("-" * 50 + "\n")
 
-    # Initialize Session and Runner
-    session_service = InMemorySessionService()
-    runner = Runner(
-        agent=trip_coordinator,
-        session_service=session_service,
-        app_name="trip_planner_cli"
-    )
-    
+    if args.record:
+        from recording import isolate_caches
+        # Cache hits make no model calls, so they could not be replayed.
+        print(f"📼 Recording this session to {args.record} (starting from empty caches)")
+        isolate_caches()
+    if args.replay:
+        from recording import isolate_replay
+        print(f"▶️ Replaying {args.replay} (no API calls)")
+        isolate_replay()
+
     # Session ID for context
-    session_id = "user_session_1"
+    session_id = args.session
+    transcript = TranscriptWriter(session_id)
     
     print(f"Transcript will be saved to transcript_{session_id}.md\n")
 
+    # The agent graph loads and the shared model connection opens while the user is typing
+    runtime_task = asyncio.create_task(load_runtime(args, session_id))
+    runtime = None
+    replay_inputs = None
+    if args.replay:
+        # Nothing to overlap with: the inputs come from the log
+        runtime = await wait_for_runtime(runtime_task, session_id)
+        if runtime is None:
+            return
+        from recording import recorded_user_messages
+        replay_inputs = recorded_user_messages(args.replay)
+
     while True:
         try:
-            # Display prompt and wait for input
-            user_input = input("👤 You: ").strip()
-        except (EOFError, KeyboardInterrupt):
-            # Handle Ctrl+D or Ctrl+C gracefully
+            if replay_inputs is not None:
+                if not replay_inputs:
+                    print(f"\n▶️ Replay finished: {runtime.replay.stats()}\n")
+                    break
+                user_input = replay_inputs.pop(0)
+                print(f"👤 You: {user_input}")
+            else:
+                # Display prompt and wait for input (in a thread so loading can proceed)
+                user_input = (await read_input("👤 You: ")).strip()
+        except EOFError:
+            # Ctrl+D ends the session. Ctrl+C cancels main() and is handled
+            # around asyncio.run below.
             print("\nGoodbye!")
             break
 
@@ -158,35 +466,63 @@ async def main():
             print("\nSafe travels! Goodbye.\n")
             break
 
+        if runtime is None:
+            runtime = await wait_for_runtime(runtime_task, session_id)
+            if runtime is None:
+                break
+        runner, tracer, replay = runtime.runner, runtime.tracer, runtime.replay
+
         print("\nThinking... (I'm consulting my specialist agents)\n")
 
         # Run the agent with the user input
         try:
-            # Use run_debug as run() seems to have signature issues in this version
-            try:
-                response = await runner.run_debug(user_input, session_id=session_id)
-            except TypeError:
-                # Fallback if run_debug doesn't accept session_id
-                response = await runner.run_debug(user_input)
-                
-            agent_text = await print_agent_response(response)
+            from budget import plan_budget
+            from link_check import link_checker, verification_enabled
+            from plan_table import PLAN_TABLE_HEADING
+
+            if args.stream:
+                # Transcript is written incrementally while streaming
+                turn = run_streaming_turn(runner, user_input, session_id, transcript)
+            else:
+                turn = run_plain_turn(runner, user_input, session_id, transcript)
+            with plan_budget() as budget:
+                agent_text = await run_with_deadline(turn)
+            print(f"💰 Usage: {budget.summary()}\n")
+
+            if tracer:
+                print_profile(tracer, session_id)
+
+            if agent_text and verification_enabled() and not replay:
+                _, dead = await link_checker.verify_text(agent_text)
+                if dead:
+                    print(f"⚠️ {len(dead)} link(s) in this answer look broken:")
+                    for url in dead:
+                        print(f"   - {url}")
             
-            # Save to transcript
-            if agent_text:
-                save_transcript(user_input, agent_text, session_id)
-                
-                # Check for table and offer to save
-                if "|" in agent_text and "---" in agent_text:
+            if agent_text and PLAN_TABLE_HEADING in agent_text:
+                # The table was rendered from structured rows; save those directly
+                rows = await current_plan_rows(runner, session_id)
+                if rows and not replay:
                     print("\nStructured plan detected.")
-                    save_opt = input("   Save plan table to file? (y/n): ").strip().lower()
+                    save_opt = (await read_input("   Save plan table to file? (y/n): ")).strip().lower()
                     if save_opt == 'y':
-                        save_plan_table(agent_text, session_id)
+                        save_plan_table(rows, session_id)
                 
         except Exception as e:
             print(f"\nAn error occurred during processing: {e}\n")
 
+    transcript.close()
+    if runtime is None and runtime_task.done() and not runtime_task.cancelled() and not runtime_task.exception():
+        runtime = runtime_task.result()
+    # Quitting before the runtime has loaded does not wait for it
+    runtime_task.cancel()
+    if runtime:
+        await runtime.close()
+
 if __name__ == "__main__":
+    # Research while the user answers a question (speculation.py); set it to 0 to turn this off.
+    os.environ.setdefault("TRIP_PLANNER_SPECULATE", "1")
     try:
-        asyncio.run(main())
+        asyncio.run(main(parse_args()))
     except KeyboardInterrupt:
         print("\n\n👋 Goodbye!")
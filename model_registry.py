@@ -0,0 +1,110 @@
+import os
+
+# ==========================================
+# SHARED MODEL REGISTRY
+# ==========================================
+# Every agent used to build its own Gemini instance, and with it its own
+# HTTP client and connection pool. The registry hands out one Gemini per
+# model name instead. Gemini keeps one genai client per event loop, so all
+# agents share a single pooled connection in whichever loop is running, and
+# a new loop (e.g. a new test) gets a fresh client without reloading any
+# agent module. Every call made through these models is scheduled by the
+# process-wide rate limiter.
+#
+# google.genai and the Gemini class are imported when the first model is
+# built, not when this module is imported (see agent_registry.py).
+
+DEFAULT_MODEL = "gemini-2.5-flash-lite"
+
+# Published quota per model and API tier: (requests/min, tokens/min).
+RATE_LIMITS = {
+    "gemini-2.5-flash-lite": {
+        "free": (15, 250_000),
+        "tier1": (4_000, 4_000_000),
+        "tier2": (10_000, 10_000_000),
+    },
+}
+# Tier of the configured API key (free, tier1 or tier2).
+API_TIER = os.environ.get("TRIP_PLANNER_API_TIER", "free")
+
+_models = {}
+_api_key_configured = False
+
+
+def configure_api_key():
+    """Loads the Google API key from api/api.py once per process."""
+    global _api_key_configured
+    if _api_key_configured:
+        return
+    _api_key_configured = True
+    try:
+        from api.api import API_Key
+        os.environ["GOOGLE_API_KEY"] = API_Key
+        print("Google API Key set successfully.")
+    except ImportError:
+        if os.environ.get("GOOGLE_API_KEY"):
+            return
+        print("API Key not found in api.api")
+
+
+def rate_limits(model_name=DEFAULT_MODEL, tier=None):
+    """(requests/min, tokens/min) of `model_name` on the API tier; free-tier
+    limits of the default model when either is unknown."""
+    tiers = RATE_LIMITS.get(model_name, RATE_LIMITS[DEFAULT_MODEL])
+    return tiers.get(tier or API_TIER, tiers["free"])
+
+
+def retry_config():
+    """Retry config for transient server errors only.
+
+    429s are not retried by the HTTP client: the shared rate limiter backs
+    off and shrinks concurrency instead (see rate_limiter.py).
+    """
+    from google.genai import types
+    return types.HttpRetryOptions(
+        attempts=3,
+        exp_base=2,
+        initial_delay=1,
+        http_status_codes=[500, 503, 504],
+    )
+
+
+def get_model(model_name=DEFAULT_MODEL):
+    """Returns the shared Gemini instance for `model_name`."""
+    if model_name not in _models:
+        from rate_limiter import RateLimitedGemini
+        configure_api_key()
+        _models[model_name] = RateLimitedGemini(
+            model=model_name,
+            retry_options=retry_config()
+        )
+    return _models[model_name]
+
+
+def register_model(model, model_name=DEFAULT_MODEL):
+    """Replaces the shared model for `model_name` (e.g. with a local stand-in).
+
+    Only agents built after this call pick up the replacement (see
+    agent_registry.reset_agents).
+    """
+    _models[model_name] = model
+    return model
+
+
+async def warm_up(model_name=DEFAULT_MODEL):
+    """Opens the shared client's connection in the running event loop.
+
+    Fetching the model's metadata is a cheap request that pays for DNS, TCP
+    and TLS setup before the user's first real turn. Returns True when the
+    connection was established.
+    """
+    from google.adk.models.google_llm import Gemini
+    model = get_model(model_name)
+    if not isinstance(model, Gemini):
+        return True
+    try:
+        await model.api_client.aio.models.get(model=model.model)
+    except Exception as e:
+        print(f"Warning: model warm-up failed: {e}")
+        return False
+    return True
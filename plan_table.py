@@ -0,0 +1,146 @@
+import csv
+import json
+
+from google.adk.tools import ToolContext
+from google.genai import types
+from pydantic import BaseModel, Field
+
+from findings import FINDINGS_SOURCES_KEY
+from link_check import link_checker, verification_enabled
+
+# ==========================================
+# MASTER PLAN TABLE
+# ==========================================
+# The compiler used to spend a large share of its output writing the Markdown
+# table, which main.py then scraped back out of the text. It now hands the
+# rows over as structured data through `record_plan_rows`, citing sources by
+# their number in the findings. Python resolves the links, renders the table
+# and appends it to the report, and the same rows are saved as JSON or CSV.
+
+PLAN_ROWS_STATE_KEY = "plan_rows"
+# Invocation that recorded the rows, so a later turn that only asks a
+# clarifying question does not append the previous plan again.
+PLAN_ROWS_TURN_KEY = "plan_rows_invocation"
+
+PLAN_CATEGORIES = ["Visa", "Flights", "Accommodation", "Top Attractions", "Packing Essentials", "Budget Est."]
+
+COLUMNS = ["Category", "Recommendation/Action", "Details", "Link/Source"]
+
+PLAN_TABLE_HEADING = "## MASTER PLAN TABLE"
+
+
+class PlanRow(BaseModel):
+    category: str
+    recommendation: str
+    details: str = ""
+    source: str = Field(default="", description="Source number from the findings (e.g. 3), or a URL.")
+
+
+def resolve_source(source, sources):
+    """Turns a source number (or a URL) into a (title, url) pair."""
+    source = str(source or "").strip().strip("[]")
+    if source.isdigit() and 0 < int(source) <= len(sources):
+        link = sources[int(source) - 1]
+        return link.get("title") or "Source", link["url"]
+    if source.startswith(("http://", "https://")):
+        return "Source", source
+    return "", ""
+
+
+def resolve_rows(rows, sources):
+    resolved = []
+    for row in rows:
+        row = row if isinstance(row, PlanRow) else PlanRow.model_validate(row)
+        title, url = resolve_source(row.source, sources)
+        resolved.append({
+            "category": row.category,
+            "recommendation": row.recommendation,
+            "details": row.details,
+            "link_title": title,
+            "url": url,
+        })
+    return resolved
+
+
+def _cell(text):
+    return str(text).replace("|", "\\|").replace("\n", " ").strip()
+
+
+def render_table(rows):
+    """Markdown table for resolved plan rows."""
+    lines = ["| " + " | ".join(COLUMNS) + " |", "|" + "---|" * len(COLUMNS)]
+    for row in rows:
+        link = f"[{_cell(row['link_title'])}]({row['url']})" if row["url"] else "-"
+        lines.append(
+            f"| {_cell(row['category'])} | {_cell(row['recommendation'])} | {_cell(row['details'])} | {link} |"
+        )
+    return "\n".join(lines)
+
+
+def write_json(rows, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"rows": rows}, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def write_csv(rows, path):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS + ["Link Title"])
+        for row in rows:
+            writer.writerow([row["category"], row["recommendation"], row["details"], row["url"], row["link_title"]])
+    return path
+
+
+def _wrote_report_text(tool_context):
+    """True if the agent already wrote its narrative in the response that is
+    calling this tool (i.e. since its last tool result)."""
+    for event in reversed(tool_context.session.events):
+        if event.invocation_id != tool_context.invocation_id or event.author != tool_context.agent_name:
+            continue
+        parts = event.content.parts if event.content and event.content.parts else []
+        if any(part.function_response for part in parts):
+            return False
+        if any(part.text and part.text.strip() and not part.thought for part in parts):
+            return True
+    return False
+
+
+async def record_plan_rows(rows: list[PlanRow], tool_context: ToolContext) -> dict:
+    """Records the rows of the MASTER PLAN TABLE. The table is rendered from
+    these rows and appended to your report automatically.
+
+    Args:
+        rows: One row per category (Visa, Flights, Accommodation, Top
+            Attractions, Packing Essentials, Budget Est.). `source` is the
+            number of the supporting source in the research findings.
+
+    Returns:
+        How many rows were recorded.
+    """
+    resolved = resolve_rows(rows, tool_context.state.get(FINDINGS_SOURCES_KEY) or [])
+    if verification_enabled():
+        # Numbered sources were checked with the findings; this catches URLs
+        # written into a row directly.
+        dead = await link_checker.dead_links([row["url"] for row in resolved if row["url"]])
+        for row in resolved:
+            if row["url"] in dead:
+                row["url"], row["link_title"] = "", ""
+    tool_context.state[PLAN_ROWS_STATE_KEY] = resolved
+    tool_context.state[PLAN_ROWS_TURN_KEY] = tool_context.invocation_id
+    if _wrote_report_text(tool_context):
+        # The narrative is already written; no need for another model call.
+        tool_context.actions.skip_summarization = True
+    return {"recorded_rows": len(resolved), "note": "The table is appended automatically; do not write it."}
+
+
+def append_plan_table(callback_context):
+    """after_agent_callback: appends the rendered table for rows recorded in this turn."""
+    state = callback_context.state
+    if state.get(PLAN_ROWS_TURN_KEY) != callback_context.invocation_id:
+        return None
+    rows = state.get(PLAN_ROWS_STATE_KEY) or []
+    if not rows:
+        return None
+    text = f"{PLAN_TABLE_HEADING}\n\n{render_table(rows)}\n"
+    return types.Content(role="model", parts=[types.Part(text=text)])
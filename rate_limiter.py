@@ -0,0 +1,249 @@
+import asyncio
+import os
+import random
+import time
+
+from google.adk.models.google_llm import Gemini
+from google.genai.errors import ClientError
+
+from deadline import current_deadline
+from model_registry import rate_limits
+from tracing import annotate_current_span
+
+# ==========================================
+# GLOBAL ADAPTIVE RATE LIMITER
+# ==========================================
+# All agents share one model quota. Instead of every call retrying on its own
+# (which, with exp_base=7, can sleep for minutes while the other agents keep
+# hitting the same limit) every model call in the process is scheduled here:
+#   - token buckets keep us under the requests/min and tokens/min quota,
+#   - the number of calls in flight adapts AIMD-style: +1 after a window of
+#     successes, halved on every 429,
+#   - a 429 is retried after a short jittered backoff, not minutes, and not
+#     at all when the backoff would outlast the turn's deadline.
+
+# Defaults are the default model's quota on TRIP_PLANNER_API_TIER (see
+# model_registry.RATE_LIMITS); TRIP_PLANNER_RPM / _TPM override them.
+_TIER_RPM, _TIER_TPM = rate_limits()
+REQUESTS_PER_MINUTE = int(os.environ.get("TRIP_PLANNER_RPM", _TIER_RPM))
+TOKENS_PER_MINUTE = int(os.environ.get("TRIP_PLANNER_TPM", _TIER_TPM))
+MAX_CONCURRENCY = int(os.environ.get("TRIP_PLANNER_MAX_CONCURRENCY", "8"))
+
+# Retries of a throttled (429) call before the error reaches the agent.
+MAX_THROTTLE_RETRIES = 4
+
+# Rough size of a model answer, used until the real usage is known.
+ESTIMATED_OUTPUT_TOKENS = 1000
+
+
+class TokenBucket:
+    """Refills continuously at `per_minute` units per minute up to `per_minute`."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` units are available (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self._refill()
+        self.level -= amount
+
+    def adjust(self, amount):
+        """Credits (positive) or debits (negative) units after the fact."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class AdaptiveRateLimiter:
+    """Process-wide scheduler for model calls.
+
+    Use `async with limiter.slot(estimated_tokens) as ticket:` around a call,
+    report the real token usage with `ticket.record_usage(tokens)` and set
+    `ticket.throttled = True` when the call came back with a 429.
+    """
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE,
+                 tokens_per_minute=TOKENS_PER_MINUTE, max_concurrency=MAX_CONCURRENCY,
+                 min_concurrency=1):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency_limit = float(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.successes_since_change = 0
+        self.total_calls = 0
+        self.throttled_calls = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._condition = None
+        self._loop = None
+
+    def _get_condition(self):
+        # asyncio primitives belong to one event loop; rebind when it changes.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._condition = asyncio.Condition()
+            self.in_flight = 0
+            self.waiting = 0
+        return self._condition
+
+    async def acquire(self, estimated_tokens):
+        condition = self._get_condition()
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            async with condition:
+                while True:
+                    if self.in_flight < int(self.concurrency_limit):
+                        delay = max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+                        if delay == 0:
+                            break
+                    else:
+                        delay = None
+                    try:
+                        await asyncio.wait_for(condition.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                self.requests.take(1)
+                self.tokens.take(estimated_tokens)
+                self.in_flight += 1
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - started
+        self.total_calls += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    async def release(self, throttled=False, failed=False):
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            if throttled:
+                self._decrease()
+            elif not failed:
+                self._increase()
+            condition.notify_all()
+
+    def _increase(self):
+        # Additive increase: one more slot after a full window of successes.
+        self.successes_since_change += 1
+        if self.successes_since_change >= int(self.concurrency_limit):
+            self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1)
+            self.successes_since_change = 0
+
+    def _decrease(self):
+        # Multiplicative decrease on a 429.
+        self.throttled_calls += 1
+        self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+        self.successes_since_change = 0
+
+    def slot(self, estimated_tokens):
+        return _Slot(self, estimated_tokens)
+
+    def stats(self):
+        return {
+            "queue_depth": self.waiting,
+            "in_flight": self.in_flight,
+            "concurrency_limit": int(self.concurrency_limit),
+            "calls": self.total_calls,
+            "throttled_calls": self.throttled_calls,
+            "total_wait_seconds": round(self.total_wait, 3),
+            "avg_wait_seconds": round(self.total_wait / self.total_calls, 3) if self.total_calls else 0.0,
+            "max_wait_seconds": round(self.max_wait, 3),
+        }
+
+
+class _Slot:
+    """One scheduled call; releases its concurrency slot on exit."""
+
+    def __init__(self, limiter, estimated_tokens):
+        self.limiter = limiter
+        self.estimated_tokens = estimated_tokens
+        self.throttled = False
+        self.waited = 0.0
+
+    async def __aenter__(self):
+        self.waited = await self.limiter.acquire(self.estimated_tokens)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.limiter.release(throttled=self.throttled, failed=exc_type is not None)
+        return False
+
+    def record_usage(self, tokens):
+        self.limiter.tokens.adjust(self.estimated_tokens - tokens)
+        self.estimated_tokens = tokens
+
+
+def backoff_delay(attempt, base=1.0, cap=20.0):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def is_throttled(error):
+    return isinstance(error, ClientError) and getattr(error, "code", None) == 429
+
+
+def estimate_tokens(llm_request):
+    """Cheap token estimate (~4 characters per token) for a request."""
+    chars = len(str(llm_request.config.system_instruction or ""))
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            if part.text:
+                chars += len(part.text)
+            elif part.function_response:
+                chars += len(str(part.function_response.response))
+    return chars // 4 + ESTIMATED_OUTPUT_TOKENS
+
+
+rate_limiter = AdaptiveRateLimiter()
+
+
+class RateLimitedGemini(Gemini):
+    """Gemini whose calls are scheduled by the process-wide rate limiter."""
+
+    async def generate_content_async(self, llm_request, stream=False):
+        attempt = 0
+        while True:
+            yielded = False
+            async with rate_limiter.slot(estimate_tokens(llm_request)) as ticket:
+                annotate_current_span("queue_wait_seconds", round(ticket.waited, 4))
+                try:
+                    async for response in super().generate_content_async(llm_request, stream=stream):
+                        if response.usage_metadata and response.usage_metadata.total_token_count:
+                            ticket.record_usage(response.usage_metadata.total_token_count)
+                        yielded = True
+                        yield response
+                    return
+                except ClientError as e:
+                    if not is_throttled(e) or yielded:
+                        raise
+                    # Every 429 shrinks concurrency, the one that ends the retries too.
+                    ticket.throttled = True
+                    if attempt >= MAX_THROTTLE_RETRIES:
+                        raise
+                    delay = backoff_delay(attempt)
+                    deadline = current_deadline()
+                    if deadline is not None and delay >= deadline.remaining():
+                        raise
+            annotate_current_span("retry_count")
+            await asyncio.sleep(delay)
+            attempt += 1
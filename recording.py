@@ -0,0 +1,306 @@
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict, deque
+
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+
+# ==========================================
+# RECORD / REPLAY
+# ==========================================
+# RecorderPlugin appends everything a run does to a JSONL log: the user's
+# messages, every runner event, and every model response and search result
+# with its timing. The log is written by one background task in batches,
+# so agents never wait on disk. ReplayPlugin reads such a log and answers
+# model calls and searches from it, without calling the model or the search
+# tool. A slow or bad run can then be re-run, debugged or re-rendered in
+# milliseconds and without using quota.
+#
+# Record types (one JSON object per line, all with "type" and "t" seconds
+# since the recording started):
+#   user   {session_id, text}
+#   event  {session_id, invocation_id, author, partial, event}
+#   model  {agent, key, seconds, response}
+#   tool   {agent, tool, key, seconds, result}
+
+# A cache hit makes no model call, so it would leave nothing to replay, and
+# a replay must not depend on what earlier runs left on this machine or on
+# the network. Recording therefore starts from empty caches
+# (isolate_caches()), and a replay also turns link checks off
+# (isolate_replay()).
+#
+# Tools whose results are recorded and served back on replay. Other tools
+# (dispatch_specialists, record_plan_rows, ...) only move data around and
+# are run again for real.
+REPLAYED_TOOLS = ("web_search",)
+
+
+class ReplayMissError(LookupError):
+    """A replayed run asked for something the log does not contain."""
+
+
+class JsonlWriter:
+    """Append-only JSONL file fed through a queue.
+
+    `write` never blocks; one background task writes queued records in
+    batches off the event loop. `flush` waits until everything queued so far
+    is on disk.
+    """
+
+    def __init__(self, path, batch_size=64):
+        self.path = path
+        self.batch_size = batch_size
+        self.records_written = 0
+        self._file = None
+        self._queue = None
+        self._task = None
+
+    def write(self, record):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._drain())
+        self._queue.put_nowait(record)
+
+    async def _drain(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            lines = "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in batch)
+            try:
+                await asyncio.to_thread(self._write_lines, lines)
+                self.records_written += len(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_lines(self, lines):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(lines)
+        self._file.flush()
+
+    async def flush(self):
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _dump(model):
+    return model.model_dump(mode="json", exclude_none=True)
+
+
+def request_key(agent_name, llm_request):
+    """Fingerprint of a model call: the agent and its conversation (texts,
+    function calls and results), ignoring the random function call ids."""
+    items = []
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            if part.text:
+                items.append([content.role, part.text])
+            elif part.function_call:
+                items.append(["call", part.function_call.name, part.function_call.args])
+            elif part.function_response:
+                items.append(["result", part.function_response.name, part.function_response.response])
+    payload = json.dumps([agent_name, items], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+def tool_key(tool_name, tool_args):
+    return f"{tool_name}:{json.dumps(tool_args, sort_keys=True, default=str)}"
+
+
+def read_log(path):
+    """All records of a log, skipping a last line cut short by a crash."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def recorded_user_messages(path):
+    """The user's messages in a log, in the order they were sent."""
+    return [record["text"] for record in read_log(path) if record["type"] == "user"]
+
+
+class RecorderPlugin(BasePlugin):
+    """Writes every user message, runner event, model response and search
+    result of a run to a JSONL log."""
+
+    def __init__(self, path, tools=REPLAYED_TOOLS):
+        super().__init__(name="recorder")
+        self.writer = JsonlWriter(path)
+        self.tools = set(tools)
+        self._started = time.perf_counter()
+        self._pending = {}
+
+    def _write(self, record_type, **fields):
+        self.writer.write({"type": record_type, "t": round(time.perf_counter() - self._started, 4), **fields})
+
+    async def on_user_message_callback(self, *, invocation_context, user_message):
+        text = "\n".join(part.text for part in user_message.parts or [] if part.text)
+        self._write("user", session_id=invocation_context.session.id, text=text)
+        return None
+
+    async def on_event_callback(self, *, invocation_context, event):
+        self._write(
+            "event",
+            session_id=invocation_context.session.id,
+            invocation_id=event.invocation_id,
+            author=event.author,
+            partial=bool(event.partial),
+            event=_dump(event),
+        )
+        return None
+
+    async def after_run_callback(self, *, invocation_context):
+        # Every turn is on disk once it has finished.
+        await self.writer.flush()
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        key = (callback_context.invocation_id, callback_context.agent_name)
+        self._pending[key] = (request_key(callback_context.agent_name, llm_request), time.perf_counter())
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        if llm_response.partial:
+            return None
+        pending = self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        if pending is None:
+            return None
+        key, started = pending
+        self._write(
+            "model",
+            agent=callback_context.agent_name,
+            key=key,
+            seconds=round(time.perf_counter() - started, 4),
+            response=_dump(llm_response),
+        )
+        return None
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        if tool.name in self.tools:
+            self._pending[tool_context.function_call_id] = time.perf_counter()
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        started = self._pending.pop(tool_context.function_call_id, None)
+        if started is not None:
+            self._write(
+                "tool",
+                agent=tool_context.agent_name,
+                tool=tool.name,
+                key=tool_key(tool.name, tool_args),
+                seconds=round(time.perf_counter() - started, 4),
+                result=result,
+            )
+        return None
+
+    async def close(self):
+        await self.writer.close()
+
+
+def isolate_caches(prefix="trip_cache_"):
+    """Points the caches at a fresh temporary directory. Returns the directory.
+
+    Call it before the agent graph is loaded; caches this process has
+    already opened are reopened in the new directory.
+    """
+    import cache_store
+
+    cache_dir = tempfile.mkdtemp(prefix=prefix)
+    os.environ["TRIP_PLANNER_CACHE_DIR"] = cache_dir
+    cache_store.CACHE_DIR = cache_dir
+
+    def reopen(cache, filename):
+        return cache_store.SqliteCache(cache_store.cache_path(filename), max_entries=cache.max_entries)
+
+    if "specialist_cache" in sys.modules:
+        module = sys.modules["specialist_cache"]
+        module.specialist_cache = reopen(module.specialist_cache, "specialist_cache.sqlite")
+    if "trip_agents" in sys.modules and sys.modules["trip_agents"]._web_search is not None:
+        search = sys.modules["trip_agents"]._web_search
+        search.cache = reopen(search.cache, "search_cache.sqlite")
+    if "link_check" in sys.modules:
+        checker = sys.modules["link_check"].link_checker
+        checker.cache = reopen(checker.cache, "link_cache.sqlite")
+    return cache_dir
+
+
+def isolate_replay():
+    """isolate_caches() for a replay, with link checks turned off."""
+    os.environ["TRIP_PLANNER_VERIFY_LINKS"] = "0"
+    return isolate_caches(prefix="trip_replay_")
+
+
+class ReplayPlugin(BasePlugin):
+    """Serves model responses and search results from a recorded log.
+
+    Model calls are matched on request_key(). When the conversation differs
+    slightly (e.g. timings inside a tool result), the agent's next unused
+    recording is served in order. A call with nothing left to serve raises
+    ReplayMissError rather than reaching the real model.
+    """
+
+    def __init__(self, path, tools=REPLAYED_TOOLS):
+        super().__init__(name="replay")
+        self.tools = set(tools)
+        self._models = defaultdict(deque)
+        self._by_agent = defaultdict(deque)
+        self._tools = defaultdict(deque)
+        for record in read_log(path):
+            if record["type"] == "model":
+                self._models[record["key"]].append(record)
+                self._by_agent[record["agent"]].append(record)
+            elif record["type"] == "tool":
+                self._tools[record["key"]].append(record)
+        self.served = {"exact": 0, "in_order": 0, "tools": 0}
+
+    def _take_model(self, agent_name, key):
+        exact = self._models.get(key)
+        if exact:
+            record = exact.popleft()
+            self._by_agent[agent_name].remove(record)
+            self.served["exact"] += 1
+            return record
+        queue = self._by_agent.get(agent_name)
+        if queue:
+            record = queue.popleft()
+            self._models[record["key"]].remove(record)
+            self.served["in_order"] += 1
+            return record
+        raise ReplayMissError(f"No recorded model response left for {agent_name}")
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        record = self._take_model(callback_context.agent_name, request_key(callback_context.agent_name, llm_request))
+        return LlmResponse.model_validate(record["response"])
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        if tool.name not in self.tools:
+            return None
+        recorded = self._tools.get(tool_key(tool.name, tool_args))
+        if not recorded:
+            raise ReplayMissError(f"No recorded result for {tool.name}({tool_args})")
+        self.served["tools"] += 1
+        return recorded.popleft()["result"]
+
+    def stats(self):
+        left = sum(len(queue) for queue in self._by_agent.values())
+        return {**self.served, "unused_model_responses": left}
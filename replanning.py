@@ -0,0 +1,88 @@
+from google.adk.tools import ToolContext
+
+from findings import FINDINGS_BRIEF_KEY, FINDINGS_RESULTS_KEY
+import research_stage
+from specialist_cache import REFRESH_STATE_KEY, SPECIALIST_SLOTS
+from trip_brief import BRIEF_STATE_KEY, SLOT_FIELDS, TripBrief, parse_brief
+
+# ==========================================
+# INCREMENTAL RE-PLANNING
+# ==========================================
+# A follow-up like "actually make the budget $2000" used to send the whole
+# chain and all five specialists round again. The last research stage's
+# per-specialist results and brief slots are kept in session state. A
+# follow-up re-runs only the specialists that depend on a slot that changed
+# (SPECIALIST_SLOTS), reuses the rest, and the compiler recompiles from the
+# merged findings. The re-run specialists bypass the specialist cache, whose
+# buckets may not tell the old and new value apart.
+
+
+def affected_specialists(changed, agents, previous_results):
+    """Specialists that depend on a changed slot or have no earlier result."""
+    return [
+        agent for agent in agents
+        if agent.name not in previous_results
+        or changed & set(SPECIALIST_SLOTS.get(agent.name, SLOT_FIELDS))
+    ]
+
+
+async def replan(brief_text, trip_brief, tool_context, agents=None, **kwargs):
+    """Researches `trip_brief`, re-running only the specialists affected by
+    what changed since the last research stage in this session. The first
+    time (or after a failed stage) every specialist runs."""
+    agents = research_stage.specialist_agents() if agents is None else agents
+    previous_results = tool_context.state.get(FINDINGS_RESULTS_KEY) or {}
+    previous_slots = tool_context.state.get(BRIEF_STATE_KEY)
+    if not previous_results or not previous_slots:
+        return await research_stage.run_specialists(brief_text, tool_context, agents=agents, trip_brief=trip_brief, **kwargs)
+
+    changed = TripBrief.from_dict(previous_slots).changed_slots(trip_brief)
+    rerun = affected_specialists(changed, agents, previous_results)
+    # The cache buckets budgets and durations, so it may still hold the answer
+    # for the old value; the specialists re-run because of a change skip it.
+    tool_context.state[REFRESH_STATE_KEY] = [agent.name for agent in rerun if agent.name in previous_results]
+    try:
+        findings = await research_stage.run_specialists(
+            brief_text, tool_context, agents=rerun, trip_brief=trip_brief, **kwargs
+        )
+    finally:
+        tool_context.state[REFRESH_STATE_KEY] = []
+
+    fresh = findings.results
+    findings.results = {}
+    for agent in agents:
+        if agent.name in fresh:
+            findings.results[agent.name] = fresh[agent.name]
+        elif agent not in rerun:
+            findings.results[agent.name] = previous_results[agent.name]
+            findings.reused.append(agent.name)
+    # Covers the reused results too (their URLs come from the cache).
+    await findings.verify_links()
+    return findings
+
+
+def _user_text(tool_context):
+    content = tool_context.user_content
+    if not content or not content.parts:
+        return ""
+    return " ".join(part.text for part in content.parts if part.text).strip()
+
+
+async def update_research(tool_context: ToolContext) -> dict:
+    """Refreshes the research findings after the user changes a plan that was
+    already researched (budget, dates, duration, purpose or destination).
+    Only the specialists affected by the change are run again.
+
+    Returns:
+        A digest of the refreshed findings, including which specialists'
+        earlier results were reused.
+    """
+    previous_brief = tool_context.state.get(FINDINGS_BRIEF_KEY)
+    if not previous_brief:
+        return {"error": "Nothing has been researched yet; delegate to the PlannerAgent instead."}
+    message = _user_text(tool_context)
+    trip_brief = TripBrief.from_dict(tool_context.state.get(BRIEF_STATE_KEY)).merged(parse_brief(message, follow_up=True))
+    brief_text = f"{previous_brief}\nChange requested by the user: {message}"
+    findings = await replan(brief_text, trip_brief, tool_context)
+    tool_context.state.update(findings.state_delta())
+    return findings.digest()
@@ -0,0 +1,239 @@
+import asyncio
+import time
+
+from google.adk.tools import AgentTool, ToolContext
+
+from brief_precheck import CONVERSATION_BRIEF_KEY
+from budget import SOFT_SKIPPED_SPECIALISTS, current_budget
+from deadline import DeadlineExceeded, current_deadline
+from findings import (
+    FINDINGS_BRIEF_KEY,
+    FINDINGS_RESULTS_KEY,
+    FINDINGS_SOURCES_KEY,
+    FINDINGS_STATE_KEY,
+    LinkTable,
+    render_findings,
+    summarize_result,
+)
+from link_check import link_checker, verification_enabled
+from single_flight import SingleFlight
+from specialist_cache import specialist_cache_key
+from speculation import SPECULATION_WAIT, speculator
+from trip_brief import BRIEF_STATE_KEY, TripBrief, parse_brief
+import trip_agents
+
+# ==========================================
+# CONCURRENT RESEARCH STAGE
+# ==========================================
+# The specialists are independent of each other, so instead of letting the
+# ResearchInstructionAgent call them one tool call at a time we send the same
+# trip brief to all of them at once. Latency becomes the slowest specialist
+# rather than the sum of all five.
+#
+# Identical specialist runs from concurrent sessions (same agent, same brief
+# slots) share one run (single_flight.py).
+#
+# Under a turn deadline (deadline.py) the specialists still running at the
+# research cutoff are cancelled and recorded as missing, so the compiler
+# writes its report from the ones that finished. Past the plan's soft
+# budget (budget.py) some specialists are skipped; past the hard one none
+# are started.
+
+# Specialists to dispatch. None means the five from trip_agents, built on
+# first use; tests replace this with their own agents.
+SPECIALISTS = None
+
+# At most this many specialists talk to the model at the same time.
+MAX_CONCURRENCY = 5
+
+# Seconds a single specialist may take before its findings are dropped.
+SPECIALIST_TIMEOUT = 180
+
+specialist_flights = SingleFlight("specialists")
+
+
+def specialist_agents():
+    return trip_agents.specialists() if SPECIALISTS is None else SPECIALISTS
+
+
+class ResearchFindings:
+    """Aggregated output of one research stage run.
+
+    Specialists that finished are in `results` (a SpecialistFindings dict, or
+    text for specialists without the schema); the ones that timed out or
+    raised are recorded in `errors` so the report can say what is missing.
+    """
+
+    def __init__(self, brief, trip_brief=None):
+        self.brief = brief
+        self.trip_brief = trip_brief or parse_brief(brief)
+        self.results = {}
+        self.errors = {}
+        self.timings = {}
+        # Specialists whose results were carried over from an earlier turn.
+        self.reused = []
+        # Cited URLs found dead; they are left out of the rendered findings.
+        self.dead_links = set()
+        # True when the turn deadline cut some specialists off.
+        self.time_limit_reached = False
+
+    def add_result(self, agent_name, result, elapsed):
+        self.results[agent_name] = result
+        self.timings[agent_name] = round(elapsed, 2)
+
+    def add_error(self, agent_name, message, elapsed):
+        self.errors[agent_name] = message
+        self.timings[agent_name] = round(elapsed, 2)
+
+    @property
+    def missing(self):
+        return sorted(self.errors)
+
+    def to_dict(self):
+        return {
+            "brief": self.brief,
+            "findings": self.results,
+            "missing": self.errors,
+            "timings_seconds": self.timings,
+        }
+
+    def digest(self):
+        """What the layers between the specialists and the compiler see."""
+        digest = {
+            "brief": self.brief,
+            "sections": {name: summarize_result(result) for name, result in self.results.items()},
+            "missing": self.errors,
+            "reused": self.reused,
+            "dead_links_removed": len(self.dead_links),
+            "timings_seconds": self.timings,
+        }
+        if self.time_limit_reached:
+            digest["time_limit_reached"] = True
+        return digest
+
+    def urls(self):
+        """Every URL the results cite."""
+        links = LinkTable()
+        render_findings(self.results, links=links)
+        return [link["url"] for link in links.links]
+
+    async def verify_links(self, checker=None):
+        """Checks every cited URL; dead ones are dropped when rendering."""
+        if not verification_enabled():
+            return
+        self.dead_links = await (checker or link_checker).dead_links(self.urls())
+
+    def to_markdown(self):
+        return render_findings(self.results, self.errors, LinkTable(skip=self.dead_links))
+
+    def state_delta(self):
+        """Session state that delivers the findings and their numbered sources."""
+        links = LinkTable(skip=self.dead_links)
+        text = render_findings(self.results, self.errors, links)
+        return {
+            FINDINGS_STATE_KEY: text,
+            FINDINGS_SOURCES_KEY: links.links,
+            FINDINGS_RESULTS_KEY: self.results,
+            FINDINGS_BRIEF_KEY: self.brief,
+            BRIEF_STATE_KEY: self.trip_brief.to_dict(),
+        }
+
+
+async def run_specialists(
+    brief,
+    tool_context,
+    agents=None,
+    max_concurrency=MAX_CONCURRENCY,
+    timeout=SPECIALIST_TIMEOUT,
+    trip_brief=None,
+):
+    """Runs every specialist on the same brief concurrently.
+
+    Each specialist goes through its AgentTool so it inherits the caller's
+    plugins, state and run config, exactly as if the LLM had called it.
+    `trip_brief` overrides the slots parsed from `brief`.
+    """
+    agents = specialist_agents() if agents is None else agents
+    findings = ResearchFindings(brief, trip_brief)
+    # The specialist cache keys on these slots (see specialist_cache.py).
+    tool_context.state[BRIEF_STATE_KEY] = findings.trip_brief.to_dict()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    deadline = current_deadline()
+    budget = current_budget()
+    if budget is not None and budget.hard_reached:
+        for agent in agents:
+            findings.add_error(agent.name, "not started: the plan's usage limit was reached", 0.0)
+        return findings
+    if budget is not None and budget.soft_reached:
+        for agent in [agent for agent in agents if agent.name in SOFT_SKIPPED_SPECIALISTS]:
+            findings.add_error(agent.name, "skipped to stay within the plan's budget", 0.0)
+            budget.cut(f"skipped {agent.name}")
+        agents = [agent for agent in agents if agent.name not in SOFT_SKIPPED_SPECIALISTS]
+
+    async def _run_one(agent):
+        # A background run started while the user was answering a question
+        # (speculation.py) leaves its answer in the specialist cache.
+        wait = SPECULATION_WAIT if deadline is None else min(SPECULATION_WAIT, deadline.research_left())
+        await speculator.join(tool_context.user_id, agent.name, findings.trip_brief, timeout=wait)
+        async with semaphore:
+            start = time.perf_counter()
+            run = specialist_flights.do(
+                specialist_cache_key(agent.name, brief, findings.trip_brief),
+                lambda: AgentTool(agent).run_async(args={"request": brief}, tool_context=tool_context),
+            )
+            try:
+                if deadline is None:
+                    result = await asyncio.wait_for(run, timeout)
+                elif deadline.research_left() <= 0:
+                    run.close()
+                    raise DeadlineExceeded("not started: the turn's time limit was reached")
+                else:
+                    result = await deadline.within(run, timeout)
+            except asyncio.TimeoutError:
+                findings.add_error(
+                    agent.name,
+                    f"timed out after {timeout}s",
+                    time.perf_counter() - start,
+                )
+            except DeadlineExceeded as e:
+                findings.time_limit_reached = True
+                findings.add_error(agent.name, str(e), time.perf_counter() - start)
+            except Exception as e:
+                findings.add_error(agent.name, str(e), time.perf_counter() - start)
+            else:
+                findings.add_result(agent.name, result, time.perf_counter() - start)
+
+    await asyncio.gather(*(_run_one(agent) for agent in agents))
+    if deadline is None or deadline.research_left() > 0:
+        await findings.verify_links()
+    return findings
+
+
+async def dispatch_specialists(trip_brief: str, tool_context: ToolContext) -> dict:
+    """Sends a trip brief to all five specialists (Research, Logistics,
+    Finance, Attractions, Packing) at the same time. Their full findings are
+    delivered to the InteractiveAgent directly; this returns a digest.
+
+    Args:
+        trip_brief: Complete description of the trip: destination, dates or
+            month, duration, budget with currency, purpose (Work, Study or
+            Travel) and any special interests or constraints.
+
+    Returns:
+        A dict with what each specialist found (sections and fact counts),
+        any specialists that did not finish, and how long each one took.
+    """
+    # Imported here: replanning builds on this module.
+    from replanning import replan
+    # Specialists unaffected by what changed since the last dispatch in this
+    # session are not run again.
+    # Slots the model's brief leaves out come from the whole conversation
+    # (brief_precheck.py).
+    conversation = TripBrief.from_dict(tool_context.state.get(CONVERSATION_BRIEF_KEY))
+    written = parse_brief(trip_brief, follow_up=conversation.destination is not None)
+    findings = await replan(trip_brief, conversation.merged(written), tool_context)
+    # AgentTool forwards state changes to the calling session, so the compact
+    # findings reach the InteractiveAgent's instruction without being re-sent
+    # through the ResearchInstruction and Planner layers.
+    tool_context.state.update(findings.state_delta())
+    return findings.digest()
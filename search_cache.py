@@ -0,0 +1,106 @@
+from google.adk.agents import LlmAgent
+from google.adk.tools import AgentTool, google_search
+
+from cache_store import SqliteCache, cache_path
+from single_flight import SingleFlight
+
+# ==========================================
+# CACHED WEB SEARCH
+# ==========================================
+# google_search is a grounding tool that runs inside the model call, so there
+# is no client-side search result to cache. Instead the specialists call a
+# small search agent (the same workaround ADK uses to mix google_search with
+# other tools) and its answers are cached on disk, keyed by the normalized
+# query. Identical searches from any agent, session or process reuse the
+# stored answer until its category TTL runs out. Identical searches that
+# miss the cache at the same time share one call (single_flight.py).
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# How long an answer stays fresh, by query category.
+CATEGORY_TTLS = {
+    "exchange_rate": 1 * HOUR,
+    "weather": 6 * HOUR,
+    "prices": 12 * HOUR,
+    "attractions": 7 * DAY,
+    "visa": 30 * DAY,
+    "general": 1 * DAY,
+}
+
+# Checked in order; the first category with a matching keyword wins.
+CATEGORY_KEYWORDS = [
+    ("exchange_rate", ["exchange rate", "exchange rates", "currency", "xe.com", "convert"]),
+    ("weather", ["weather", "forecast", "temperature", "rain", "climate"]),
+    ("prices", ["flight", "flights", "hotel", "hotels", "hostel", "price", "prices", "cost", "fare"]),
+    ("visa", ["visa", "entry requirement", "entry requirements", "passport", "immigration",
+              "embassy", "vaccination", "customs", "etiquette", "plug", "voltage", "emergency"]),
+    ("attractions", ["attraction", "attractions", "museum", "temple", "landmark", "things to do",
+                     "hidden gems", "sightseeing"]),
+]
+
+search_flights = SingleFlight("searches")
+
+search_instruction = """
+You are a web search assistant for a travel planning team.
+
+Answer the given search query directly using your built-in Google Search
+grounding. Be concise and factual. For every fact, include a clickable link to
+the page it came from.
+Format: `[Source Name](URL)`
+"""
+
+
+def normalize_query(query):
+    """Canonical form of a query: lowercase, single spaces, no trailing
+    punctuation. Word order is kept: "London to Tokyo" is not "Tokyo to London"."""
+    return " ".join(query.lower().split()).rstrip("?!.,;: ")
+
+
+def categorize_query(query):
+    """Returns the TTL category for a query."""
+    text = query.lower()
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return category
+    return "general"
+
+
+def create_search_agent(model):
+    """Creates the sub-agent that performs the actual grounded search."""
+    return LlmAgent(
+        name="web_search",
+        model=model,
+        description="Searches the web and returns a concise answer with source links.",
+        instruction=search_instruction,
+        tools=[google_search],
+    )
+
+
+class CachedSearchTool(AgentTool):
+    """AgentTool around the search agent with a persistent TTL/LRU cache."""
+
+    def __init__(self, agent, cache=None):
+        super().__init__(agent=agent)
+        if cache is None:
+            cache = SqliteCache(cache_path("search_cache.sqlite"), max_entries=5000)
+        self.cache = cache
+
+    async def run_async(self, *, args, tool_context):
+        query = args.get("request", "")
+        key = normalize_query(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        return await search_flights.do(key, lambda: self._search(query, key, args, tool_context))
+
+    async def _search(self, query, key, args, tool_context):
+        result = await super().run_async(args=args, tool_context=tool_context)
+        # Failed searches raise and are never stored; skip empty answers too.
+        if result:
+            self.cache.set(key, result, CATEGORY_TTLS[categorize_query(query)])
+        return result
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,265 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+# ==========================================
+# HTTP / SSE SERVICE
+# ==========================================
+# Serves many users from one process:
+#
+#   python server.py --port 8000 --max-plans 8
+#
+#   POST /users/{user_id}/sessions                         -> {"session_id": ...}
+#   POST /users/{user_id}/sessions/{session_id}/messages   {"text": ...} -> SSE
+#   GET  /health
+#
+# All users share one Runner, so the model clients, rate limiter and caches
+# are shared too. At most `max_plans` turns run at once and at most
+# `max_queued` more wait for a slot. Beyond that, a turn is refused with 429
+# and Retry-After rather than queueing without limit. Each answer streams
+# as SSE `text` events followed by one `done` (or `error`) event. The turn
+# only advances as fast as the client reads the stream. On shutdown, new
+# turns get 503 while running ones are given SHUTDOWN_GRACE seconds to
+# finish. Every turn runs under the turn deadline (deadline.py) and a plan
+# budget (budget.py); the done event says whether the deadline was reached
+# and carries the turn's usage.
+#
+# `--offline` serves the stand-in model from fake_llm.py, for load tests
+# (see load_test.py). Agent modules are imported in build_runner for the
+# same reason as in batch.py: the stand-in must be registered first.
+
+SERVER_APP_NAME = "trip_planner_server"
+
+MAX_CONCURRENT_PLANS = int(os.environ.get("TRIP_PLANNER_MAX_PLANS", "8"))
+MAX_QUEUED_PLANS = int(os.environ.get("TRIP_PLANNER_MAX_QUEUED_PLANS", "64"))
+
+# Seconds running turns may take to finish once shutdown starts.
+SHUTDOWN_GRACE = 30
+
+# Seconds a refused client is told to wait before trying again.
+RETRY_AFTER = 5
+
+
+class Message(BaseModel):
+    text: str
+
+
+class ServiceBusy(Exception):
+    """A turn was refused; `status` is the HTTP status to answer with."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class PlanService:
+    """Admits, queues and streams conversation turns for all users."""
+
+    def __init__(self, runner, max_plans=MAX_CONCURRENT_PLANS, max_queued=MAX_QUEUED_PLANS):
+        self.runner = runner
+        self.max_plans = max_plans
+        self.max_queued = max_queued
+        self._slots = asyncio.Semaphore(max_plans)
+        self._busy_sessions = set()
+        self.active = 0
+        self.waiting = 0
+        self.draining = False
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def admit(self, user_id, session_id):
+        """Reserves a place for a turn, or raises ServiceBusy."""
+        if self.draining:
+            raise ServiceBusy(503, "The service is shutting down.")
+        if (user_id, session_id) in self._busy_sessions:
+            raise ServiceBusy(409, "This session is already answering a message.")
+        if self.active + self.waiting >= self.max_plans + self.max_queued:
+            self.rejected += 1
+            raise ServiceBusy(429, "Too many plans in progress; try again shortly.")
+        self._busy_sessions.add((user_id, session_id))
+        self.waiting += 1
+
+    async def stream(self, user_id, session_id, text):
+        """SSE events for one admitted turn."""
+        from budget import plan_budget
+        from deadline import turn_deadline
+        from link_check import extract_links, link_checker, verification_enabled
+        from plan_table import PLAN_ROWS_STATE_KEY, PLAN_ROWS_TURN_KEY
+        from streaming import TurnMetrics, iter_turn
+
+        metrics = TurnMetrics()
+        acquired = False
+        try:
+            await self._slots.acquire()
+            acquired = True
+            self.waiting -= 1
+            self.active += 1
+            yield sse("start", {"queued_seconds": round(metrics.total, 3)})
+            chunks = []
+            with plan_budget() as budget:
+                async with turn_deadline():
+                    async for chunk in iter_turn(self.runner, user_id, session_id, text, metrics):
+                        chunks.append(chunk)
+                        yield sse("text", {"text": chunk})
+            session = await self.runner.session_service.get_session(
+                app_name=self.runner.app_name, user_id=user_id, session_id=session_id
+            )
+            # Only rows recorded in this turn: a clarification does not resend the last plan.
+            rows = None
+            if session and session.state.get(PLAN_ROWS_TURN_KEY) == metrics.invocation_id:
+                rows = session.state.get(PLAN_ROWS_STATE_KEY)
+            # The text is already sent; report any dead links alongside it.
+            dead = (await link_checker.dead_links(extract_links("".join(chunks)))
+                    if verification_enabled() else set())
+            self.completed += 1
+            yield sse("done", {**metrics.to_dict(), "plan_rows": rows or [], "dead_links": sorted(dead),
+                               "usage": budget.report()})
+        except asyncio.CancelledError:
+            # The client went away (or shutdown ran out of time).
+            self.failed += 1
+            raise
+        except Exception as e:
+            self.failed += 1
+            yield sse("error", {"error": f"{type(e).__name__}: {e}"})
+        finally:
+            if acquired:
+                self.active -= 1
+                self._slots.release()
+            else:
+                self.waiting -= 1
+            self._busy_sessions.discard((user_id, session_id))
+
+    async def drain(self, timeout=SHUTDOWN_GRACE):
+        """Refuses new turns and waits for the admitted ones to finish."""
+        self.draining = True
+        deadline = time.monotonic() + timeout
+        while (self.active or self.waiting) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return self.active + self.waiting == 0
+
+    def stats(self):
+        return {
+            "active_plans": self.active,
+            "queued_plans": self.waiting,
+            "max_plans": self.max_plans,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "draining": self.draining,
+        }
+
+
+def build_runner(mode, offline=False, persistent=True):
+    """One Runner for every user of the process."""
+    if offline:
+        import tempfile
+        from benchmark import load_graph
+        from fake_llm import FakeGemini
+        cache_dir = os.environ.get("TRIP_PLANNER_CACHE_DIR") or tempfile.mkdtemp(prefix="trip_server_")
+        trip_planner = load_graph(FakeGemini(), cache_dir)
+    else:
+        from model_registry import configure_api_key
+        configure_api_key()
+        import trip_planner
+
+    from google.adk.apps import App
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from budget import BudgetPlugin
+    from session_store import CompactingSessionService, compaction_config
+
+    plugins = [BudgetPlugin()]
+    if persistent:
+        session_service = CompactingSessionService()
+        app = App(name=SERVER_APP_NAME, root_agent=trip_planner.get_coordinator(mode),
+                  plugins=plugins, events_compaction_config=compaction_config())
+    else:
+        session_service = InMemorySessionService()
+        app = App(name=SERVER_APP_NAME, root_agent=trip_planner.get_coordinator(mode), plugins=plugins)
+    return Runner(app=app, session_service=session_service, auto_create_session=True)
+
+
+def create_app(runner, max_plans=MAX_CONCURRENT_PLANS, max_queued=MAX_QUEUED_PLANS,
+               shutdown_grace=SHUTDOWN_GRACE):
+    service = PlanService(runner, max_plans, max_queued)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        if not await service.drain(shutdown_grace):
+            print(f"⚠️ Shut down with {service.active} plan(s) still running", flush=True)
+
+    app = FastAPI(title="AI Trip Planner", lifespan=lifespan)
+    app.state.service = service
+
+    @app.post("/users/{user_id}/sessions")
+    async def create_session(user_id: str):
+        session = await runner.session_service.create_session(app_name=runner.app_name, user_id=user_id)
+        return {"session_id": session.id}
+
+    @app.post("/users/{user_id}/sessions/{session_id}/messages")
+    async def send_message(user_id: str, session_id: str, message: Message):
+        try:
+            service.admit(user_id, session_id)
+        except ServiceBusy as e:
+            headers = {"Retry-After": str(RETRY_AFTER)} if e.status in (429, 503) else None
+            raise HTTPException(status_code=e.status, detail=str(e), headers=headers)
+        return StreamingResponse(
+            service.stream(user_id, session_id, message.text),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache"},
+        )
+
+    @app.get("/health")
+    async def health():
+        from destination_facts import fact_stats
+        from single_flight import merge_stats
+        return {**service.stats(), "merged_calls": merge_stats(), "destination_facts": fact_stats()}
+
+    return app
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the trip planner over HTTP with SSE streaming")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--mode", default=None, help="Orchestration mode (default: TRIP_PLANNER_MODE or hierarchical)")
+    parser.add_argument("--max-plans", type=int, default=MAX_CONCURRENT_PLANS, help="Turns answered at the same time")
+    parser.add_argument("--max-queued", type=int, default=MAX_QUEUED_PLANS, help="Turns waiting for a slot before 429s")
+    parser.add_argument("--shutdown-grace", type=float, default=SHUTDOWN_GRACE, help="Seconds to finish running turns")
+    parser.add_argument("--offline", action="store_true", help="Use the local stand-in model (no API calls)")
+    parser.add_argument("--in-memory", action="store_true", help="Keep sessions in memory instead of SQLite")
+    args = parser.parse_args(argv)
+    args.mode = args.mode or os.environ.get("TRIP_PLANNER_MODE", "hierarchical")
+    return args
+
+
+def main(argv=None):
+    import uvicorn
+
+    args = parse_args(argv)
+    runner = build_runner(args.mode, args.offline, persistent=not args.in_memory)
+    app = create_app(runner, args.max_plans, args.max_queued, args.shutdown_grace)
+    print(f"🌍 Trip planner serving on http://{args.host}:{args.port} "
+          f"({args.mode} mode, {args.max_plans} concurrent plans)", flush=True)
+    uvicorn.run(app, host=args.host, port=args.port, timeout_graceful_shutdown=args.shutdown_grace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import asyncio
+import os
+import sqlite3
+from urllib.parse import unquote, urlparse
+
+from google.adk.apps.app import EventsCompactionConfig
+from google.adk.apps.base_events_summarizer import BaseEventsSummarizer
+from google.adk.events import Event, EventActions
+from google.adk.events.event_actions import EventCompaction
+from google.adk.sessions.sqlite_session_service import SqliteSessionService
+from google.genai import types
+
+from cache_store import cache_path
+from plan_table import PLAN_TABLE_HEADING
+from streaming import RESPONDING_AGENT
+
+# ==========================================
+# PERSISTENT, COMPACTED SESSIONS
+# ==========================================
+# Sessions live in a local SQLite file so a conversation survives a restart.
+# Every few turns ADK's sliding-window compaction hands the older events to
+# PlanSnapshotSummarizer, which folds them into a short conversation log plus
+# the latest trip plan in full, without a model call. The session service
+# then deletes the events that summary covers and merges it with the previous
+# summary. A session therefore holds one summary and the last few turns,
+# however long the conversation runs. That bounds what is loaded on resume
+# and what every later turn re-sends to the model.
+
+SESSION_DB = os.environ.get("TRIP_PLANNER_SESSION_DB", cache_path("sessions.sqlite"))
+
+# Completed turns that trigger a compaction of everything before them.
+COMPACTION_INTERVAL = int(os.environ.get("TRIP_PLANNER_COMPACT_EVERY", "3"))
+
+# Longest assistant reply kept verbatim in the conversation log.
+MAX_REPLY_CHARS = 400
+
+LOG_HEADER = "Earlier in this conversation (compacted):"
+PLAN_HEADER = "Latest trip plan sent to the user:"
+# Log lines of the user's own messages, which later turns still read.
+USER_LINE_PREFIX = "User: "
+
+
+def _text(event):
+    if not event.content or not event.content.parts:
+        return ""
+    return "\n".join(part.text for part in event.content.parts if part.text and not part.thought).strip()
+
+
+def _split_summary(content):
+    """(log lines, latest plan) of a summary written by PlanSnapshotSummarizer."""
+    log, plan = [], ""
+    for part in content.parts or []:
+        text = part.text or ""
+        if text.startswith(LOG_HEADER):
+            log = [line for line in text[len(LOG_HEADER):].strip().splitlines() if line]
+        elif text.startswith(PLAN_HEADER):
+            plan = text[len(PLAN_HEADER):].strip()
+    return log, plan
+
+
+def _summary_content(log, plan):
+    parts = [types.Part(text=f"{LOG_HEADER}\n" + "\n".join(log))]
+    if plan:
+        parts.append(types.Part(text=f"{PLAN_HEADER}\n{plan}"))
+    return types.Content(role="model", parts=parts)
+
+
+class PlanSnapshotSummarizer(BaseEventsSummarizer):
+    """Compacts turns without a model call.
+
+    User messages and short replies are kept as a log. Tool calls, digests
+    and superseded plans are dropped, and the most recent plan is kept in
+    full.
+    """
+
+    async def maybe_summarize_events(self, *, events):
+        if not events:
+            return None
+        log, plan = [], ""
+        replies = {}
+        for event in events:
+            text = _text(event)
+            if not text:
+                continue
+            if event.author == "user":
+                log.append(f"{USER_LINE_PREFIX}{' '.join(text.split())}")
+            elif event.author == RESPONDING_AGENT:
+                # A plan arrives as the report plus the appended table.
+                replies.setdefault(event.invocation_id, []).append(text)
+                if len(replies[event.invocation_id]) == 1:
+                    log.append(f"@reply:{event.invocation_id}")
+        for index, line in enumerate(log):
+            if not line.startswith("@reply:"):
+                continue
+            reply = "\n\n".join(replies[line[len("@reply:"):]])
+            if PLAN_TABLE_HEADING in reply:
+                plan = reply
+                log[index] = "Assistant: (sent a trip plan)"
+            elif len(reply) > MAX_REPLY_CHARS:
+                log[index] = f"Assistant: {reply[:MAX_REPLY_CHARS]}..."
+            else:
+                log[index] = f"Assistant: {reply}"
+        compaction = EventCompaction(
+            start_timestamp=events[0].timestamp,
+            end_timestamp=events[-1].timestamp,
+            compacted_content=_summary_content(log, plan),
+        )
+        return Event(author="user", actions=EventActions(compaction=compaction), invocation_id=Event.new_id())
+
+
+def compaction_config(interval=COMPACTION_INTERVAL):
+    """App(events_compaction_config=...) for PlanSnapshotSummarizer."""
+    return EventsCompactionConfig(
+        summarizer=PlanSnapshotSummarizer(),
+        compaction_interval=interval,
+        overlap_size=0,
+    )
+
+
+def sqlite_location(db_path):
+    """(file path, connect target, uri flag) for a file path or a SQLAlchemy
+    style sqlite:/// URL, read the way SqliteSessionService reads it."""
+    if not db_path.startswith(("sqlite:", "sqlite+aiosqlite:")):
+        return db_path, db_path, False
+    parsed = urlparse(db_path)
+    path = unquote(parsed.path)
+    if not path:
+        return db_path, db_path, False
+    # sqlite:///relative.db and sqlite:////absolute.db
+    path = path[1:] if path.startswith("/") else path
+    if parsed.query:
+        return path, f"file:{path}?{parsed.query}", True
+    return path, path, False
+
+
+class CompactingSessionService(SqliteSessionService):
+    """SQLite sessions that keep one merged summary instead of old events."""
+
+    def __init__(self, db_path=SESSION_DB):
+        self.db_file, self.connect_target, self.connect_uri = sqlite_location(db_path)
+        if self.db_file in ("", ":memory:"):
+            # Compaction deletes events over a connection of its own, which
+            # cannot reach another connection's in-memory database.
+            raise ValueError("CompactingSessionService needs a database file; "
+                             "use InMemorySessionService for sessions that are not kept")
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_file)), exist_ok=True)
+        super().__init__(db_path)
+
+    async def append_event(self, session, event):
+        compaction = event.actions.compaction if event.actions else None
+        if event.partial or compaction is None:
+            return await super().append_event(session, event)
+
+        previous = [e for e in session.events if e.actions and e.actions.compaction]
+        start = compaction.start_timestamp
+        log, plan = _split_summary(compaction.compacted_content)
+        for older in previous:
+            older_log, older_plan = _split_summary(older.actions.compaction.compacted_content)
+            log = older_log + log
+            plan = plan or older_plan
+            start = min(start, older.actions.compaction.start_timestamp)
+        merged = event.model_copy(update={"actions": EventActions(compaction=EventCompaction(
+            start_timestamp=start,
+            end_timestamp=compaction.end_timestamp,
+            compacted_content=_summary_content(log, plan),
+        ))})
+
+        covered = [
+            e for e in session.events
+            if (e.actions and e.actions.compaction) or start <= e.timestamp <= compaction.end_timestamp
+        ]
+        await self._delete_events(session, [e.id for e in covered])
+        covered_ids = {e.id for e in covered}
+        session.events = [e for e in session.events if e.id not in covered_ids]
+        return await super().append_event(session, merged)
+
+    async def _delete_events(self, session, event_ids):
+        if not event_ids:
+            return
+        rows = [(session.app_name, session.user_id, session.id, event_id) for event_id in event_ids]
+        await asyncio.to_thread(self._delete_rows, rows)
+
+    def _delete_rows(self, rows):
+        # Our own connection: the base class keeps its connection helper private.
+        with sqlite3.connect(self.connect_target, timeout=10, uri=self.connect_uri) as db:
+            db.executemany("DELETE FROM events WHERE app_name=? AND user_id=? AND session_id=? AND id=?", rows)
+        db.close()
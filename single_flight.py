@@ -0,0 +1,80 @@
+import asyncio
+
+# ==========================================
+# IN-FLIGHT REQUEST MERGING
+# ==========================================
+# The caches only help once an answer is stored. When many users plan the
+# same popular trip at once, identical specialist runs (FinanceAgent for
+# "Japan, October") and identical searches all miss the cache together and
+# each spends quota on its own. A SingleFlight group lets the first caller
+# with a key make the call while later callers with the same key wait for
+# that call's result. Keys are the ones the caches already use: the brief
+# slots a specialist depends on (specialist_cache.py), and the normalized
+# query (search_cache.py).
+#
+# A caller that gives up (cancelled, or cut off by its deadline) only stops
+# waiting. The shared call is cancelled once nobody is waiting for it any
+# more.
+
+_groups = {}
+
+
+class SingleFlight:
+    """Merges concurrent calls that have the same key into one call."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.merged = 0
+        # key -> [task, number of callers waiting for it]
+        self._in_flight = {}
+        self._loop = None
+        _groups[name] = self
+
+    def _flights(self):
+        # Tasks belong to one event loop; forget the old ones when it changes.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._in_flight = {}
+        return self._in_flight
+
+    async def do(self, key, call):
+        """Returns `await call()`, sharing one call between concurrent
+        callers with the same `key`. A None key is never merged."""
+        if key is None:
+            self.calls += 1
+            return await call()
+        flights = self._flights()
+        flight = flights.get(key)
+        if flight is None:
+            self.calls += 1
+            task = asyncio.ensure_future(call())
+            flight = flights[key] = [task, 0]
+            task.add_done_callback(lambda _: flights.pop(key, None) if flights.get(key) is flight else None)
+        else:
+            self.merged += 1
+        flight[1] += 1
+        try:
+            return await asyncio.shield(flight[0])
+        finally:
+            flight[1] -= 1
+            if flight[1] == 0 and not flight[0].done():
+                flight[0].cancel()
+                # A caller arriving now starts a new call instead of joining this one.
+                if flights.get(key) is flight:
+                    del flights[key]
+
+    def stats(self):
+        total = self.calls + self.merged
+        return {
+            "calls": self.calls,
+            "merged": self.merged,
+            "in_flight": len(self._in_flight),
+            "merge_rate": round(self.merged / total, 3) if total else 0.0,
+        }
+
+
+def merge_stats():
+    """Stats of every SingleFlight group created so far, by name."""
+    return {name: group.stats() for name, group in _groups.items()}
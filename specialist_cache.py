@@ -0,0 +1,111 @@
+import json
+
+from google.genai import types
+
+from cache_store import SqliteCache, cache_path
+from search_cache import DAY, HOUR
+from trip_brief import BRIEF_STATE_KEY, TripBrief, canonical_destination, parse_brief
+
+# ==========================================
+# SPECIALIST RESULT CACHE
+# ==========================================
+# Repeat briefs ("Tokyo, October, work") are common, so each specialist's
+# answer is memoized on the brief slots it actually depends on. The check
+# runs as the specialist's before_agent_callback: on a hit the stored answer
+# is returned and neither the model nor the search tool is called.
+
+# Brief slots each specialist's answer depends on.
+SPECIALIST_SLOTS = {
+    "ResearchAgent": ("destination", "purpose"),
+    "LogisticsAgent": ("destination", "month", "duration", "budget", "purpose"),
+    "FinanceAgent": ("destination", "duration", "budget", "purpose"),
+    "AttractionsAgent": ("destination", "month", "purpose"),
+    "PackingAgent": ("destination", "month", "purpose"),
+}
+
+# How long a specialist's answer is reused. Prices and rates go stale fastest.
+SPECIALIST_TTLS = {
+    "ResearchAgent": 7 * DAY,
+    "LogisticsAgent": 1 * DAY,
+    "FinanceAgent": 12 * HOUR,
+    "AttractionsAgent": 7 * DAY,
+    "PackingAgent": 3 * DAY,
+}
+
+# Bumped whenever the specialists' answer format, instructions or tools
+# change, so answers from an older prompt are never served for the new one.
+# 3: specialists look up local destination facts first (destination_facts.py).
+ANSWER_FORMAT = 3
+
+# Specialists that must run afresh even on a cache hit. replanning.py sets it
+# when a follow-up changes a slot within the same cache bucket ($2000 to
+# $2500): the cached answer would still be the old one.
+REFRESH_STATE_KEY = "specialist_cache_refresh"
+
+specialist_cache = SqliteCache(cache_path("specialist_cache.sqlite"), max_entries=500)
+
+
+def specialist_cache_key(agent_name, brief_text, brief=None):
+    """Returns the cache key for a specialist and brief, or None if the brief
+    has no recognisable destination (nothing safe to share). `brief` (a
+    TripBrief) takes precedence over parsing `brief_text`."""
+    slots = (brief or parse_brief(brief_text)).slot_key()
+    if not slots["destination"]:
+        return None
+    relevant = {slot: slots[slot] for slot in SPECIALIST_SLOTS.get(agent_name, slots)}
+    return f"{slots['destination']}|{agent_name}|v{ANSWER_FORMAT}|{json.dumps(relevant, sort_keys=True)}"
+
+
+def _brief_text(callback_context):
+    content = callback_context.user_content
+    if not content or not content.parts:
+        return ""
+    return "\n".join(part.text for part in content.parts if part.text)
+
+
+def _cache_key(callback_context):
+    # The research stage records the brief it dispatched, merged across the
+    # conversation; a follow-up's text alone would still show the old budget.
+    slots = callback_context.state.get(BRIEF_STATE_KEY)
+    brief = TripBrief.from_dict(slots) if slots else None
+    return specialist_cache_key(callback_context.agent_name, _brief_text(callback_context), brief)
+
+
+def check_specialist_cache(callback_context):
+    """before_agent_callback: answers from the cache when the slots match."""
+    if callback_context.agent_name in (callback_context.state.get(REFRESH_STATE_KEY) or []):
+        return None
+    key = _cache_key(callback_context)
+    if key is None:
+        return None
+    cached = specialist_cache.get(key)
+    if cached is None:
+        return None
+    return types.Content(role="model", parts=[types.Part(text=cached)])
+
+
+def store_specialist_result(callback_context):
+    """after_agent_callback: remembers the specialist's final answer."""
+    agent_name = callback_context.agent_name
+    key = _cache_key(callback_context)
+    if key is None:
+        return None
+    for event in reversed(callback_context.session.events):
+        if event.author != agent_name or event.partial or not event.content:
+            continue
+        text = "\n".join(part.text for part in event.content.parts or [] if part.text and not part.thought)
+        if text:
+            specialist_cache.set(key, text, SPECIALIST_TTLS.get(agent_name, DAY))
+        break
+    return None
+
+
+def invalidate_specialist_cache(destination=None, agent_name=None):
+    """Drops cached answers for a destination (optionally one specialist only),
+    or everything when no destination is given. Returns the number removed."""
+    if destination is None:
+        return specialist_cache.invalidate()
+    prefix = f"{canonical_destination(destination)}|"
+    if agent_name:
+        prefix += f"{agent_name}|"
+    return specialist_cache.invalidate(prefix=prefix)
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import os
+
+from budget import clear_budget
+from deadline import clear_deadline
+from specialist_cache import SPECIALIST_SLOTS
+from trip_brief import BRIEF_STATE_KEY
+
+# ==========================================
+# SPECULATIVE RESEARCH
+# ==========================================
+# While the user answers a clarifying question ("what's your budget?") the
+# planner used to sit idle, although the destination and month are often
+# known already and several specialists do not depend on what is missing.
+# Once every slot a specialist depends on (SPECIALIST_SLOTS) is known, that
+# specialist is started in the background on a runner of its own, with the
+# caller's plugins. Its answer lands in the specialist cache.
+#
+# The next turn cancels any guess whose slots no longer match (e.g. the
+# destination changed). When the research stage reaches a specialist that
+# is still running with matching slots, it waits for that run instead of
+# starting a second one, and then finds the answer in the cache. A guess
+# that fails is reported and otherwise costs nothing: the specialist simply
+# runs as usual.
+#
+# Only the interactive CLI speculates (main.py sets TRIP_PLANNER_SPECULATE=1).
+# Batch, evaluation and server runs have nobody who will answer the
+# question, and a detached run counts against neither the plan budget nor
+# their concurrency limits.
+
+# Seconds the research stage waits for a matching speculative run.
+SPECULATION_WAIT = 180
+
+
+def speculation_enabled():
+    return os.environ.get("TRIP_PLANNER_SPECULATE", "0") != "0"
+
+
+def relevant_slots(agent_name, brief):
+    """The slot values a specialist's answer depends on, as a stable string."""
+    slots = brief.slot_key()
+    return json.dumps({slot: slots[slot] for slot in SPECIALIST_SLOTS[agent_name]}, sort_keys=True)
+
+
+def ready_specialists(brief, agents):
+    """Specialists whose every dependency slot is already known."""
+    slots = brief.slot_key()
+    return [
+        agent for agent in agents
+        if agent.name in SPECIALIST_SLOTS
+        and all(slots[slot] is not None for slot in SPECIALIST_SLOTS[agent.name])
+    ]
+
+
+def _session_key(invocation_context):
+    session = invocation_context.session
+    return invocation_context.app_name, session.user_id, session.id
+
+
+async def _run_detached(agent, brief_text, brief, invocation_context):
+    """Runs a specialist outside the current turn, like AgentTool would."""
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from google.genai import types
+
+    # The task inherited the deadline and budget of the turn that asked the question.
+    clear_deadline()
+    clear_budget()
+    runner = Runner(
+        app_name=invocation_context.app_name,
+        agent=agent,
+        session_service=InMemorySessionService(),
+        plugins=invocation_context.plugin_manager.plugins,
+    )
+    # The plugins belong to the caller's runner.
+    runner.plugin_manager.set_skip_closing_plugins(True)
+    try:
+        session = await runner.session_service.create_session(
+            app_name=invocation_context.app_name,
+            user_id=invocation_context.user_id,
+            # The specialist cache keys the answer on these slots.
+            state={BRIEF_STATE_KEY: brief.to_dict()},
+        )
+        message = types.Content(role="user", parts=[types.Part(text=brief_text)])
+        async for _ in runner.run_async(user_id=session.user_id, session_id=session.id, new_message=message):
+            pass
+    except Exception as e:
+        # The specialist runs as usual on the planning turn, but a bad key or
+        # exhausted quota should not go unnoticed.
+        print(f"Warning: speculative {agent.name} run failed: {type(e).__name__}: {e}")
+        speculator.failed += 1
+    finally:
+        await runner.close()
+
+
+class Speculator:
+    """Background specialist runs, per session."""
+
+    def __init__(self):
+        # session key -> {agent name: (user_id, relevant slots, task)}
+        self._runs = {}
+        self.started = 0
+        self.cancelled = 0
+        self.joined = 0
+        self.failed = 0
+
+    def start(self, invocation_context, brief, brief_text, agents):
+        """Starts every specialist that `brief` already has enough slots for.
+        Returns the names of the ones started."""
+        if not speculation_enabled() or not brief.destination:
+            return []
+        self.cancel_stale(invocation_context, brief)
+        key = _session_key(invocation_context)
+        runs = self._runs.setdefault(key, {})
+        started = []
+        for agent in ready_specialists(brief, agents):
+            if agent.name in runs:
+                continue
+            task = asyncio.create_task(_run_detached(agent, brief_text, brief, invocation_context))
+            runs[agent.name] = (invocation_context.user_id, relevant_slots(agent.name, brief), task)
+            task.add_done_callback(lambda task, name=agent.name: self._forget(key, name, task))
+            started.append(agent.name)
+        self.started += len(started)
+        if not runs:
+            self._runs.pop(key, None)
+        return started
+
+    def _forget(self, key, name, task):
+        # Sessions are dropped with their last run, so a long-lived server
+        # does not keep an entry for every session it has seen.
+        runs = self._runs.get(key)
+        if runs is None:
+            return
+        if runs.get(name, (None, None, None))[2] is task:
+            del runs[name]
+        if not runs:
+            del self._runs[key]
+
+    def cancel_stale(self, invocation_context, brief):
+        """Cancels this session's runs whose slots no longer match `brief`."""
+        key = _session_key(invocation_context)
+        for name, (_, slots, task) in list(self._runs.get(key, {}).items()):
+            if slots != relevant_slots(name, brief):
+                task.cancel()
+                self._forget(key, name, task)
+                self.cancelled += 1
+
+    async def join(self, user_id, agent_name, brief, timeout=SPECULATION_WAIT):
+        """Waits for a run of `agent_name` on the same slots, if one is in
+        flight. Returns True when there was one to wait for."""
+        if agent_name not in SPECIALIST_SLOTS:
+            return False
+        slots = relevant_slots(agent_name, brief)
+        for runs in self._runs.values():
+            run = runs.get(agent_name)
+            if run and run[0] == user_id and run[1] == slots:
+                self.joined += 1
+                await asyncio.wait([run[2]], timeout=timeout)
+                return True
+        return False
+
+    def stats(self):
+        return {"started": self.started, "cancelled": self.cancelled, "joined": self.joined,
+                "failed": self.failed, "sessions": len(self._runs)}
+
+
+# Shared by every session in the process.
+speculator = Speculator()
@@ -0,0 +1,133 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmark import percentile
+
+# ==========================================
+# STARTUP BENCHMARK
+# ==========================================
+# Holds cold start to a budget. Every measurement runs in a fresh Python
+# process, so nothing is already imported:
+#
+#   import_seconds       import trip_planner (must not import google.adk)
+#   cli_quit_seconds     python main.py, then "quit" at the prompt
+#   build_graph_seconds  import ADK and build both orchestration modes
+#                        with the stand-in model (first turn's extra cost)
+#
+#   python startup_benchmark.py --repeat 5 --check
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+STARTUP_BUDGETS = {
+    "import_seconds": 0.3,
+    "cli_quit_seconds": 1.0,
+    "build_graph_seconds": 6.0,
+}
+
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import trip_planner
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "adk_imported": any(name.startswith("google.adk") for name in sys.modules),
+}))
+"""
+
+BUILD_PROBE = """
+import json, tempfile, time
+started = time.perf_counter()
+from benchmark import load_graph
+from fake_llm import FakeGemini
+trip_planner = load_graph(FakeGemini(), tempfile.mkdtemp(prefix="trip_startup_"))
+for mode in trip_planner.ORCHESTRATION_MODES:
+    trip_planner.get_coordinator(mode)
+print(json.dumps({"seconds": time.perf_counter() - started}))
+"""
+
+
+def _env(cache_dir):
+    return {**os.environ, "TRIP_PLANNER_CACHE_DIR": cache_dir}
+
+
+def _probe(code, cache_dir):
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=_env(cache_dir),
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def time_cli_quit(cache_dir):
+    """Seconds from launching main.py to its exit after "quit"."""
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, "main.py"), "--session", "startup_benchmark"],
+        cwd=cache_dir, env=_env(cache_dir), input="quit\n",
+        capture_output=True, text=True, check=True,
+    )
+    return time.perf_counter() - started
+
+
+def measure(repeat=3):
+    """p50 of each startup measurement over `repeat` fresh processes."""
+    cache_dir = tempfile.mkdtemp(prefix="trip_startup_")
+    imports, quits, builds = [], [], []
+    adk_imported = False
+    for _ in range(repeat):
+        probe = _probe(IMPORT_PROBE, cache_dir)
+        imports.append(probe["seconds"])
+        adk_imported = adk_imported or probe["adk_imported"]
+        quits.append(time_cli_quit(cache_dir))
+        builds.append(_probe(BUILD_PROBE, cache_dir)["seconds"])
+    return {
+        "repeat": repeat,
+        "import_seconds": round(percentile(imports, 50), 3),
+        "cli_quit_seconds": round(percentile(quits, 50), 3),
+        "build_graph_seconds": round(percentile(builds, 50), 3),
+        "adk_imported_by_trip_planner": adk_imported,
+    }
+
+
+def over_budget(report, budgets=STARTUP_BUDGETS):
+    """Names of the measurements above their budget."""
+    failures = [name for name, budget in budgets.items() if report[name] > budget]
+    if report["adk_imported_by_trip_planner"]:
+        failures.append("adk_imported_by_trip_planner")
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the trip planner")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh processes per measurement (p50 is reported)")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if any budget is exceeded")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = measure(args.repeat)
+    for name, budget in STARTUP_BUDGETS.items():
+        mark = "✅" if report[name] <= budget else "❌"
+        print(f"{mark} {name:<22}{report[name]:>8.3f}s  (budget {budget:.1f}s)")
+    if report["adk_imported_by_trip_planner"]:
+        print("❌ importing trip_planner imports google.adk")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.json}")
+    if args.check and over_budget(report):
+        sys.exit(1)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import asyncio
+import time
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+from deadline import ABORT_GRACE, current_deadline
+
+# ==========================================
+# STREAMING TURNS
+# ==========================================
+# Streams the InteractiveAgent's answer token by token instead of waiting for
+# the whole multi-agent chain, and measures what the user actually feels:
+# time to first token and total latency per turn.
+
+# Author of the user-facing text in both orchestration modes.
+RESPONDING_AGENT = "InteractiveAgent"
+
+
+class AgentActivityPlugin(BasePlugin):
+    """Reports which agents are running, including ones nested in AgentTools.
+
+    Plugins are inherited by AgentTool sub-runners, so this sees the Planner,
+    ResearchInstruction and specialist agents too, not just the root.
+    """
+
+    def __init__(self, on_change=None):
+        super().__init__(name="agent_activity")
+        self.running = []
+        self.on_change = on_change
+
+    async def before_agent_callback(self, *, agent, callback_context):
+        self.running.append(agent.name)
+        if self.on_change:
+            self.on_change("start", agent.name, list(self.running))
+        return None
+
+    async def after_agent_callback(self, *, agent, callback_context):
+        if agent.name in self.running:
+            self.running.remove(agent.name)
+        if self.on_change:
+            self.on_change("end", agent.name, list(self.running))
+        return None
+
+
+class TurnMetrics:
+    """Wall-clock timings of one conversation turn."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.finished_at = None
+        # Set when the turn deadline cut research short or ended the turn.
+        self.time_limit_reached = False
+        # The runner's invocation for this turn, once its first event arrives.
+        self.invocation_id = None
+
+    def mark_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def finish(self):
+        self.finished_at = time.perf_counter()
+
+    @property
+    def time_to_first_token(self):
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def total(self):
+        end = self.finished_at if self.finished_at is not None else time.perf_counter()
+        return end - self.started_at
+
+    def to_dict(self):
+        ttft = self.time_to_first_token
+        return {
+            "time_to_first_token_seconds": round(ttft, 3) if ttft is not None else None,
+            "total_seconds": round(self.total, 3),
+            "time_limit_reached": self.time_limit_reached,
+        }
+
+    def summary(self):
+        ttft = self.time_to_first_token
+        first = f"{ttft:.2f}s" if ttft is not None else "n/a"
+        limit = " · Time limit reached" if self.time_limit_reached else ""
+        return f"First token: {first} · Total: {self.total:.2f}s{limit}"
+
+
+def _visible_text(content):
+    if not content or not content.parts:
+        return ""
+    return "".join(part.text for part in content.parts if part.text and not part.thought)
+
+
+async def iter_turn(runner, user_id, session_id, user_input, metrics=None,
+                    responding_agent=RESPONDING_AGENT):
+    """Runs one turn with SSE streaming, yielding each new chunk of the
+    responding agent's text as it arrives.
+
+    The turn only advances as fast as the chunks are consumed, so a slow
+    reader slows the run down instead of piling up text in memory. Under a
+    turn deadline (deadline.py) the run is aborted at its hard limit.
+    """
+    metrics = metrics or TurnMetrics()
+    deadline = current_deadline()
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE)
+    message = types.Content(role="user", parts=[types.Part(text=user_input)])
+
+    streamed = ""
+    emitted = False
+    events = runner.run_async(
+        user_id=user_id,
+        session_id=session_id,
+        new_message=message,
+        run_config=run_config,
+        abort_signal=deadline.abort_signal if deadline else None,
+    )
+    while True:
+        try:
+            # Bounds each step, not the yield below: the reader's time is its own.
+            event = await asyncio.wait_for(anext(events), deadline.remaining() + ABORT_GRACE if deadline else None)
+        except StopAsyncIteration:
+            break
+        except asyncio.TimeoutError:
+            # Past the hard limit and the abort signal did not end the run.
+            break
+        metrics.invocation_id = metrics.invocation_id or event.invocation_id
+        if event.author != responding_agent:
+            continue
+        text = _visible_text(event.content)
+        if not text:
+            continue
+        metrics.mark_token()
+        # A new message (e.g. the appended plan table) starts on a new line.
+        separator = "\n" if emitted and not streamed else ""
+        if event.partial:
+            chunk = separator + text
+            streamed += text
+        elif streamed and text.startswith(streamed):
+            # The final event repeats the aggregated text. Emit only what the
+            # partial chunks did not already cover.
+            chunk = text[len(streamed):]
+            streamed = ""
+        else:
+            chunk = ("\n" if emitted else "") + text
+            streamed = ""
+        if chunk:
+            emitted = True
+            yield chunk
+    if deadline:
+        metrics.time_limit_reached = deadline.cut_off or deadline.abort_signal.is_set()
+    metrics.finish()
+
+
+async def stream_turn(runner, user_id, session_id, user_input, on_text=None,
+                      responding_agent=RESPONDING_AGENT):
+    """Runs one turn with SSE streaming.
+
+    `on_text` is called with each new chunk of the responding agent's text as
+    it arrives. Returns the full response text and the turn's TurnMetrics.
+    """
+    metrics = TurnMetrics()
+    chunks = []
+    async for chunk in iter_turn(runner, user_id, session_id, user_input, metrics, responding_agent):
+        chunks.append(chunk)
+        if on_text:
+            on_text(chunk)
+    return "".join(chunks), metrics
@@ -131,5 +131,31 @@ async def test_trip_plan_execution(runner, eval_case):
     
     print(f"PASSED: {eval_id}")
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("eval_case", load_eval_cases())
+async def test_key_phrase_recall(runner, eval_case):
+    """
+    Every turn with a `final_response` in the evalset must contain its key
+    phrase, scored as in evaluate.py against test/key_phrase_config.json.
+    """
+    from evaluate import key_phrase_recall, load_threshold, reference_texts
+
+    eval_id = eval_case["eval_id"]
+    threshold = load_threshold()
+    session_id = f"test_recall_{eval_id}"
+
+    for turn_index, (turn, reference) in enumerate(zip(eval_case["conversation"], reference_texts(eval_case))):
+        user_query = turn["user_content"]["parts"][0]["text"]
+        events = await runner.run_debug(user_query, session_id=session_id, quiet=True)
+        if reference is None:
+            continue
+        turn_text = "\n".join(
+            part.text for event in events if event.content and event.content.parts
+            for part in event.content.parts if part.text
+        )
+        score = key_phrase_recall(turn_text, reference)
+        print(f"TURN {turn_index + 1} KEY PHRASE RECALL: {score} (threshold {threshold})")
+        assert score >= threshold, f"Turn {turn_index + 1} of {eval_id} scored {score}, below {threshold}"
+
 if __name__ == "__main__":
     sys.exit(pytest.main(["-v", __file__]))
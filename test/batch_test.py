@@ -0,0 +1,80 @@
+import pytest
+import os
+import sys
+import json
+import asyncio
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BRIEFS = [
+    {"id": "tokyo", "brief": "Plan a 1-week work trip to Tokyo in October. Budget $2000."},
+    {"id": "bali", "brief": "Two weeks in Bali in July, budget 3000 USD, travel."},
+    {"brief": "Study trip to London in September for a month, budget 4000 GBP."},
+]
+
+
+def run_batch(tmp_path, *args):
+    """Runs batch.py offline in its own process (it swaps the shared model for a stand-in)."""
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "batch.py"), "briefs.jsonl", "plans.jsonl", "--offline", *args],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=tmp_path,
+        env={**os.environ, "TRIP_PLANNER_CACHE_DIR": str(tmp_path / "cache")},
+    )
+    results = []
+    with open(tmp_path / "plans.jsonl") as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass  # the line cut short by the simulated crash
+    return results, result.stdout
+
+
+def test_batch_plans_every_brief_and_resumes(tmp_path):
+    with open(tmp_path / "briefs.jsonl", "w") as f:
+        f.write("\n".join(json.dumps(brief) for brief in BRIEFS) + "\n")
+
+    results, stdout = run_batch(tmp_path, "--mode", "fast", "--concurrency", "2")
+
+    assert sorted(result["id"] for result in results) == ["bali", "line-3", "tokyo"]
+    assert all(result["status"] == "ok" for result in results)
+    assert all(result["plan_rows"] and "MASTER PLAN TABLE" in result["report"] for result in results)
+    assert "plans/min" in stdout
+
+    # Simulate a crash mid-write: the cut-off line and the missing brief are redone.
+    lines = open(tmp_path / "plans.jsonl").read().splitlines()
+    with open(tmp_path / "plans.jsonl", "w") as f:
+        f.write("\n".join(lines[:2]) + "\n" + lines[2][:40])
+
+    results, stdout = run_batch(tmp_path, "--mode", "fast", "--workers", "2")
+
+    assert "1 planned, 0 failed, 2 skipped" in stdout
+    assert sorted(result["id"] for result in results) == ["bali", "line-3", "tokyo"]
+
+
+@pytest.mark.asyncio
+async def test_a_brief_rejected_in_clarification_makes_no_model_calls(tmp_path, monkeypatch):
+    sys.path.append(ROOT)
+    from google.adk.agents import LlmAgent
+    from batch import plan_brief
+    from stand_ins import StandInModel, build_runner, use_fresh_specialist_cache
+
+    monkeypatch.delenv("TRIP_PLANNER_SPECULATE", raising=False)
+    use_fresh_specialist_cache(tmp_path, monkeypatch)
+    names = ["ResearchAgent", "LogisticsAgent", "FinanceAgent", "AttractionsAgent", "PackingAgent"]
+    models = [StandInModel(label=name) for name in names]
+    specialists = [LlmAgent(name=name, model=model, instruction="Research.") for name, model in zip(names, models)]
+    compiler_model = StandInModel()
+    compiler = LlmAgent(name="InteractiveAgent", model=compiler_model, instruction="Compile.")
+    runner = build_runner(specialists=specialists, compiler=compiler, app_name="batch_test")
+
+    result = await plan_brief(runner, {"id": "tokyo", "brief": "Plan a 1-week work trip to Tokyo in October."})
+    # Time for any background run to reach its model.
+    await asyncio.sleep(0.3)
+
+    assert result["error"] == "brief is missing: budget"
+    assert [model.calls for model in models + [compiler_model]] == [0] * 6
@@ -0,0 +1,47 @@
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_benchmark(tmp_path, *args):
+    """Runs benchmark.py in its own process (it swaps the shared model for a stand-in)."""
+    report_path = tmp_path / "report.json"
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, "benchmark.py"), "--latency", "0", "--json", str(report_path), *args],
+        check=True,
+        capture_output=True,
+        cwd=tmp_path,
+        env={**os.environ, "TRIP_PLANNER_CACHE_DIR": str(tmp_path / "cache")},
+    )
+    with open(report_path) as f:
+        return json.load(f)
+
+
+def test_benchmark_replays_evalset_offline(tmp_path):
+    report = run_benchmark(tmp_path, "--repeat", "2")
+
+    with open(os.path.join(ROOT, "test", "evalset.json")) as f:
+        eval_ids = {case["eval_id"] for case in json.load(f)["eval_cases"]}
+    for mode in ["hierarchical", "fast"]:
+        assert set(report["results"][mode]) == eval_ids
+        for row in report["results"][mode].values():
+            assert row["runs"] == 2
+            assert row["wall_p50"] <= row["wall_p95"]
+            assert row["llm_calls"] > 0 and row["tool_calls"] > 0
+
+    # The fast path removes the Planner and ResearchInstruction model calls.
+    hierarchical = report["results"]["hierarchical"]["london_study_trip"]
+    fast = report["results"]["fast"]["london_study_trip"]
+    assert "PlannerAgent" in hierarchical["calls_by_agent"]
+    assert "PlannerAgent" not in fast["calls_by_agent"]
+    assert fast["llm_calls"] < hierarchical["llm_calls"]
+
+
+def test_warm_cache_skips_specialists(tmp_path):
+    report = run_benchmark(tmp_path, "--mode", "fast", "--repeat", "2", "--keep-cache", "--cases", "bali_leisure_trip")
+
+    # Only the compiler is left once every specialist answer is cached.
+    assert report["results"]["fast"]["bali_leisure_trip"]["calls_by_agent"] == {"InteractiveAgent": 1}
@@ -0,0 +1,66 @@
+import pytest
+import os
+import sys
+
+# Add parent dir to path to find brief_precheck
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+
+import research_stage
+from brief_precheck import ASKED_STATE_KEY, MISSING_STATE_KEY, PREFILL_STATE_KEY, clarify_brief, precheck
+from stand_ins import StandInModel, build_runner
+
+
+def test_each_missing_slot_is_asked_about_once():
+    state = {}
+    brief, questions, delta = precheck(["Plan a 1-week work trip to Tokyo."], state)
+
+    assert delta[MISSING_STATE_KEY] == ["budget"]
+    assert "Destination: Tokyo; Duration: 7 days; Purpose: Work" in questions
+    assert "What is your total budget" in questions
+    assert "Where would you like to go" not in questions
+    state.update(delta)
+
+    # Answered without a budget: the agents plan with what they have.
+    _, questions, delta = precheck(["Plan a 1-week work trip to Tokyo.", "In October please."], state)
+    assert questions is None
+    assert delta[PREFILL_STATE_KEY] == "Destination: Tokyo; Month: October; Duration: 7 days; Purpose: Work"
+
+    # A slot that was never asked about is still asked for.
+    state = {ASKED_STATE_KEY: ["budget"]}
+    _, questions, _ = precheck(["My budget is $900."], state)
+    assert "Where would you like to go" in questions and "What is your total budget" not in questions
+
+
+def test_lowercase_answers_are_not_asked_again():
+    state = {}
+    _, questions, delta = precheck(["i want to plan a trip"], state)
+    assert "Where would you like to go" in questions
+    state.update(delta)
+
+    _, questions, delta = precheck(["i want to plan a trip", "going to tokyo for work, about 2000 dollars"], state)
+    assert questions is None
+    assert delta[PREFILL_STATE_KEY] == "Destination: Tokyo; Budget: 2,000 USD; Purpose: Work"
+
+
+@pytest.mark.asyncio
+async def test_clarification_turns_make_no_model_call(monkeypatch):
+    # No background research here (see speculation_test.py).
+    monkeypatch.setattr(research_stage, "SPECIALISTS", [])
+    model = StandInModel(reply="Delegating.")
+    agent = LlmAgent(
+        name="InteractiveAgent",
+        model=model,
+        instruction="Plan.\n{trip_brief_prefill?}",
+        before_agent_callback=clarify_brief,
+    )
+    runner = build_runner(agent, app_name="brief_precheck_test")
+
+    events = await runner.run_debug("Plan a 1-week work trip to Tokyo.", session_id="s", quiet=True)
+    assert model.instructions == []
+    assert "What is your total budget" in events[-1].content.parts[0].text
+
+    await runner.run_debug("I need to stay in Shinjuku and my budget is $2000.", session_id="s", quiet=True)
+    assert len(model.instructions) == 1
+    assert "Destination: Tokyo; Duration: 7 days; Budget: 2,000 USD; Purpose: Work" in model.instructions[0]
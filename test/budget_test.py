@@ -0,0 +1,138 @@
+import pytest
+import os
+import sys
+from types import SimpleNamespace
+
+# Add parent dir to path to find budget
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from budget import SEARCHES_PER_SPECIALIST, STOP_NOTICE, BudgetPlugin, plan_budget
+from fast_path import FastPathCoordinator
+
+BRIEF = "Plan a 1-week work trip to Tokyo in October. Budget $2000."
+
+
+class UsageModel(BaseLlm):
+    """Stand-in model that reports 1000 input and 200 output tokens per call."""
+    model: str = "gemini-2.5-flash-lite"
+    reply: str = "ok"
+    instructions: list = []
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.instructions.append(str(llm_request.config.system_instruction))
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=self.reply)]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=1000, candidates_token_count=200, total_token_count=1200
+            ),
+        )
+
+
+class SearchForever(BaseLlm):
+    """Stand-in model that searches again after every search result."""
+    model: str = "gemini-2.5-flash-lite"
+
+    async def generate_content_async(self, llm_request, stream=False):
+        response = llm_request.contents[-1].parts[0].function_response
+        if response and "error" in response.response:
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="Found enough.")]))
+            return
+        call = types.FunctionCall(name="web_search", args={"request": "Tokyo coworking"})
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+
+
+searches = []
+
+
+async def web_search(request: str) -> str:
+    """Searches the web."""
+    searches.append(request)
+    return "Some results."
+
+
+def build_runner(specialists):
+    compiler_model = UsageModel(reply="Report", instructions=[])
+    compiler = LlmAgent(name="InteractiveAgent", model=compiler_model, instruction="Compile.\n{research_findings?}")
+    coordinator = FastPathCoordinator(name="TripCoordinator", compiler=compiler, specialists=specialists)
+    runner = Runner(agent=coordinator, session_service=InMemorySessionService(), app_name="budget_test",
+                    plugins=[BudgetPlugin()], auto_create_session=True)
+    return runner, compiler_model
+
+
+@pytest.mark.asyncio
+async def test_plan_degrades_past_the_soft_limit():
+    models = {name: UsageModel(instructions=[]) for name in ("ResearchAgent", "AttractionsAgent", "PackingAgent")}
+    runner, compiler_model = build_runner(
+        [LlmAgent(name=name, model=model, instruction="Research.") for name, model in models.items()]
+    )
+
+    with plan_budget(llm_calls=20) as budget:
+        # Spent earlier in the plan.
+        budget.llm_calls = 15
+        events = await runner.run_debug(BRIEF, quiet=True)
+
+    assert events[-1].content.parts[0].text == "Report"
+    assert models["PackingAgent"].instructions == []
+    assert "at most 3 places" in models["AttractionsAgent"].instructions[0]
+    assert "at most 3 places" not in models["ResearchAgent"].instructions[0]
+    assert "## PackingAgent\n_No findings: skipped to stay within the plan's budget_" in compiler_model.instructions[0]
+
+    report = budget.report()
+    assert report["llm_calls"] == 18
+    assert (report["input_tokens"], report["output_tokens"]) == (3000, 600)
+    assert report["soft_limit_reached"] and not report["hard_limit_reached"]
+    assert report["cuts"] == ["skipped PackingAgent", "fewer results from AttractionsAgent"]
+
+
+@pytest.mark.asyncio
+async def test_specialist_searches_are_capped():
+    searches.clear()
+    runner, _ = build_runner([LlmAgent(name="Searcher", model=SearchForever(), instruction="Research.", tools=[web_search])])
+
+    with plan_budget() as budget:
+        await runner.run_debug(BRIEF, quiet=True)
+
+    assert len(searches) == SEARCHES_PER_SPECIALIST
+    assert budget.tool_calls == SEARCHES_PER_SPECIALIST
+    assert "limited searches of Searcher" in budget.cuts
+
+
+@pytest.mark.asyncio
+async def test_plan_stops_at_the_hard_limit():
+    runner, compiler_model = build_runner([LlmAgent(name="ResearchAgent", model=UsageModel(instructions=[]), instruction="Research.")])
+
+    with plan_budget(llm_calls=1) as budget:
+        events = await runner.run_debug(BRIEF, quiet=True)
+
+    assert events[-1].content.parts[0].text == STOP_NOTICE
+    assert compiler_model.instructions == []
+    assert budget.report()["hard_limit_reached"]
+    assert budget.cuts == ["stopped InteractiveAgent"]
+
+
+@pytest.mark.asyncio
+async def test_research_is_not_repeated_past_the_soft_limit():
+    plugin = BudgetPlugin()
+    tool = SimpleNamespace(name="ResearchInstructionAgent")
+    context = SimpleNamespace(invocation_id="i1", agent_name="PlannerAgent")
+
+    with plan_budget(llm_calls=10) as budget:
+        assert await plugin.before_tool_callback(tool=tool, tool_args={}, tool_context=context) is None
+        # Below the soft limit the planner may still refine its request.
+        assert await plugin.before_tool_callback(tool=tool, tool_args={}, tool_context=context) is None
+        budget.llm_calls = 8
+        refused = await plugin.before_tool_callback(tool=tool, tool_args={}, tool_context=context)
+
+    assert "No further research" in refused["note"]
+    assert budget.tool_calls == 2
+    assert budget.cuts == ["no re-research"]
+
+    # Outside of a plan nothing is counted or refused.
+    assert await plugin.before_tool_callback(tool=tool, tool_args={}, tool_context=context) is None
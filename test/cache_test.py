@@ -0,0 +1,140 @@
+import pytest
+import os
+import sys
+import time
+import asyncio
+
+# Add parent dir to path to find the cache modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from cache_store import SqliteCache
+from search_cache import CachedSearchTool, categorize_query, normalize_query, search_flights
+
+
+class CountingSearchModel(BaseLlm):
+    """Stand-in for the grounded search model; counts how often it is called."""
+    model: str = "gemini-2.5-flash-lite"
+    calls: int = 0
+    delay: float = 0.0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text="1 USD = 150 JPY [XE](https://www.xe.com)")])
+        )
+
+
+class SearchOnceModel(BaseLlm):
+    """Stand-in specialist model: searches once, then answers."""
+    model: str = "gemini-2.5-flash-lite"
+    query: str = "USD to JPY exchange rate"
+
+    async def generate_content_async(self, llm_request, stream=False):
+        last = llm_request.contents[-1]
+        if not any(part.function_response for part in last.parts):
+            call = types.FunctionCall(name="web_search", args={"request": self.query})
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+        else:
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="done")]))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    store = SqliteCache(str(tmp_path / "cache.sqlite"), max_entries=3)
+    yield store
+    store.close()
+
+
+def test_get_set_and_counters(cache):
+    assert cache.get("visa japan") is None
+    cache.set("visa japan", {"answer": "visa free"}, ttl=60)
+
+    assert cache.get("visa japan") == {"answer": "visa free"}
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+
+
+def test_expired_entries_are_misses(cache):
+    cache.set("exchange rate", "150", ttl=0.05)
+    time.sleep(0.1)
+
+    assert cache.get("exchange rate") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted(cache):
+    for key in ["a", "b", "c"]:
+        cache.set(key, key, ttl=60)
+        time.sleep(0.01)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("d", "d", ttl=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "a"
+    assert len(cache) == 3
+
+
+def test_invalidate_by_key_and_prefix(cache):
+    cache.set("japan:visa", 1, ttl=60)
+    cache.set("japan:weather", 2, ttl=60)
+    cache.set("uk:visa", 3, ttl=60)
+
+    assert cache.invalidate(key="uk:visa") == 1
+    assert cache.invalidate(prefix="japan:") == 2
+    assert len(cache) == 0
+
+
+def test_query_normalization():
+    assert normalize_query("Japan visa requirements?") == normalize_query("japan  VISA requirements")
+    assert normalize_query("  Tokyo  WEATHER in October ") == "tokyo weather in october"
+
+
+def test_reversed_queries_get_different_keys():
+    assert normalize_query("flights London to Tokyo") != normalize_query("flights Tokyo to London")
+    assert normalize_query("USD to JPY") != normalize_query("JPY to USD")
+    assert normalize_query("flights from Tokyo") != normalize_query("flights to Tokyo")
+
+
+def test_query_categories():
+    assert categorize_query("USD to JPY exchange rate") == "exchange_rate"
+    assert categorize_query("Tokyo weather October") == "weather"
+    assert categorize_query("Japan visa for US citizens") == "visa"
+    assert categorize_query("Shinjuku coworking spaces") == "general"
+
+
+@pytest.mark.asyncio
+async def test_repeated_search_is_served_from_cache(cache):
+    search_model = CountingSearchModel()
+    search_agent = LlmAgent(name="web_search", model=search_model, instruction="Search.")
+    web_search = CachedSearchTool(search_agent, cache=cache)
+    specialist = LlmAgent(name="FinanceAgent", model=SearchOnceModel(), instruction="Finance.", tools=[web_search])
+    runner = Runner(agent=specialist, session_service=InMemorySessionService(), app_name="cache_test")
+
+    await runner.run_debug("Tokyo budget", session_id="first", quiet=True)
+    await runner.run_debug("Tokyo budget", session_id="second", quiet=True)
+
+    assert search_model.calls == 1
+    assert web_search.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_identical_searches_in_flight_are_merged(cache):
+    search_model = CountingSearchModel(delay=0.2)
+    search_agent = LlmAgent(name="web_search", model=search_model, instruction="Search.")
+    web_search = CachedSearchTool(search_agent, cache=cache)
+    specialist = LlmAgent(name="FinanceAgent", model=SearchOnceModel(), instruction="Finance.", tools=[web_search])
+    runner = Runner(agent=specialist, session_service=InMemorySessionService(), app_name="cache_test")
+    merged_before = search_flights.merged
+
+    # Both miss the cache; the second waits for the first one's search.
+    await asyncio.gather(*(runner.run_debug("Tokyo budget", session_id=f"burst{i}", quiet=True) for i in range(3)))
+
+    assert search_model.calls == 1
+    assert search_flights.merged - merged_before == 2
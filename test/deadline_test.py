@@ -0,0 +1,83 @@
+import pytest
+import os
+import sys
+import asyncio
+import time
+
+# Add parent dir to path to find deadline
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+
+from deadline import turn_deadline
+from findings import FINDINGS_STATE_KEY
+from stand_ins import StandInModel, build_runner
+from streaming import stream_turn
+
+BRIEF = "Plan a 1-week work trip to Tokyo in October. Budget $2000."
+
+
+def build_deadline_runner(stuck_delay=30, compiler_delay=0.05):
+    specialists = [
+        LlmAgent(name="QuickAgent", model=StandInModel(reply="Visa: not required.", delay=0.05),
+                 instruction="Research."),
+        LlmAgent(name="StuckAgent", model=StandInModel(delay=stuck_delay), instruction="Research."),
+    ]
+    compiler_model = StandInModel(delay=compiler_delay, reply="Partial report")
+    compiler = LlmAgent(
+        name="InteractiveAgent",
+        model=compiler_model,
+        instruction="Compile.\nFINDINGS:\n{research_findings?}",
+    )
+    return build_runner(specialists=specialists, compiler=compiler, app_name="deadline_test"), compiler_model
+
+
+@pytest.mark.asyncio
+async def test_stuck_specialist_is_cut_off_and_the_report_compiled_without_it():
+    runner, compiler_model = build_deadline_runner()
+
+    started = time.perf_counter()
+    async with turn_deadline(seconds=3.0, reserve=2.0):
+        text, metrics = await stream_turn(runner, "u", "s1", BRIEF)
+    elapsed = time.perf_counter() - started
+
+    # Research stops at the cutoff (1s); the compiler answers well before the hard limit.
+    assert elapsed < 2.5
+    assert text == "Partial report"
+    assert metrics.time_limit_reached
+    findings = compiler_model.instructions[0]
+    assert "## QuickAgent\nVisa: not required." in findings
+    assert "## StuckAgent\n_No findings: not finished within the turn's time limit_" in findings
+
+    session = await runner.session_service.get_session(app_name="deadline_test", user_id="u", session_id="s1")
+    assert "StuckAgent" in session.state[FINDINGS_STATE_KEY]
+
+
+@pytest.mark.asyncio
+async def test_cut_short_ends_the_research_at_once():
+    runner, compiler_model = build_deadline_runner()
+
+    async with turn_deadline(seconds=60) as deadline:
+        turn = asyncio.create_task(stream_turn(runner, "u", "s2", BRIEF))
+        await asyncio.sleep(0.3)
+        started = time.perf_counter()
+        deadline.cut_short()
+        text, metrics = await turn
+
+    assert time.perf_counter() - started < 0.5
+    assert text == "Partial report"
+    assert "not finished within the turn's time limit" in compiler_model.instructions[0]
+
+
+@pytest.mark.asyncio
+async def test_hard_limit_aborts_a_stuck_compiler():
+    runner, compiler_model = build_deadline_runner(stuck_delay=0.05, compiler_delay=30)
+
+    started = time.perf_counter()
+    async with turn_deadline(seconds=0.6, reserve=0.3):
+        text, metrics = await stream_turn(runner, "u", "s3", BRIEF)
+
+    # Aborted at the hard limit, in-flight calls cancelled ABORT_GRACE later.
+    assert time.perf_counter() - started < 2.5
+    assert text == ""
+    assert metrics.time_limit_reached
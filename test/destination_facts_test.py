@@ -0,0 +1,80 @@
+import pytest
+import os
+import sys
+import time
+
+# Add parent dir to path to find destination_facts
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from destination_facts import DAY, FactStore, build, facts_instruction, refresh
+
+# The seed facts were checked on 2025-06-01; a week later all are fresh.
+FRESH = time.mktime((2025, 6, 8, 0, 0, 0, 0, 0, -1))
+YEAR_LATER = FRESH + 365 * DAY
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / "facts.sqlite")
+    assert build(path) > 0
+    return FactStore(path)
+
+
+def test_lookup_finds_city_and_country_facts_in_a_brief(store):
+    result = store.lookup("Plan a 1-week work trip to Tokyo in October.", ["plug_type", "airport_transit"], now=FRESH)
+
+    assert result["destination"] == "Tokyo"
+    assert result["search_for"] == []
+    facts = {fact["topic"]: fact for fact in result["facts"]}
+    assert facts["plug_type"]["place"] == "Japan"
+    assert facts["airport_transit"]["place"] == "Tokyo"
+    assert all(fact["source"].startswith("https://") for fact in result["facts"])
+
+
+def test_missing_and_stale_facts_are_left_to_web_search(store):
+    # Visa rules go stale after 180 days, plug types do not.
+    assert store.lookup("Japan", ["visa_free", "plug_type"], now=YEAR_LATER)["search_for"] == ["visa_free"]
+    # Osaka has no airport facts of its own.
+    assert store.lookup("Osaka", ["airport_transit"], now=FRESH)["search_for"] == ["airport_transit"]
+    unknown = store.lookup("Reykjavik", ["currency"], now=FRESH)
+    assert unknown["destination"] is None and unknown["search_for"] == ["currency"]
+    # Unknown topics fall back to all of them.
+    assert len(store.lookup("Paris", ["nightlife"], now=FRESH)["facts"]) == 7
+
+    stats = store.stats()
+    assert (stats["lookups"], stats["hits"], stats["misses"], stats["stale"]) == (4, 8, 2, 1)
+    assert stats["hit_rate"] == 0.727
+
+
+@pytest.mark.asyncio
+async def test_refresh_stores_searched_facts_with_a_source(store):
+    queries = []
+
+    async def search(query):
+        queries.append(query)
+        if "Osaka" in query:
+            return "Kansai airport: Haruka express. No sources found."
+        return f"Answer for {query} ([Official site](https://example.org/{len(queries)}))"
+
+    due = store.due(now=YEAR_LATER)
+    assert ("Japan", "visa_free") in due and ("Japan", "plug_type") not in due
+    assert ("Osaka", "airport_transit") in due and ("Osaka", "visa_free") not in due
+
+    refreshed = await refresh(store, search, now=YEAR_LATER)
+
+    assert len(queries) == len(due)
+    assert ("Japan", "visa_free") in refreshed and ("Osaka", "airport_transit") not in refreshed
+    result = store.lookup("Kyoto", ["visa_free"], now=YEAR_LATER)
+    assert result["facts"][0]["fact"].startswith("Answer for Japan visa-free entry")
+    assert result["facts"][0]["source"].startswith("https://example.org/")
+
+
+def test_only_specialists_with_stable_topics_get_the_tool():
+    assert "plug_type, voltage" in facts_instruction("PackingAgent")
+    assert facts_instruction("AttractionsAgent") == ""
+
+
+def test_regions_named_after_a_country_are_not_that_country(store):
+    for region in ["South America", "New South Wales", "New England"]:
+        assert store.resolve(f"Backpacking in {region} in March") is None
+    assert store.resolve("Two weeks in Edinburgh, Scotland") == "Edinburgh"
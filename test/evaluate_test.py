@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import subprocess
+
+# Add parent dir to path to find evaluate
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evaluate import key_phrase_recall, regressions
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_evaluate(tmp_path, *args):
+    """Runs evaluate.py --offline in its own process (it swaps the shared model for a stand-in)."""
+    return subprocess.run(
+        [sys.executable, os.path.join(ROOT, "evaluate.py"), "--offline", "--latency", "0", *args],
+        capture_output=True,
+        text=True,
+        cwd=tmp_path,
+        env={**os.environ, "TRIP_PLANNER_CACHE_DIR": str(tmp_path / "cache")},
+    )
+
+
+def test_key_phrase_recall():
+    assert key_phrase_recall("## MASTER PLAN TABLE\n| Day | Plan |", "MASTER PLAN TABLE") == 1.0
+    assert key_phrase_recall("Here is your plan.", "MASTER PLAN TABLE") == 0.333
+    assert key_phrase_recall("Where would you like to go?", "MASTER PLAN TABLE") == 0.0
+
+
+def test_regressions_against_a_baseline():
+    row = {"pass_rate": 1.0, "score": 1.0, "latency_p95": 2.0, "llm_calls": 17, "tokens": 10000}
+    baseline = {"cases": {"london": row}}
+
+    # Within the tolerances, or a new case, is not a regression.
+    same = {"cases": {"london": {**row, "latency_p95": 2.3, "tokens": 10500}, "new": row}}
+    assert regressions(same, baseline) == []
+
+    worse = {"cases": {"london": {**row, "pass_rate": 0.5, "score": 0.333, "latency_p95": 3.0, "llm_calls": 22}}}
+    assert regressions(worse, baseline) == [
+        "london: pass rate 100% -> 50%",
+        "london: score 1.00 -> 0.33",
+        "london: p95 latency 2.00s -> 3.00s",
+        "london: llm_calls 17 -> 22",
+    ]
+
+
+def test_evaluate_scores_evalset_offline_and_fails_on_regressions(tmp_path):
+    report_path = tmp_path / "report.json"
+    result = run_evaluate(tmp_path, "--mode", "fast", "--json", str(report_path))
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    with open(report_path) as f:
+        report = json.load(f)
+    with open(os.path.join(ROOT, "test", "evalset.json")) as f:
+        eval_ids = {case["eval_id"] for case in json.load(f)["eval_cases"]}
+    assert set(report["cases"]) == eval_ids
+    assert report["summary"]["pass_rate"] == 1.0
+    assert report["summary"]["threshold"] == 1.0
+    for row in report["cases"].values():
+        assert row["score"] == 1.0
+        assert row["llm_calls"] > 0 and row["tokens"] > 0
+
+    # A baseline that used fewer calls makes the same run fail.
+    for row in report["cases"].values():
+        row["llm_calls"] //= 2
+    baseline_path = tmp_path / "baseline.json"
+    with open(baseline_path, "w") as f:
+        json.dump(report, f)
+    result = run_evaluate(tmp_path, "--mode", "fast", "--baseline", str(baseline_path))
+    assert result.returncode == 1
+    assert "❌ Regression: london_study_trip: llm_calls" in result.stdout
+
+    # An unreachable threshold fails the run without any baseline.
+    assert run_evaluate(tmp_path, "--mode", "fast", "--threshold", "1.1").returncode == 1
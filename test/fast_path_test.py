@@ -0,0 +1,80 @@
+import pytest
+import os
+import sys
+
+# Add parent dir to path to find fast_path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from fast_path import FastPathCoordinator
+
+
+class EchoModel(BaseLlm):
+    """Stand-in model that records the system instructions it was given."""
+    model: str = "gemini-2.5-flash-lite"
+    reply: str = "ok"
+    instructions: list = []
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.instructions.append(str(llm_request.config.system_instruction))
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=self.reply)]))
+
+
+def build_runner():
+    specialist_model = EchoModel(reply="Visa: not required [MOFA](https://www.mofa.go.jp)", instructions=[])
+    compiler_model = EchoModel(reply="Report with MASTER PLAN TABLE", instructions=[])
+    specialists = [LlmAgent(name=f"Specialist{i}", model=specialist_model, instruction="Research.") for i in range(3)]
+    compiler = LlmAgent(
+        name="InteractiveAgent",
+        model=compiler_model,
+        instruction="Compile.\nFINDINGS:\n{research_findings?}",
+    )
+    coordinator = FastPathCoordinator(name="TripCoordinator", compiler=compiler, specialists=specialists)
+    runner = Runner(agent=coordinator, session_service=InMemorySessionService(), app_name="fast_path_test")
+    return runner, specialist_model, compiler_model
+
+
+@pytest.mark.asyncio
+async def test_specialists_feed_the_compiler_directly():
+    runner, specialist_model, compiler_model = build_runner()
+
+    events = await runner.run_debug("Plan a 1-week work trip to Tokyo in October. Budget $2000.", quiet=True)
+
+    assert len(specialist_model.instructions) == 3
+    assert len(compiler_model.instructions) == 1
+    assert "## Specialist0" in compiler_model.instructions[0]
+    assert "https://www.mofa.go.jp" in compiler_model.instructions[0]
+    assert events[-1].author == "InteractiveAgent"
+    assert events[-1].content.parts[0].text == "Report with MASTER PLAN TABLE"
+
+
+@pytest.mark.asyncio
+async def test_incomplete_brief_is_clarified_without_a_model_call():
+    runner, specialist_model, compiler_model = build_runner()
+
+    events = await runner.run_debug("I want to plan a trip.", session_id="multi", quiet=True)
+    assert specialist_model.instructions == [] and compiler_model.instructions == []
+    assert events[-1].author == "InteractiveAgent"
+    assert "Where would you like to go" in events[-1].content.parts[0].text
+
+    # The brief accumulates across turns. The budget was already asked for,
+    # so the specialists now run without it.
+    await runner.run_debug("Going to Tokyo for work in October.", session_id="multi", quiet=True)
+    assert len(specialist_model.instructions) == 3
+    assert len(compiler_model.instructions) == 1
+
+
+@pytest.mark.asyncio
+async def test_brief_without_destination_goes_straight_to_the_compiler():
+    runner, specialist_model, compiler_model = build_runner()
+
+    await runner.run_debug("I want to plan a trip.", session_id="vague", quiet=True)
+    await runner.run_debug("Somewhere warm, I don't mind.", session_id="vague", quiet=True)
+    assert specialist_model.instructions == []
+    assert len(compiler_model.instructions) == 1
@@ -0,0 +1,89 @@
+import pytest
+import os
+import sys
+import json
+
+# Add parent dir to path to find findings
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools import AgentTool
+from google.genai import types
+
+import research_stage
+from findings import SpecialistFindings, normalize_url, render_findings
+
+VISA = {
+    "sections": [{
+        "title": "Visa",
+        "facts": [{"text": "Visa-free for 90 days.", "url": "https://www.mofa.go.jp/visa/?utm_source=x"}],
+        "costs": [{"item": "Passport renewal", "amount": 130, "currency": "USD", "per": "person"}],
+    }],
+    "links": [{"title": "MOFA", "url": "https://WWW.mofa.go.jp/visa#top"}],
+}
+
+
+class ScriptedModel(BaseLlm):
+    """Stand-in model: calls its first tool once, then replies with fixed text."""
+    model: str = "gemini-2.5-flash-lite"
+    reply: str = "done"
+    requests: list = []
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.requests.append(llm_request)
+        last = llm_request.contents[-1]
+        if llm_request.tools_dict and not any(part.function_response for part in last.parts):
+            name = next(iter(llm_request.tools_dict))
+            call = types.FunctionCall(name=name, args={"request": "Tokyo", "trip_brief": "Tokyo"})
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+            return
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=self.reply)]))
+
+
+def test_links_are_shared_and_deduplicated():
+    assert normalize_url("https://WWW.mofa.go.jp/visa/?utm_source=x#top") == "https://www.mofa.go.jp/visa"
+
+    text = render_findings(
+        {"ResearchAgent": VISA, "PackingAgent": "Bring an adapter [Visa info](https://www.mofa.go.jp/visa)."},
+        {"FinanceAgent": "timed out after 180s"},
+    )
+
+    assert "- Visa-free for 90 days. [1]" in text
+    assert "- $ Passport renewal: 130 USD/person" in text
+    assert "Bring an adapter Visa info [1]." in text
+    assert "_No findings: timed out after 180s_" in text
+    assert text.count("mofa.go.jp") == 1
+    assert text.endswith("[1] MOFA: https://www.mofa.go.jp/visa/?utm_source=x")
+
+
+@pytest.mark.asyncio
+async def test_only_the_interactive_agent_receives_full_findings(monkeypatch):
+    specialist = LlmAgent(
+        name="ResearchAgent",
+        model=ScriptedModel(reply=json.dumps(VISA), requests=[]),
+        instruction="Research.",
+        output_schema=SpecialistFindings,
+    )
+    monkeypatch.setattr(research_stage, "SPECIALISTS", [specialist])
+    planner_model = ScriptedModel(reply="Outline ready.", requests=[])
+    interactive_model = ScriptedModel(reply="Report", requests=[])
+    planner = LlmAgent(name="PlannerAgent", model=planner_model, instruction="Plan.",
+                       tools=[research_stage.dispatch_specialists])
+    interactive = LlmAgent(name="InteractiveAgent", model=interactive_model,
+                           instruction="Compile.\n{research_findings?}", tools=[AgentTool(planner)])
+    runner = Runner(agent=interactive, session_service=InMemorySessionService(), app_name="findings_test")
+
+    await runner.run_debug("Plan a work trip to Tokyo in October.", quiet=True)
+
+    # The planner only sees the digest...
+    digest = planner_model.requests[-1].contents[-1].parts[0].function_response.response
+    assert digest["sections"] == {"ResearchAgent": "2 facts: Visa"}
+    assert "mofa" not in json.dumps(digest)
+    # ...while the compiler's instruction carries the full compact findings.
+    final_instruction = str(interactive_model.requests[-1].config.system_instruction)
+    assert "- Visa-free for 90 days. [1]" in final_instruction
+    assert "[1] MOFA: https://www.mofa.go.jp" in final_instruction
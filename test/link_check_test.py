@@ -0,0 +1,167 @@
+import pytest
+import os
+import sys
+import time
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent dir to path to find link_check
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_store import SqliteCache
+from findings import LinkTable, render_findings
+from link_check import ALIVE, DEAD, UNKNOWN, LinkChecker, annotate_dead_links, extract_links
+
+
+class StandInSite(BaseHTTPRequestHandler):
+    """/ok/* pages exist, /gone/* are 404, /get-only/* reject HEAD, /slow/* hang."""
+
+    in_flight = 0
+    max_in_flight = 0
+    requests = 0
+    lock = threading.Lock()
+
+    def _answer(self):
+        with StandInSite.lock:
+            StandInSite.requests += 1
+            StandInSite.in_flight += 1
+            StandInSite.max_in_flight = max(StandInSite.max_in_flight, StandInSite.in_flight)
+        try:
+            time.sleep(0.05)
+            if self.path.startswith("/slow"):
+                time.sleep(1)
+            if self.path.startswith("/gone"):
+                status = 404
+            elif self.path.startswith("/get-only") and self.command == "HEAD":
+                status = 405
+            else:
+                status = 200
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        finally:
+            with StandInSite.lock:
+                StandInSite.in_flight -= 1
+
+    def do_HEAD(self):
+        self._answer()
+
+    def do_GET(self):
+        self._answer()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInSite)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    StandInSite.requests = StandInSite.max_in_flight = 0
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def closed_port_url():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}/nothing-listens"
+
+
+def make_checker(tmp_path, **kwargs):
+    return LinkChecker(cache=SqliteCache(str(tmp_path / "links.sqlite")), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_report_links_are_checked_concurrently_and_cached(site, tmp_path):
+    checker = make_checker(tmp_path, max_per_host=3)
+    refused = closed_port_url()
+    report = "\n".join(
+        [f"- Hotel {i}: [Booking]({site}/ok/{i})" for i in range(16)]
+        + [f"- Visa: [Embassy]({site}/gone/visa).", f"- Rail: [JR]({site}/get-only/pass)",
+           f"- Old page: {refused}"]
+    )
+
+    started = time.perf_counter()
+    statuses = await checker.check(extract_links(report))
+    elapsed = time.perf_counter() - started
+
+    assert len(statuses) == 19
+    assert statuses[f"{site}/gone/visa"] == DEAD
+    assert statuses[f"{site}/get-only/pass"] == ALIVE
+    # A refused connection may be a blip: not dead, and checked again soon.
+    assert statuses[refused] == UNKNOWN
+    assert checker.cache.get(refused) == UNKNOWN
+    assert sum(status == ALIVE for status in statuses.values()) == 17
+    # 17 requests of 50ms each, three at a time, comfortably under a second.
+    assert StandInSite.max_in_flight <= 3
+    assert elapsed < 1.0
+
+    # The second report costs no requests at all.
+    requests = StandInSite.requests
+    text, dead = await checker.verify_text(report)
+    assert StandInSite.requests == requests
+    assert dead == sorted(url for url, status in statuses.items() if status == DEAD)
+    assert f"[Embassy]({site}/gone/visa) _(link unavailable)_" in text
+    assert "- Visa: Embassy." in annotate_dead_links(report, dead, drop=True)
+    await checker.aclose()
+
+
+@pytest.mark.asyncio
+async def test_slow_sites_and_no_network_are_not_called_dead(site, tmp_path):
+    checker = make_checker(tmp_path, timeout=0.3)
+    statuses = await checker.check([f"{site}/slow/page", f"{site}/ok/page"])
+    assert statuses[f"{site}/slow/page"] == UNKNOWN
+
+    # When nothing connects at all, the network is down rather than every link dead.
+    statuses = await checker.check([closed_port_url(), closed_port_url() + "/2"])
+    assert set(statuses.values()) == {UNKNOWN}
+    await checker.aclose()
+
+
+def test_dead_sources_are_left_out_of_the_findings():
+    results = {"ResearchAgent": {"sections": [{"title": "Visa", "facts": [
+        {"text": "Visa-free for 90 days.", "url": "https://www.mofa.go.jp/visa"},
+        {"text": "Old rule.", "url": "https://example.com/moved"},
+    ]}]}}
+
+    text = render_findings(results, links=LinkTable(skip={"https://EXAMPLE.com/moved/"}))
+
+    assert "- Visa-free for 90 days. [1]" in text
+    assert "- Old rule.\n" in text + "\n"
+    assert "example.com" not in text
+
+
+@pytest.mark.asyncio
+async def test_one_slow_host_does_not_hold_up_the_report(site, tmp_path):
+    checker = make_checker(tmp_path, timeout=5, time_limit=0.4)
+    urls = [f"{site}/slow/page", f"{site}/gone/page", f"{site}/ok/page"]
+
+    started = time.perf_counter()
+    statuses = await checker.check(urls)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.6
+    # Unchecked links are kept, and checked again next time.
+    assert statuses == {urls[0]: UNKNOWN, urls[1]: DEAD, urls[2]: ALIVE}
+    assert checker.cache.get(urls[0]) is None
+    assert await checker.dead_links(urls) == {urls[1]}
+    await checker.aclose()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_hosts_are_retried_within_minutes(site, tmp_path, monkeypatch):
+    import cache_store
+
+    checker = make_checker(tmp_path)
+    refused = closed_port_url()
+    statuses = await checker.check([refused, f"{site}/gone/page"])
+    assert statuses == {refused: UNKNOWN, f"{site}/gone/page": DEAD}
+
+    later = time.time() + 10 * 60
+    monkeypatch.setattr(cache_store.time, "time", lambda: later)
+    assert checker.cache.get(refused) is None
+    assert checker.cache.get(f"{site}/gone/page") == DEAD
+    await checker.aclose()
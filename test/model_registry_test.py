@@ -0,0 +1,38 @@
+import os
+import sys
+import asyncio
+
+# Add parent dir to path to find model_registry
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline-test-key")
+
+import model_registry
+import trip_planner
+from research_stage import specialist_agents
+
+
+def test_all_agents_share_one_model():
+    agents = specialist_agents() + [
+        trip_planner.research_instruction_agent,
+        trip_planner.planner_agent,
+        trip_planner.interactive_agent,
+        trip_planner.interactive_compiler,
+    ]
+
+    models = {id(agent.model) for agent in agents}
+
+    assert models == {id(model_registry.get_model())}
+
+
+def test_client_is_shared_within_a_loop_and_rebound_per_loop():
+    model = model_registry.get_model()
+
+    async def clients():
+        return model.api_client, model.api_client
+
+    first_a, first_b = asyncio.run(clients())
+    second_a, _ = asyncio.run(clients())
+
+    assert first_a is first_b
+    assert second_a is not first_a
@@ -0,0 +1,118 @@
+import pytest
+import os
+import sys
+import csv
+import json
+
+# Add parent dir to path to find plan_table
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from findings import FINDINGS_SOURCES_KEY
+from plan_table import (
+    PLAN_ROWS_STATE_KEY,
+    append_plan_table,
+    record_plan_rows,
+    render_table,
+    resolve_rows,
+    write_csv,
+    write_json,
+)
+
+SOURCES = [{"title": "MOFA", "url": "https://www.mofa.go.jp/visa"}, {"title": "", "url": "https://jal.com"}]
+ROWS = [
+    {"category": "Visa", "recommendation": "No visa needed", "details": "90 days | tourist", "source": "1"},
+    {"category": "Flights", "recommendation": "JAL direct", "details": "14h", "source": "[2]"},
+    {"category": "Budget Est.", "recommendation": "$150/day", "source": "https://example.com/budget"},
+    {"category": "Packing Essentials", "recommendation": "Type A adapter", "source": "9"},
+]
+
+
+class ReportModel(BaseLlm):
+    """Stand-in compiler: writes the report and records the rows in one response."""
+    model: str = "gemini-2.5-flash-lite"
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls += 1
+        call = types.FunctionCall(name="record_plan_rows", args={"rows": ROWS})
+        parts = [types.Part(text="# Tokyo work trip\n\nNarrative."), types.Part(function_call=call)]
+        yield LlmResponse(content=types.Content(role="model", parts=parts))
+
+
+def test_rows_are_resolved_and_serialized(tmp_path):
+    rows = resolve_rows(ROWS, SOURCES)
+
+    assert [row["url"] for row in rows] == [
+        "https://www.mofa.go.jp/visa", "https://jal.com", "https://example.com/budget", ""
+    ]
+    table = render_table(rows).splitlines()
+    assert table[0] == "| Category | Recommendation/Action | Details | Link/Source |"
+    assert table[2] == "| Visa | No visa needed | 90 days \\| tourist | [MOFA](https://www.mofa.go.jp/visa) |"
+    assert table[5].endswith("| - |")
+
+    with open(write_json(rows, tmp_path / "plan.json")) as f:
+        assert json.load(f)["rows"] == rows
+    with open(write_csv(rows, tmp_path / "plan.csv"), newline="") as f:
+        records = list(csv.reader(f))
+    assert records[1][:4] == ["Visa", "No visa needed", "90 days | tourist", "https://www.mofa.go.jp/visa"]
+
+
+@pytest.mark.asyncio
+async def test_table_is_appended_without_another_model_call():
+    model = ReportModel()
+    compiler = LlmAgent(
+        name="InteractiveAgent",
+        model=model,
+        instruction="Compile.",
+        tools=[record_plan_rows],
+        after_agent_callback=append_plan_table,
+    )
+    session_service = InMemorySessionService()
+    runner = Runner(agent=compiler, session_service=session_service, app_name="plan_table_test")
+    await session_service.create_session(
+        app_name="plan_table_test", user_id="user", session_id="s1", state={FINDINGS_SOURCES_KEY: SOURCES}
+    )
+
+    events = await runner.run_debug("Plan Tokyo.", user_id="user", session_id="s1", quiet=True)
+
+    assert model.calls == 1
+    final_text = events[-1].content.parts[0].text
+    assert final_text.startswith("## MASTER PLAN TABLE")
+    assert "[MOFA](https://www.mofa.go.jp/visa)" in final_text
+    session = await session_service.get_session(app_name="plan_table_test", user_id="user", session_id="s1")
+    assert len(session.state[PLAN_ROWS_STATE_KEY]) == 4
+
+
+class RowsOnlyModel(BaseLlm):
+    """Stand-in compiler: records the rows first and writes the report after."""
+    model: str = "gemini-2.5-flash-lite"
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls += 1
+        if llm_request.contents[-1].parts[0].function_response:
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="# Tokyo work trip")]))
+            return
+        call = types.FunctionCall(name="record_plan_rows", args={"rows": ROWS})
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+
+
+@pytest.mark.asyncio
+async def test_report_is_still_written_when_the_rows_come_first():
+    model = RowsOnlyModel()
+    compiler = LlmAgent(name="InteractiveAgent", model=model, instruction="Compile.",
+                        tools=[record_plan_rows], after_agent_callback=append_plan_table)
+    runner = Runner(agent=compiler, session_service=InMemorySessionService(), app_name="plan_table_test")
+
+    events = await runner.run_debug("Plan Tokyo.", session_id="s2", quiet=True)
+
+    assert model.calls == 2
+    texts = [part.text for event in events if event.content for part in event.content.parts if part.text]
+    assert texts[0] == "# Tokyo work trip" and texts[-1].startswith("## MASTER PLAN TABLE")
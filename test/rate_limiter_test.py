@@ -0,0 +1,118 @@
+import pytest
+import os
+import sys
+import asyncio
+import time
+
+# Add parent dir to path to find rate_limiter
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import AdaptiveRateLimiter, backoff_delay
+
+
+@pytest.mark.asyncio
+async def test_requests_per_minute_are_enforced():
+    # 120 requests/min = 2 per second after the initial burst of 120.
+    limiter = AdaptiveRateLimiter(requests_per_minute=120, tokens_per_minute=10**6)
+    limiter.requests.level = 1
+
+    start = time.monotonic()
+    for _ in range(2):
+        async with limiter.slot(10):
+            pass
+    elapsed = time.monotonic() - start
+
+    assert 0.4 <= elapsed < 1.0
+    assert limiter.stats()["max_wait_seconds"] >= 0.4
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped_and_queue_depth_reported():
+    limiter = AdaptiveRateLimiter(requests_per_minute=10**4, tokens_per_minute=10**8, max_concurrency=2)
+    peak = 0
+    depths = []
+
+    async def call():
+        nonlocal peak
+        async with limiter.slot(10):
+            peak = max(peak, limiter.in_flight)
+            depths.append(limiter.stats()["queue_depth"])
+            await asyncio.sleep(0.05)
+
+    await asyncio.gather(*(call() for _ in range(6)))
+
+    assert peak == 2
+    assert max(depths) > 0
+    assert limiter.stats()["calls"] == 6
+
+
+@pytest.mark.asyncio
+async def test_throttling_halves_concurrency_and_successes_restore_it():
+    limiter = AdaptiveRateLimiter(requests_per_minute=10**4, tokens_per_minute=10**8, max_concurrency=8)
+
+    async with limiter.slot(10) as ticket:
+        ticket.throttled = True
+    assert limiter.stats()["concurrency_limit"] == 4
+    assert limiter.stats()["throttled_calls"] == 1
+
+    for _ in range(4):
+        async with limiter.slot(10):
+            pass
+    assert limiter.stats()["concurrency_limit"] == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_calls_do_not_grow_concurrency():
+    limiter = AdaptiveRateLimiter(requests_per_minute=10**4, tokens_per_minute=10**8, max_concurrency=8)
+    limiter.concurrency_limit = 1
+
+    with pytest.raises(RuntimeError):
+        async with limiter.slot(10):
+            raise RuntimeError("server error")
+
+    assert limiter.stats()["concurrency_limit"] == 1
+    assert limiter.in_flight == 0
+
+
+def test_backoff_is_jittered_and_capped():
+    delays = [backoff_delay(10, cap=5) for _ in range(50)]
+
+    assert all(0 <= delay <= 5 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+@pytest.mark.asyncio
+async def test_the_last_throttled_retry_still_shrinks_concurrency(monkeypatch):
+    from google.adk.models.google_llm import Gemini
+    from google.adk.models.llm_request import LlmRequest
+    from google.genai.errors import ClientError
+    import rate_limiter
+
+    limiter = AdaptiveRateLimiter(requests_per_minute=10**4, tokens_per_minute=10**8, max_concurrency=64)
+    monkeypatch.setattr(rate_limiter, "rate_limiter", limiter)
+    monkeypatch.setattr(rate_limiter, "backoff_delay", lambda attempt: 0)
+    attempts = []
+
+    async def always_throttled(self, llm_request, stream=False):
+        attempts.append(1)
+        raise ClientError(429, {"error": {"code": 429, "message": "quota", "status": "RESOURCE_EXHAUSTED"}})
+        yield
+
+    monkeypatch.setattr(Gemini, "generate_content_async", always_throttled)
+    model = rate_limiter.RateLimitedGemini(model="gemini-2.5-flash-lite")
+
+    with pytest.raises(ClientError):
+        async for _ in model.generate_content_async(LlmRequest()):
+            pass
+
+    assert len(attempts) == rate_limiter.MAX_THROTTLE_RETRIES + 1
+    assert limiter.stats()["throttled_calls"] == len(attempts)
+    assert limiter.stats()["concurrency_limit"] == 64 // 2 ** len(attempts)
+
+
+def test_default_limits_follow_the_api_tier():
+    from model_registry import rate_limits
+
+    assert rate_limits(tier="free") == (15, 250_000)
+    assert rate_limits(tier="tier1")[0] > 15
+    assert rate_limits("unknown-model", tier="unknown") == (15, 250_000)
@@ -0,0 +1,175 @@
+import pytest
+import os
+import sys
+
+# Add parent dir to path to find recording
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+from google.adk.apps import App
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from recording import RecorderPlugin, ReplayPlugin, read_log, recorded_user_messages
+
+
+class SearchingModel(BaseLlm):
+    """Searches for the user's message, then answers with the result."""
+    model: str = "gemini-2.5-flash-lite"
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls += 1
+        last = llm_request.contents[-1].parts[0]
+        if last.function_response:
+            text = f"Answer #{self.calls}: {last.function_response.response}"
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+            return
+        call = types.FunctionCall(name="web_search", args={"request": last.text})
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+
+
+class OfflineModel(BaseLlm):
+    """Fails if a replayed run reaches the model."""
+    model: str = "gemini-2.5-flash-lite"
+
+    async def generate_content_async(self, llm_request, stream=False):
+        raise AssertionError("the model was called during replay")
+        yield
+
+
+def build_runner(model, search, plugin):
+    agent = LlmAgent(name="InteractiveAgent", model=model, instruction="Answer.", tools=[search])
+    app = App(name="recording_test", root_agent=agent, plugins=[plugin])
+    return Runner(app=app, session_service=InMemorySessionService(), auto_create_session=True)
+
+
+async def run(runner, messages):
+    texts = []
+    for message in messages:
+        content = types.Content(role="user", parts=[types.Part(text=message)])
+        async for event in runner.run_async(user_id="user", session_id="s1", new_message=content):
+            if event.content and event.content.parts and event.content.parts[0].text:
+                texts.append(event.content.parts[0].text)
+    return texts
+
+
+@pytest.mark.asyncio
+async def test_recorded_run_replays_without_model_or_search(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    searches = []
+
+    async def web_search(request: str) -> str:
+        """Searches the web."""
+        searches.append(request)
+        return f"{request} results"
+
+    recorder = RecorderPlugin(path)
+    recorded = await run(build_runner(SearchingModel(), web_search, recorder), ["Tokyo visa", "Tokyo weather"])
+    await recorder.close()
+
+    records = read_log(path)
+    assert [r["type"] for r in records if r["type"] != "event"] == ["user", "model", "tool", "model"] * 2
+    assert all("seconds" in r for r in records if r["type"] in ("model", "tool"))
+    assert recorded_user_messages(path) == ["Tokyo visa", "Tokyo weather"]
+    assert recorded == ["Answer #2: {'result': 'Tokyo visa results'}", "Answer #4: {'result': 'Tokyo weather results'}"]
+
+    async def offline_search(request: str) -> str:
+        """Searches the web."""
+        raise AssertionError("the search tool was called during replay")
+
+    replay = ReplayPlugin(path)
+    runner = build_runner(OfflineModel(), offline_search, replay)
+    assert await run(runner, recorded_user_messages(path)) == recorded
+    assert replay.stats() == {"exact": 4, "in_order": 0, "tools": 2, "unused_model_responses": 0}
+    assert searches == ["Tokyo visa", "Tokyo weather"]
+
+    # Anything the recording does not cover fails instead of calling the model
+    # (ADK re-raises plugin errors as RuntimeError).
+    with pytest.raises(RuntimeError, match="No recorded model response"):
+        await run(runner, ["Something new"])
+
+
+@pytest.mark.asyncio
+async def test_replay_ignores_what_earlier_runs_cached(tmp_path, monkeypatch):
+    import cache_store
+    import specialist_cache
+    from recording import isolate_replay
+    from cache_store import SqliteCache
+
+    # Restored after the test; isolate_replay changes all three.
+    monkeypatch.setenv("TRIP_PLANNER_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("TRIP_PLANNER_VERIFY_LINKS", "1")
+    monkeypatch.setattr(cache_store, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(specialist_cache, "specialist_cache", SqliteCache(str(tmp_path / "specialists.sqlite")))
+    path = str(tmp_path / "run.jsonl")
+    message = "Work trip to Tokyo"
+
+    async def web_search(request: str) -> str:
+        """Searches the web."""
+        return f"{request} results"
+
+    def build(model):
+        agent = LlmAgent(name="ResearchAgent", model=model, instruction="Research.", tools=[web_search],
+                         before_agent_callback=specialist_cache.check_specialist_cache,
+                         after_agent_callback=specialist_cache.store_specialist_result)
+        plugin = RecorderPlugin(path) if isinstance(model, SearchingModel) else ReplayPlugin(path)
+        return Runner(app=App(name="recording_test", root_agent=agent, plugins=[plugin]),
+                      session_service=InMemorySessionService(), auto_create_session=True), plugin
+
+    runner, recorder = build(SearchingModel())
+    recorded = await run(runner, [message])
+    await recorder.close()
+
+    # A later run on this machine cached a different answer for the same brief.
+    key = specialist_cache.specialist_cache_key("ResearchAgent", message)
+    specialist_cache.specialist_cache.set(key, "A newer cached answer", 60)
+
+    cache_dir = isolate_replay()
+    runner, _ = build(OfflineModel())
+    assert await run(runner, [message]) == recorded
+    assert os.environ["TRIP_PLANNER_VERIFY_LINKS"] == "0"
+    assert specialist_cache.specialist_cache.path.startswith(cache_dir)
+
+
+@pytest.mark.asyncio
+async def test_a_session_recorded_with_warm_caches_replays(tmp_path, monkeypatch):
+    import cache_store
+    import specialist_cache
+    from recording import isolate_caches, isolate_replay
+    from cache_store import SqliteCache
+
+    monkeypatch.setenv("TRIP_PLANNER_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("TRIP_PLANNER_VERIFY_LINKS", "1")
+    monkeypatch.setattr(cache_store, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(specialist_cache, "specialist_cache", SqliteCache(str(tmp_path / "specialists.sqlite")))
+    path = str(tmp_path / "run.jsonl")
+    message = "Work trip to Tokyo"
+    # An earlier run on this machine already answered this brief.
+    key = specialist_cache.specialist_cache_key("ResearchAgent", message)
+    specialist_cache.specialist_cache.set(key, "A cached answer", 60)
+
+    async def web_search(request: str) -> str:
+        """Searches the web."""
+        return f"{request} results"
+
+    def build(model, plugin):
+        agent = LlmAgent(name="ResearchAgent", model=model, instruction="Research.", tools=[web_search],
+                         before_agent_callback=specialist_cache.check_specialist_cache,
+                         after_agent_callback=specialist_cache.store_specialist_result)
+        return Runner(app=App(name="recording_test", root_agent=agent, plugins=[plugin]),
+                      session_service=InMemorySessionService(), auto_create_session=True)
+
+    # As main.py --record does, before the agents load.
+    isolate_caches()
+    model = SearchingModel()
+    recorder = RecorderPlugin(path)
+    recorded = await run(build(model, recorder), [message])
+    await recorder.close()
+    assert model.calls == 2 and "A cached answer" not in recorded
+
+    isolate_replay()
+    assert await run(build(OfflineModel(), ReplayPlugin(path)), [message]) == recorded
@@ -0,0 +1,87 @@
+import pytest
+import os
+import sys
+
+# Add parent dir to path to find replanning
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+
+import specialist_cache
+from stand_ins import StandInModel, build_runner, use_fresh_specialist_cache
+from trip_brief import parse_conversation
+
+NAMES = ["ResearchAgent", "LogisticsAgent", "FinanceAgent", "AttractionsAgent", "PackingAgent"]
+
+
+def test_conversation_brief_follows_the_latest_change():
+    first = parse_conversation(["Plan a 2-week work trip to Tokyo in October. Budget $3000."])
+    changed = parse_conversation([
+        "Plan a 2-week work trip to Tokyo in October. Budget $3000.",
+        "Actually make the budget $2000",
+        "and change the dates to November",
+    ])
+
+    assert (changed.destination, changed.month, changed.budget_amount) == ("Tokyo", "november", 2000.0)
+    assert first.changed_slots(changed) == {"budget", "month"}
+
+
+@pytest.mark.asyncio
+async def test_follow_ups_rerun_only_the_affected_specialists():
+    models = {name: StandInModel(label=name, reply="{label} answer #{calls}") for name in NAMES}
+    specialists = [LlmAgent(name=name, model=models[name], instruction="Research.") for name in NAMES]
+    compiler_model = StandInModel(label="Report", reply="{label} answer #{calls}")
+    compiler = LlmAgent(name="InteractiveAgent", model=compiler_model, instruction="{research_findings?}")
+    runner = build_runner(specialists=specialists, compiler=compiler, app_name="replanning_test")
+
+    def calls():
+        return {name: model.calls for name, model in models.items()}
+
+    await runner.run_debug("Plan a 2-week work trip to Tokyo in October. Budget $3000.", quiet=True)
+    assert calls() == dict.fromkeys(NAMES, 1)
+
+    await runner.run_debug("Actually make the budget $2000", quiet=True)
+    assert calls() == {**dict.fromkeys(NAMES, 1), "LogisticsAgent": 2, "FinanceAgent": 2}
+
+    await runner.run_debug("Change the dates to November", quiet=True)
+    assert calls() == {
+        "ResearchAgent": 1, "LogisticsAgent": 3, "FinanceAgent": 2, "AttractionsAgent": 2, "PackingAgent": 2,
+    }
+
+    # The report is recompiled from fresh and reused findings together.
+    findings = compiler_model.instructions[-1]
+    assert "ResearchAgent answer #1" in findings
+    assert "FinanceAgent answer #2" in findings
+    assert "LogisticsAgent answer #3" in findings
+
+    # A question that changes nothing re-runs no specialist.
+    await runner.run_debug("Any tips on etiquette?", quiet=True)
+    assert sum(calls().values()) == 10
+    assert compiler_model.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_a_change_within_the_cache_bucket_still_refreshes_the_answer(tmp_path, monkeypatch):
+    use_fresh_specialist_cache(tmp_path, monkeypatch)
+    models = {name: StandInModel(label=name, reply="{label} answer #{calls}") for name in NAMES}
+    specialists = [
+        LlmAgent(name=name, model=models[name], instruction="Research.",
+                 before_agent_callback=specialist_cache.check_specialist_cache,
+                 after_agent_callback=specialist_cache.store_specialist_result)
+        for name in NAMES
+    ]
+    compiler_model = StandInModel(label="Report")
+    compiler = LlmAgent(name="InteractiveAgent", model=compiler_model, instruction="{research_findings?}")
+    runner = build_runner(specialists=specialists, compiler=compiler, app_name="replanning_test")
+
+    await runner.run_debug("Plan a 2-week work trip to Tokyo in October. Budget $2000.", quiet=True)
+    # $2000 and $2500 share a budget bucket in the specialist cache.
+    await runner.run_debug("Actually make the budget $2500", quiet=True)
+
+    assert models["FinanceAgent"].calls == 2 and models["ResearchAgent"].calls == 1
+    assert "FinanceAgent answer #2" in compiler_model.instructions[-1]
+
+    # A new conversation with the same brief is answered from the refreshed entry.
+    await runner.run_debug("Plan a 2-week work trip to Tokyo in October. Budget $2500.", session_id="other",
+                           quiet=True)
+    assert models["FinanceAgent"].calls == 2
@@ -0,0 +1,90 @@
+import pytest
+import os
+import sys
+import time
+
+# Add parent dir to path to find research_stage
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.tools import ToolContext
+from google.genai import types
+
+import research_stage
+from stand_ins import StandInModel, build_runner
+
+
+class CallFirstTool(BaseLlm):
+    """Stand-in model that calls its first tool once, then answers."""
+    model: str = "gemini-2.5-flash-lite"
+
+    async def generate_content_async(self, llm_request, stream=False):
+        last = llm_request.contents[-1]
+        if not any(part.function_response for part in last.parts):
+            name = next(iter(llm_request.tools_dict))
+            call = types.FunctionCall(name=name, args={"trip_brief": "Tokyo, October, work"})
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+        else:
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="done")]))
+
+
+def make_specialist(name, delay):
+    model = StandInModel(reply="findings after {delay}s", delay=delay)
+    return LlmAgent(name=name, model=model, instruction="Research.")
+
+
+async def run_stage(agents, **kwargs):
+    """Runs the research stage from inside a tool call and returns its findings."""
+    captured = {}
+
+    async def research(trip_brief: str, tool_context: ToolContext) -> dict:
+        """Runs the research stage."""
+        captured["findings"] = await research_stage.run_specialists(
+            trip_brief, tool_context, agents=agents, **kwargs
+        )
+        return captured["findings"].to_dict()
+
+    coordinator = LlmAgent(name="Coordinator", model=CallFirstTool(), instruction="Plan.", tools=[research])
+    runner = build_runner(coordinator, app_name="research_stage_test")
+    await runner.run_debug("Plan a work trip to Tokyo in October.", quiet=True)
+    return captured["findings"]
+
+
+@pytest.mark.asyncio
+async def test_specialists_run_concurrently():
+    agents = [make_specialist(f"Specialist{i}", 0.3) for i in range(5)]
+
+    start = time.perf_counter()
+    findings = await run_stage(agents)
+    elapsed = time.perf_counter() - start
+
+    assert sorted(findings.results) == sorted(agent.name for agent in agents)
+    assert findings.missing == []
+    # Serial execution would take at least 1.5s.
+    assert elapsed < 1.0
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_is_respected():
+    agents = [make_specialist(f"Specialist{i}", 0.2) for i in range(4)]
+
+    start = time.perf_counter()
+    findings = await run_stage(agents, max_concurrency=2)
+    elapsed = time.perf_counter() - start
+
+    assert len(findings.results) == 4
+    assert elapsed >= 0.4
+
+
+@pytest.mark.asyncio
+async def test_slow_specialist_times_out_without_blocking_others():
+    agents = [make_specialist("FastAgent", 0.05), make_specialist("StuckAgent", 5)]
+
+    findings = await run_stage(agents, timeout=0.5)
+
+    assert "FastAgent" in findings.results
+    assert findings.missing == ["StuckAgent"]
+    assert "timed out" in findings.errors["StuckAgent"]
+    assert "StuckAgent" in findings.to_markdown()
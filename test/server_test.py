@@ -0,0 +1,125 @@
+import pytest
+import os
+import sys
+import time
+import signal
+import socket
+import asyncio
+import subprocess
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from load_test import run_load, run_user
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(tmp_path, *args):
+    """Runs server.py offline in its own process (it swaps the shared model for a stand-in)."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "server.py"), "--offline", "--in-memory",
+         "--mode", "fast", "--port", str(port), *args],
+        cwd=tmp_path,
+        env={**os.environ, "TRIP_PLANNER_CACHE_DIR": str(tmp_path / "cache")},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            httpx.get(f"{url}/health").raise_for_status()
+            return process, url
+        except httpx.HTTPError:
+            assert process.poll() is None, process.stdout.read()
+            time.sleep(0.2)
+    process.kill()
+    raise AssertionError("server did not start")
+
+
+@pytest.mark.asyncio
+async def test_many_users_share_one_service_with_backpressure(tmp_path):
+    process, url = start_server(tmp_path, "--max-plans", "4", "--max-queued", "8")
+    try:
+        # More users than slots plus queue: the overflow is refused, not queued.
+        summary, results = await run_load(url, users=30)
+        assert summary["ok"] + summary["rejected"] == 30
+        assert summary["ok"] >= 12 and summary["rejected"] >= 1
+        assert all(result["plan_rows"] > 0 and result["chars"] > 0
+                   for result in results if result["status"] == "ok")
+
+        # Within the limits everyone is answered.
+        summary, _ = await run_load(url, users=12)
+        assert summary["ok"] == 12
+
+        health = httpx.get(f"{url}/health").json()
+        assert health["active_plans"] == 0 and health["queued_plans"] == 0
+        assert health["completed"] >= 24 and health["rejected"] >= 1
+    finally:
+        process.kill()
+        process.wait()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_lets_running_plans_finish(tmp_path):
+    process, url = start_server(tmp_path)
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        turn = asyncio.create_task(run_user(client, "late-user", "Plan a week's holiday in Lisbon in May, $1500."))
+        while httpx.get(f"{url}/health").json()["active_plans"] == 0 and not turn.done():
+            await asyncio.sleep(0.01)
+        process.send_signal(signal.SIGINT)
+        result = await turn
+
+    assert result["status"] == "ok"
+    assert process.wait(timeout=30) == 0
+
+
+@pytest.mark.asyncio
+async def test_done_carries_only_the_rows_recorded_in_that_turn(monkeypatch):
+    import json
+    from google.adk.agents import LlmAgent
+    from google.adk.models.base_llm import BaseLlm
+    from google.adk.models.llm_response import LlmResponse
+    from google.genai import types
+    from plan_table import append_plan_table, record_plan_rows
+    from server import PlanService
+    from stand_ins import build_runner
+
+    monkeypatch.setenv("TRIP_PLANNER_VERIFY_LINKS", "0")
+
+    class PlanningModel(BaseLlm):
+        """Records plan rows when asked for a plan, otherwise asks a question."""
+        model: str = "gemini-2.5-flash-lite"
+
+        async def generate_content_async(self, llm_request, stream=False):
+            last = llm_request.contents[-1].parts[0]
+            if last.function_response:
+                parts = [types.Part(text="Done.")]
+            elif "plan" in (last.text or ""):
+                call = types.FunctionCall(name="record_plan_rows",
+                                          args={"rows": [{"category": "Visa", "recommendation": "None needed"}]})
+                parts = [types.Part(text="# Plan"), types.Part(function_call=call)]
+            else:
+                parts = [types.Part(text="Which month are you travelling?")]
+            yield LlmResponse(content=types.Content(role="model", parts=parts))
+
+    agent = LlmAgent(name="InteractiveAgent", model=PlanningModel(), instruction="Plan trips.",
+                     tools=[record_plan_rows], after_agent_callback=append_plan_table)
+    service = PlanService(build_runner(agent, app_name="server_test"))
+
+    async def done_rows(text):
+        service.admit("user", "s1")
+        events = [event async for event in service.stream("user", "s1", text)]
+        return json.loads(events[-1].split("data: ", 1)[1])["plan_rows"]
+
+    assert len(await done_rows("plan Tokyo")) == 1
+    assert await done_rows("Any tips?") == []
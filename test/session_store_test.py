@@ -0,0 +1,110 @@
+import pytest
+import os
+import sys
+
+# Add parent dir to path to find session_store
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+from google.adk.apps import App
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.genai import types
+
+from plan_table import PLAN_TABLE_HEADING, append_plan_table, record_plan_rows
+from session_store import LOG_HEADER, PLAN_HEADER, CompactingSessionService, compaction_config
+
+APP = "session_store_test"
+ROWS = [{"category": "Visa", "recommendation": "No visa needed"}]
+
+
+class PlannerModel(BaseLlm):
+    """Writes a numbered plan when asked for one, otherwise a short reply."""
+    model: str = "gemini-2.5-flash-lite"
+    plans: int = 0
+    requests: list = []
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.requests.append(llm_request)
+        last = llm_request.contents[-1].parts[0]
+        if last.function_response:
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="Done.")]))
+            return
+        if "plan" in (last.text or ""):
+            self.plans += 1
+            call = types.FunctionCall(name="record_plan_rows", args={"rows": ROWS})
+            parts = [types.Part(text=f"# Plan version {self.plans}"), types.Part(function_call=call)]
+        else:
+            parts = [types.Part(text="Which month are you travelling?")]
+        yield LlmResponse(content=types.Content(role="model", parts=parts))
+
+
+def make_runner(model, db_path):
+    agent = LlmAgent(
+        name="InteractiveAgent",
+        model=model,
+        instruction="Plan trips.",
+        tools=[record_plan_rows],
+        after_agent_callback=append_plan_table,
+    )
+    app = App(name=APP, root_agent=agent, events_compaction_config=compaction_config(interval=2))
+    return Runner(app=app, session_service=CompactingSessionService(db_path), auto_create_session=True)
+
+
+async def run_turn(runner, text):
+    message = types.Content(role="user", parts=[types.Part(text=text)])
+    async for _ in runner.run_async(user_id="user", session_id="s1", new_message=message):
+        pass
+
+
+def summaries(session):
+    return [e for e in session.events if e.actions and e.actions.compaction]
+
+
+@pytest.mark.asyncio
+async def test_old_turns_are_compacted_and_survive_a_restart(tmp_path):
+    db_path = str(tmp_path / "sessions.sqlite")
+    model = PlannerModel()
+    runner = make_runner(model, db_path)
+    for text in ["Tokyo trip", "plan it for October", "Hello again", "plan it for November", "Anything else?"]:
+        await run_turn(runner, text)
+
+    # A fresh service (as after a restart) only finds one summary and the latest turns.
+    restarted = make_runner(model, db_path)
+    session = await restarted.session_service.get_session(app_name=APP, user_id="user", session_id="s1")
+    assert len(summaries(session)) == 1
+    assert len(session.events) < 10
+
+    summary = "\n".join(part.text for part in summaries(session)[0].actions.compaction.compacted_content.parts)
+    assert LOG_HEADER in summary and "User: Tokyo trip" in summary
+    assert PLAN_HEADER in summary
+    # Only the latest plan is kept in full, together with its table.
+    assert "# Plan version 2" in summary and "# Plan version 1" not in summary
+    assert PLAN_TABLE_HEADING in summary
+
+    # The next turn sees the summary instead of the raw history.
+    model.requests.clear()
+    await run_turn(restarted, "Thanks")
+    sent = "\n".join(
+        part.text or "" for content in model.requests[0].contents for part in content.parts or []
+    )
+    assert LOG_HEADER in sent and "# Plan version 2" in sent
+    assert "# Plan version 1" not in sent
+
+
+@pytest.mark.asyncio
+async def test_compaction_deletes_from_the_database_a_url_names(tmp_path):
+    db_path = str(tmp_path / "sessions.sqlite")
+    # sqlite:////absolute/path, as SqliteSessionService reads it.
+    runner = make_runner(PlannerModel(), f"sqlite:///{db_path}")
+    for text in ["Tokyo trip", "plan it for October", "Hello again", "plan it for November", "Anything else?"]:
+        await run_turn(runner, text)
+
+    session = await CompactingSessionService(db_path).get_session(app_name=APP, user_id="user", session_id="s1")
+    assert len(summaries(session)) == 1
+    assert len(session.events) < 10
+    assert not os.path.exists("sqlite:")
+
+    with pytest.raises(ValueError, match="needs a database file"):
+        CompactingSessionService(":memory:")
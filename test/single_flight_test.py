@@ -0,0 +1,93 @@
+import pytest
+import os
+import sys
+import asyncio
+
+# Add parent dir to path to find single_flight
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+
+from single_flight import SingleFlight
+from stand_ins import StandInModel, build_runner
+import research_stage
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_in_flight_share_one_call():
+    group = SingleFlight("test_share")
+    made = []
+
+    async def call(key):
+        made.append(key)
+        await asyncio.sleep(0.05)
+        return f"answer for {key}"
+
+    answers = await asyncio.gather(
+        *(group.do("tokyo", lambda: call("tokyo")) for _ in range(10)),
+        group.do("paris", lambda: call("paris")),
+        group.do(None, lambda: call("no key")),
+    )
+
+    assert answers[:10] == ["answer for tokyo"] * 10
+    assert sorted(made) == ["no key", "paris", "tokyo"]
+    assert group.stats() == {"calls": 3, "merged": 9, "in_flight": 0, "merge_rate": 0.75}
+
+    # Once finished, the next call with the same key is made again.
+    await group.do("tokyo", lambda: call("tokyo"))
+    assert made.count("tokyo") == 2
+
+
+@pytest.mark.asyncio
+async def test_failures_reach_every_caller_and_cancelling_one_caller_spares_the_rest():
+    group = SingleFlight("test_cancel")
+
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("quota exceeded")
+
+    results = await asyncio.gather(group.do("k", fail), group.do("k", fail), return_exceptions=True)
+    assert [str(result) for result in results] == ["quota exceeded", "quota exceeded"]
+
+    started = asyncio.Event()
+    finished = []
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(0.2)
+        finished.append(True)
+        return "done"
+
+    first = asyncio.create_task(group.do("slow", slow))
+    second = asyncio.create_task(group.do("slow", slow))
+    await started.wait()
+    first.cancel()
+    assert await second == "done"
+    assert finished == [True]
+
+    # The shared call is cancelled once nobody waits for it.
+    lone = asyncio.create_task(group.do("abandoned", slow))
+    await asyncio.sleep(0.05)
+    lone.cancel()
+    await asyncio.sleep(0.3)
+    assert finished == [True]
+    assert group.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_sessions_with_the_same_brief_share_specialist_runs():
+    model = StandInModel(reply="Findings.", delay=0.2)
+    specialists = [LlmAgent(name=f"Specialist{i}", model=model, instruction="Research.") for i in range(3)]
+    compiler = LlmAgent(name="InteractiveAgent", model=StandInModel(delay=0.2), instruction="Compile.")
+    runner = build_runner(specialists=specialists, compiler=compiler, app_name="single_flight_test")
+    merged_before = research_stage.specialist_flights.merged
+
+    await asyncio.gather(*(
+        runner.run_debug("Plan a 1-week work trip to Tokyo in October. Budget $2000.",
+                         user_id=f"user{i}", session_id=f"s{i}", quiet=True)
+        for i in range(4)
+    ))
+
+    # Four users, three specialists: one run each.
+    assert model.calls == 3
+    assert research_stage.specialist_flights.merged - merged_before == 9
@@ -0,0 +1,108 @@
+import pytest
+import os
+import sys
+import time
+import asyncio
+
+# Add parent dir to path to find speculation
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+
+import specialist_cache
+from speculation import speculator
+from stand_ins import StandInModel, build_runner, last_user_text, use_fresh_specialist_cache
+
+@pytest.fixture(autouse=True)
+def interactive(monkeypatch):
+    # As in main.py: only the interactive CLI speculates.
+    monkeypatch.setenv("TRIP_PLANNER_SPECULATE", "1")
+
+
+NAMES = ["ResearchAgent", "LogisticsAgent", "FinanceAgent", "AttractionsAgent", "PackingAgent"]
+
+
+def name_the_city(model, llm_request):
+    city = "Osaka" if "Osaka" in last_user_text(llm_request) else "Tokyo"
+    return f"{model.label} on {city}"
+
+
+def build_speculating_runner(tmp_path, monkeypatch):
+    use_fresh_specialist_cache(tmp_path, monkeypatch)
+    # Visa and safety research is the slowest specialist.
+    models = {name: StandInModel(label=name, reply=name_the_city, delay=0.8 if name == "ResearchAgent" else 0.3)
+              for name in NAMES}
+    specialists = [
+        LlmAgent(name=name, model=models[name], instruction="Research.",
+                 before_agent_callback=specialist_cache.check_specialist_cache,
+                 after_agent_callback=specialist_cache.store_specialist_result)
+        for name in NAMES
+    ]
+    compiler_model = StandInModel(label="Report", reply=name_the_city)
+    compiler = LlmAgent(name="InteractiveAgent", model=compiler_model, instruction="{research_findings?}")
+    runner = build_runner(specialists=specialists, compiler=compiler, app_name="speculation_test")
+    return runner, models, compiler_model
+
+
+@pytest.mark.asyncio
+async def test_budget_independent_specialists_run_while_the_user_answers(tmp_path, monkeypatch):
+    runner, models, compiler_model = build_speculating_runner(tmp_path, monkeypatch)
+
+    await runner.run_debug("Plan a 1-week work trip to Tokyo in October.", session_id="s", quiet=True)
+    # Research, Attractions and Packing do not depend on the budget.
+    await asyncio.sleep(1.0)
+    assert {name: model.calls for name, model in models.items()} == {
+        "ResearchAgent": 1, "LogisticsAgent": 0, "FinanceAgent": 0, "AttractionsAgent": 1, "PackingAgent": 1,
+    }
+
+    started = time.perf_counter()
+    await runner.run_debug("My budget is $2000.", session_id="s", quiet=True)
+    elapsed = time.perf_counter() - started
+
+    # Only the budget-dependent specialists ran on the planning turn.
+    assert all(model.calls == 1 for model in models.values())
+    assert "AttractionsAgent on Tokyo" in compiler_model.instructions[-1]
+    # Without the head start the turn would wait for ResearchAgent's 0.8s.
+    assert elapsed < 0.7
+
+
+@pytest.mark.asyncio
+async def test_a_quick_answer_joins_the_runs_in_flight(tmp_path, monkeypatch):
+    runner, models, compiler_model = build_speculating_runner(tmp_path, monkeypatch)
+
+    await runner.run_debug("Plan a 1-week work trip to Tokyo in October.", session_id="s", quiet=True)
+    await runner.run_debug("My budget is $2000.", session_id="s", quiet=True)
+
+    assert all(model.calls == 1 for model in models.values())
+    assert "ResearchAgent on Tokyo" in compiler_model.instructions[-1]
+
+
+@pytest.mark.asyncio
+async def test_guesses_are_cancelled_when_the_destination_changes(tmp_path, monkeypatch):
+    runner, models, compiler_model = build_speculating_runner(tmp_path, monkeypatch)
+    cancelled = speculator.stats()["cancelled"]
+
+    await runner.run_debug("Plan a 1-week work trip to Tokyo in October.", session_id="s", quiet=True)
+    await runner.run_debug("Actually, go to Osaka instead. Budget $2000.", session_id="s", quiet=True)
+
+    assert speculator.stats()["cancelled"] - cancelled == 3
+    findings = compiler_model.instructions[-1]
+    assert "ResearchAgent on Osaka" in findings and "Tokyo" not in findings
+
+
+@pytest.mark.asyncio
+async def test_failed_guesses_are_reported_and_finished_sessions_forgotten(tmp_path, monkeypatch, capsys):
+    use_fresh_specialist_cache(tmp_path, monkeypatch)
+    # The API key is rejected.
+    failing = StandInModel(error=PermissionError("API key not valid"))
+    specialists = [LlmAgent(name="PackingAgent", model=failing, instruction="Research.")]
+    compiler = LlmAgent(name="InteractiveAgent", model=StandInModel(), instruction="Compile.")
+    runner = build_runner(specialists=specialists, compiler=compiler, app_name="speculation_test")
+    failed = speculator.stats()["failed"]
+
+    await runner.run_debug("Plan a 1-week work trip to Tokyo in October.", session_id="failing", quiet=True)
+    await asyncio.sleep(0.2)
+
+    assert speculator.stats()["failed"] - failed == 1
+    assert "Warning: speculative PackingAgent run failed: PermissionError: API key not valid" in capsys.readouterr().out
+    assert speculator.stats()["sessions"] == 0
@@ -0,0 +1,72 @@
+import os
+import sys
+import asyncio
+from typing import Any
+
+from pydantic import Field
+
+# Add parent dir to path to find fast_path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+import specialist_cache
+from cache_store import SqliteCache
+from fast_path import FastPathCoordinator
+
+# ==========================================
+# STAND-INS SHARED BY THE TESTS
+# ==========================================
+# One configurable stand-in model instead of a SlowModel or CountingModel in
+# every test file. Each instance keeps its own call count and instructions,
+# and every test builds its own, so nothing carries over between tests.
+
+
+class StandInModel(BaseLlm):
+    """Stand-in model: answers `reply` after `delay` seconds and records every call.
+
+    `reply` may use {label}, {calls} and {delay}, or be a function of
+    (model, llm_request) returning the text. With `error` set, every call
+    raises it instead.
+    """
+    model: str = "gemini-2.5-flash-lite"
+    label: str = ""
+    reply: Any = "ok"
+    delay: float = 0.0
+    error: Any = None
+    calls: int = 0
+    instructions: list = Field(default_factory=list)
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls += 1
+        self.instructions.append(str(llm_request.config.system_instruction))
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        if callable(self.reply):
+            text = self.reply(self, llm_request)
+        else:
+            text = self.reply.format(label=self.label, calls=self.calls, delay=self.delay)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def last_user_text(llm_request):
+    parts = llm_request.contents[-1].parts if llm_request.contents else []
+    return parts[0].text or "" if parts else ""
+
+
+def build_runner(agent=None, specialists=None, compiler=None, app_name="stand_in_test"):
+    """Runner for `agent`, or for a fast-path coordinator over `specialists` and `compiler`."""
+    if agent is None:
+        agent = FastPathCoordinator(name="TripCoordinator", compiler=compiler, specialists=specialists)
+    return Runner(agent=agent, session_service=InMemorySessionService(), app_name=app_name,
+                  auto_create_session=True)
+
+
+def use_fresh_specialist_cache(tmp_path, monkeypatch):
+    """Points the specialist cache at an empty file for this test only."""
+    monkeypatch.setattr(specialist_cache, "specialist_cache", SqliteCache(str(tmp_path / "specialists.sqlite")))
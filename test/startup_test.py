@@ -0,0 +1,57 @@
+import os
+import sys
+
+# Add parent dir to path to find startup_benchmark
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agent_registry
+from startup_benchmark import measure, over_budget
+
+
+def test_cold_start_stays_within_budget():
+    report = measure(repeat=1)
+
+    # Importing the graph module defers google.adk, and "quit" never loads it.
+    assert report["adk_imported_by_trip_planner"] is False
+    assert over_budget(report) == []
+
+
+def test_agents_are_built_once_on_first_use():
+    built = []
+
+    @agent_registry.agent_factory("startup_test_agent")
+    def build():
+        built.append(object())
+        return built[-1]
+
+    assert "startup_test_agent" not in agent_registry.built_agents()
+    first = agent_registry.get_agent("startup_test_agent")
+    assert agent_registry.get_agent("startup_test_agent") is first
+    assert len(built) == 1
+
+
+def test_ctrl_c_at_the_prompt_does_not_wait_for_enter(monkeypatch):
+    import asyncio
+    import builtins
+    import threading
+    import time
+    import main
+
+    enter = threading.Event()
+    monkeypatch.setattr(builtins, "input", lambda prompt="": enter.wait(5) and "")
+    # Releases the prompt anyway if shutdown does wait for it.
+    threading.Timer(3, enter.set).start()
+
+    async def cancelled_at_prompt():
+        prompt = asyncio.create_task(main.read_input("👤 You: "))
+        await asyncio.sleep(0.05)
+        prompt.cancel()
+        try:
+            await prompt
+        except asyncio.CancelledError:
+            pass
+
+    started = time.perf_counter()
+    asyncio.run(cancelled_at_prompt())
+    assert time.perf_counter() - started < 1
+    enter.set()
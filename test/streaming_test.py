@@ -0,0 +1,61 @@
+import pytest
+import os
+import sys
+import asyncio
+
+# Add parent dir to path to find streaming
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+from google.adk.apps import App
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools import AgentTool
+from google.genai import types
+
+from streaming import AgentActivityPlugin, stream_turn
+
+
+class StreamingModel(BaseLlm):
+    """Stand-in model: optionally calls its first tool, then streams its reply in chunks."""
+    model: str = "gemini-2.5-flash-lite"
+    chunks: list = ["Your ", "Tokyo ", "plan."]
+    delay: float = 0.05
+
+    async def generate_content_async(self, llm_request, stream=False):
+        last = llm_request.contents[-1]
+        if llm_request.tools_dict and not any(part.function_response for part in last.parts):
+            call = types.FunctionCall(name=next(iter(llm_request.tools_dict)), args={"request": "Tokyo"})
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(function_call=call)]))
+            return
+        if stream:
+            for chunk in self.chunks:
+                await asyncio.sleep(self.delay)
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=chunk)]), partial=True)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="".join(self.chunks))]))
+
+
+@pytest.mark.asyncio
+async def test_stream_turn_emits_chunks_and_reports_latency():
+    specialist = LlmAgent(name="ResearchAgent", model=StreamingModel(chunks=["visa info"]), instruction="Research.")
+    root = LlmAgent(name="InteractiveAgent", model=StreamingModel(), instruction="Plan.", tools=[AgentTool(specialist)])
+    activity = []
+    plugin = AgentActivityPlugin(on_change=lambda kind, name, running: activity.append((kind, name)))
+    runner = Runner(
+        app=App(name="streaming_test", root_agent=root, plugins=[plugin]),
+        session_service=InMemorySessionService(),
+        auto_create_session=True,
+    )
+
+    chunks = []
+    text, metrics = await stream_turn(runner, "user", "session", "Plan Tokyo", on_text=chunks.append)
+
+    assert chunks[:3] == ["Your ", "Tokyo ", "plan."]
+    assert "".join(chunks) == "Your Tokyo plan."
+    assert text.strip() == "Your Tokyo plan."
+    assert 0 < metrics.time_to_first_token < metrics.total
+    # The nested specialist is visible through the inherited plugin.
+    assert ("start", "ResearchAgent") in activity
+    assert activity[-1] == ("end", "InteractiveAgent")
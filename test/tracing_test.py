@@ -0,0 +1,78 @@
+import pytest
+import os
+import sys
+import json
+import asyncio
+
+# Add parent dir to path to find tracing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+from google.adk.apps import App
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools import AgentTool
+from google.genai import types
+
+from tracing import TracingPlugin, annotate_current_span, summarize_trace, format_summary
+
+
+class ToolCallingModel(BaseLlm):
+    """Stand-in model: calls every offered tool at once, then answers."""
+    model: str = "gemini-2.5-flash-lite"
+    retries: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        for _ in range(self.retries):
+            annotate_current_span("retry_count")
+        await asyncio.sleep(0.01)
+        usage = types.GenerateContentResponseUsageMetadata(prompt_token_count=50, candidates_token_count=5)
+        last = llm_request.contents[-1]
+        if llm_request.tools_dict and not any(part.function_response for part in last.parts):
+            calls = [types.Part(function_call=types.FunctionCall(name=name, args={"request": "Tokyo"}))
+                     for name in llm_request.tools_dict]
+            yield LlmResponse(content=types.Content(role="model", parts=calls), usage_metadata=usage)
+            return
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text="done")]), usage_metadata=usage)
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_per_agent_and_export(tmp_path):
+    research = LlmAgent(name="ResearchAgent", model=ToolCallingModel(retries=2), instruction="Research.")
+    finance = LlmAgent(name="FinanceAgent", model=ToolCallingModel(), instruction="Budget.")
+    root = LlmAgent(name="InteractiveAgent", model=ToolCallingModel(), instruction="Plan.",
+                    tools=[AgentTool(research), AgentTool(finance)])
+    tracer = TracingPlugin()
+    runner = Runner(
+        app=App(name="tracing_test", root_agent=root, plugins=[tracer]),
+        session_service=InMemorySessionService(),
+        auto_create_session=True,
+    )
+
+    await runner.run_debug("Plan Tokyo", user_id="user", session_id="s1", quiet=True)
+
+    assert len(tracer.traces) == 1
+    trace = tracer.traces[0]
+    rows = {row["agent"]: row for row in summarize_trace(trace)}
+    assert rows["InteractiveAgent"]["model_calls"] == 2
+    assert rows["InteractiveAgent"]["tool_calls"] == 2
+    assert rows["InteractiveAgent"]["input_tokens"] == 100
+    assert rows["ResearchAgent"]["retries"] == 2
+    assert rows["FinanceAgent"]["runs"] == 1
+
+    # Each specialist hangs off the tool call that ran it, inside the root agent.
+    spans = list(trace.walk())
+    research_span = next(span for span in spans if span.kind == "agent" and span.name == "ResearchAgent")
+    assert research_span.parent.name == "tool ResearchAgent"
+    assert research_span.parent.parent.name == "InteractiveAgent"
+    assert all(span.duration is not None for span in spans)
+
+    path = tracer.export(str(tmp_path / "trace.json"))
+    with open(path) as f:
+        exported = json.load(f)["spans"]
+    ids = {span["span_id"] for span in exported}
+    assert len(exported) == len(spans)
+    assert all(span["parent_span_id"] in ids for span in exported[1:])
+    assert "ResearchAgent" in format_summary(trace)
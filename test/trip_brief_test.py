@@ -0,0 +1,108 @@
+import pytest
+import os
+import sys
+
+# Add parent dir to path to find trip_brief
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.agents import LlmAgent
+
+import specialist_cache
+from stand_ins import StandInModel, build_runner, use_fresh_specialist_cache
+from trip_brief import parse_brief
+
+
+@pytest.mark.parametrize("text, expected", [
+    (
+        "Plan a 2-week work trip to Tokyo, Japan in October. Budget is $3000 USD (excluding flights).",
+        {"destination": "Tokyo, Japan", "month": "october", "duration_days": 14,
+         "budget_amount": 3000.0, "budget_currency": "USD", "purpose": "Work"},
+    ),
+    (
+        "Plan a 1-month study trip to London, UK starting in September. I'll be attending UCL. "
+        "Budget is £2500 for living expenses.",
+        {"destination": "London, UK", "month": "september", "duration_days": 30,
+         "budget_amount": 2500.0, "budget_currency": "GBP", "purpose": "Study"},
+    ),
+    (
+        "Plan a 10-day vacation to Bali, Indonesia. Budget is $1500 USD total.",
+        {"destination": "Bali, Indonesia", "month": None, "duration_days": 10,
+         "budget_amount": 1500.0, "budget_currency": "USD", "purpose": "Travel"},
+    ),
+    (
+        "Trip to New York City in May for 5 days, budget 2k EUR",
+        {"destination": "New York City", "month": "may", "duration_days": 5,
+         "budget_amount": 2000.0, "budget_currency": "EUR", "purpose": None},
+    ),
+    (
+        "going to tokyo in october for a week, around 2000 dollars, travelling with friends",
+        {"destination": "Tokyo", "month": "october", "duration_days": 7,
+         "budget_amount": 2000.0, "budget_currency": "USD", "purpose": "Travel"},
+    ),
+    (
+        "trip to new york for a work conference, 3k euros",
+        {"destination": "New York", "month": None, "duration_days": None,
+         "budget_amount": 3000.0, "budget_currency": "EUR", "purpose": "Work"},
+    ),
+    (
+        "I'm studying in london next semester with 5,000 pounds",
+        {"destination": "London", "month": None, "duration_days": None,
+         "budget_amount": 5000.0, "budget_currency": "GBP", "purpose": "Study"},
+    ),
+    (
+        "we're going to visit bali on our vacations",
+        {"destination": "Bali", "month": None, "duration_days": None,
+         "budget_amount": None, "budget_currency": None, "purpose": "Travel"},
+    ),
+    (
+        # Not places, sizes or budgets.
+        "I want to go somewhere warm and pack a 3kg bag for 2 weeks",
+        {"destination": None, "month": None, "duration_days": 14,
+         "budget_amount": None, "budget_currency": None, "purpose": None},
+    ),
+])
+def test_parse_brief(text, expected):
+    assert parse_brief(text).to_dict() == expected
+
+
+def test_slot_key_ignores_wording():
+    first = parse_brief("Plan a 2-week work trip to Tokyo, Japan in October. Budget $3000.")
+    second = parse_brief("Business trip in October to Tokyo for 12 days with a USD 3500 budget")
+
+    assert first.slot_key() == second.slot_key()
+
+
+def test_specialist_key_uses_only_relevant_slots():
+    october = "Work trip to Tokyo in October for 1 week, budget $2000"
+    november = "Work trip to Tokyo in November for 1 week, budget $2000"
+
+    # Finance does not depend on the month, Packing does.
+    assert specialist_cache.specialist_cache_key("FinanceAgent", october) == \
+        specialist_cache.specialist_cache_key("FinanceAgent", november)
+    assert specialist_cache.specialist_cache_key("PackingAgent", october) != \
+        specialist_cache.specialist_cache_key("PackingAgent", november)
+    assert specialist_cache.specialist_cache_key("FinanceAgent", "somewhere warm please") is None
+
+
+@pytest.mark.asyncio
+async def test_repeat_brief_skips_the_specialist_model(tmp_path, monkeypatch):
+    use_fresh_specialist_cache(tmp_path, monkeypatch)
+    model = StandInModel(reply="finance findings #{calls}")
+    agent = LlmAgent(
+        name="FinanceAgent",
+        model=model,
+        instruction="Finance.",
+        before_agent_callback=specialist_cache.check_specialist_cache,
+        after_agent_callback=specialist_cache.store_specialist_result,
+    )
+    runner = build_runner(agent, app_name="trip_brief_test")
+
+    first = await runner.run_debug("Work trip to Tokyo for 1 week, budget $2000", session_id="a", quiet=True)
+    second = await runner.run_debug("1-week business trip to Tokyo, $2,500", session_id="b", quiet=True)
+
+    assert model.calls == 1
+    assert second[-1].content.parts[0].text == first[-1].content.parts[0].text
+
+    assert specialist_cache.invalidate_specialist_cache("Tokyo, Japan") == 1
+    await runner.run_debug("Work trip to Tokyo for 1 week, budget $2000", session_id="c", quiet=True)
+    assert model.calls == 2
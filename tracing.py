@@ -0,0 +1,211 @@
+import contextvars
+import itertools
+import json
+import os
+import time
+
+from google.adk.plugins.base_plugin import BasePlugin
+
+# ==========================================
+# PER-AGENT TRACING
+# ==========================================
+# Records nested spans for every agent run, model call and tool call in the
+# hierarchy (AgentTool sub-runners inherit plugins, so nested specialists are
+# included). Each turn becomes one trace that can be exported as JSON using
+# OpenTelemetry span field names, and summarized per agent.
+
+# Span that new spans in the current asyncio task attach to. Concurrent
+# specialists run in their own tasks, so each keeps its own parent chain.
+_current_span = contextvars.ContextVar("trip_planner_current_span", default=None)
+
+_ids = itertools.count(1)
+
+
+class Span:
+    """One timed operation: a turn, an agent run, a model call or a tool call."""
+
+    def __init__(self, name, kind, parent=None, agent=None):
+        self.span_id = next(_ids)
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.agent = agent
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration = None
+        self.attributes = {}
+        self.children = []
+        if parent:
+            parent.children.append(self)
+
+    def end(self, **attributes):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self._start
+        self.attributes.update(attributes)
+
+    def add(self, key, amount=1):
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self):
+        end_time = self.start_time + self.duration if self.duration is not None else None
+        return {
+            "trace_id": f"{self.trace_id:032x}",
+            "span_id": f"{self.span_id:016x}",
+            "parent_span_id": f"{self.parent.span_id:016x}" if self.parent else None,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": int(self.start_time * 1e9),
+            "end_time_unix_nano": int(end_time * 1e9) if end_time is not None else None,
+            "attributes": {"agent": self.agent, **self.attributes},
+        }
+
+
+def current_span():
+    return _current_span.get()
+
+
+def annotate_current_span(key, amount=1):
+    """Adds to a counter on the active span (e.g. retries inside a model call)."""
+    span = _current_span.get()
+    if span is not None:
+        span.add(key, amount)
+
+
+class TracingPlugin(BasePlugin):
+    """Builds one span tree per turn; finished turns are kept in `traces`."""
+
+    def __init__(self):
+        super().__init__(name="tracing")
+        self.traces = []
+        self._roots = {}
+        self._open = {}
+
+    def _start(self, key, name, kind, agent=None):
+        parent = _current_span.get()
+        span = Span(name, kind, parent=parent, agent=agent or (parent.agent if parent else None))
+        self._open[key] = span
+        _current_span.set(span)
+        return span
+
+    def _finish(self, key, **attributes):
+        span = self._open.pop(key, None)
+        if span is None:
+            return None
+        span.end(**attributes)
+        _current_span.set(span.parent)
+        return span
+
+    async def before_run_callback(self, *, invocation_context):
+        # Sub-runners started by AgentTool also call this; only the outermost
+        # run (no active span) starts a new trace.
+        if _current_span.get() is None:
+            root = Span("turn", "run", agent=invocation_context.agent.name)
+            root.attributes["session_id"] = invocation_context.session.id
+            self._roots[invocation_context.invocation_id] = root
+            _current_span.set(root)
+        return None
+
+    async def after_run_callback(self, *, invocation_context):
+        root = self._roots.pop(invocation_context.invocation_id, None)
+        if root is not None:
+            root.end()
+            self.traces.append(root)
+            _current_span.set(None)
+        return None
+
+    async def before_agent_callback(self, *, agent, callback_context):
+        self._start(("agent", callback_context.invocation_id, agent.name), agent.name, "agent", agent=agent.name)
+        return None
+
+    async def after_agent_callback(self, *, agent, callback_context):
+        self._finish(("agent", callback_context.invocation_id, agent.name))
+        return None
+
+    async def before_model_callback(self, *, callback_context, llm_request):
+        span = self._start(("model", callback_context.invocation_id, callback_context.agent_name),
+                           f"model {llm_request.model}", "model", agent=callback_context.agent_name)
+        span.attributes["retry_count"] = 0
+        return None
+
+    async def after_model_callback(self, *, callback_context, llm_response):
+        if llm_response.partial:
+            return None
+        usage = llm_response.usage_metadata
+        self._finish(
+            ("model", callback_context.invocation_id, callback_context.agent_name),
+            input_tokens=(usage.prompt_token_count or 0) if usage else 0,
+            output_tokens=(usage.candidates_token_count or 0) if usage else 0,
+        )
+        return None
+
+    async def on_model_error_callback(self, *, callback_context, llm_request, error):
+        self._finish(("model", callback_context.invocation_id, callback_context.agent_name), error=str(error))
+        return None
+
+    async def before_tool_callback(self, *, tool, tool_args, tool_context):
+        self._start(("tool", tool_context.function_call_id or id(tool_args)), f"tool {tool.name}", "tool")
+        return None
+
+    async def after_tool_callback(self, *, tool, tool_args, tool_context, result):
+        self._finish(("tool", tool_context.function_call_id or id(tool_args)))
+        return None
+
+    async def on_tool_error_callback(self, *, tool, tool_args, tool_context, error):
+        self._finish(("tool", tool_context.function_call_id or id(tool_args)), error=str(error))
+        return None
+
+    def export(self, path, trace=None):
+        """Writes a trace (default: the latest) as JSON spans."""
+        trace = trace or self.traces[-1]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"spans": [span.to_dict() for span in trace.walk()]}, f, indent=2)
+        return path
+
+
+def summarize_trace(trace):
+    """Per-agent totals for one trace, in the order agents first ran."""
+    rows = {}
+    for span in trace.walk():
+        if span.kind == "run" or span.agent is None:
+            continue
+        row = rows.setdefault(span.agent, {
+            "agent": span.agent, "runs": 0, "wall_seconds": 0.0, "model_calls": 0,
+            "model_seconds": 0.0, "retries": 0, "input_tokens": 0, "output_tokens": 0, "tool_calls": 0,
+        })
+        duration = span.duration or 0.0
+        if span.kind == "agent":
+            row["runs"] += 1
+            row["wall_seconds"] += duration
+        elif span.kind == "model":
+            row["model_calls"] += 1
+            row["model_seconds"] += duration
+            row["retries"] += span.attributes.get("retry_count", 0)
+            row["input_tokens"] += span.attributes.get("input_tokens", 0)
+            row["output_tokens"] += span.attributes.get("output_tokens", 0)
+        elif span.kind == "tool":
+            row["tool_calls"] += 1
+    return list(rows.values())
+
+
+def format_summary(trace):
+    header = f"{'Agent':<26}{'runs':>5}{'wall s':>9}{'LLM':>5}{'LLM s':>8}{'retry':>6}{'in tok':>9}{'out tok':>9}{'tools':>6}"
+    lines = [header, "-" * len(header)]
+    for row in summarize_trace(trace):
+        lines.append(
+            f"{row['agent'][:25]:<26}{row['runs']:>5}{row['wall_seconds']:>9.2f}{row['model_calls']:>5}"
+            f"{row['model_seconds']:>8.2f}{row['retries']:>6}{row['input_tokens']:>9}"
+            f"{row['output_tokens']:>9}{row['tool_calls']:>6}"
+        )
+    lines.append(f"Turn total: {trace.duration or 0.0:.2f}s")
+    return "\n".join(lines)
+
+
+def trace_filename(session_id, directory="."):
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    return os.path.join(directory, f"trace_{session_id}_{timestamp}.json")
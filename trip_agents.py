@@ -1,35 +1,66 @@
-from api.api import API_Key
-import os
-
-try:
-    os.environ["GOOGLE_API_KEY"] = API_Key
-    print("Google API Key set successfully.")
-except KeyError:
-    print("API Key not found.")
-
-from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
-from google.adk.tools import google_search
-from google.genai import types
-
-# Retry config
-retry_config = types.HttpRetryOptions(
-    attempts=5,
-    exp_base=7,
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504],
-)
-
-# Common Model Configuration
-def get_model():
-    return Gemini(
-        model="gemini-2.5-flash-lite",
-        retry_options=retry_config
-    )
+from agent_registry import agent_factory, get_agent
+from model_registry import get_model
 
 # ==========================================
 # SPECIALIST RESEARCH AGENTS
 # ==========================================
+# Built on first use through the agent registry; importing this module
+# does not import google.adk.
+
+# Registry keys of the specialists, in dispatch order
+SPECIALIST_AGENTS = [
+    "research_agent",
+    "logistics_agent",
+    "finance_agent",
+    "attractions_agent",
+    "packing_agent",
+]
+
+_web_search = None
+
+
+def get_web_search():
+    """Shared web search for all specialists, cached on disk across sessions."""
+    global _web_search
+    if _web_search is None:
+        from search_cache import CachedSearchTool, create_search_agent
+        _web_search = CachedSearchTool(create_search_agent(get_model()))
+    return _web_search
+
+
+def build_specialist(name, instruction):
+    from google.adk.agents import LlmAgent
+    from destination_facts import facts_instruction, lookup_destination_facts
+    from findings import FINDINGS_FORMAT_INSTRUCTION, SpecialistFindings
+    from specialist_cache import check_specialist_cache, store_specialist_result
+
+    # Specialists that need stable facts look them up locally before searching.
+    facts = facts_instruction(name)
+    tools = [lookup_destination_facts, get_web_search()] if facts else [get_web_search()]
+    return LlmAgent(
+        name=name,
+        model=get_model(),
+        instruction=instruction + facts + FINDINGS_FORMAT_INSTRUCTION,
+        tools=tools,
+        output_schema=SpecialistFindings,
+        before_agent_callback=check_specialist_cache,
+        after_agent_callback=store_specialist_result,
+    )
+
+
+def specialists():
+    """The five specialists, built on first use."""
+    return [get_agent(key) for key in SPECIALIST_AGENTS]
+
+
+def __getattr__(name):
+    # The agents and web_search used to be module attributes.
+    if name in SPECIALIST_AGENTS:
+        return get_agent(name)
+    if name == "web_search":
+        return get_web_search()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # 1. Research Agent
 # Handles: Research (Visa, Safety, Customs) and Planning (Weather, Destination info)
@@ -45,16 +76,12 @@ Specifically, for a given destination and trip purpose (Work, Study, or Travel),
 5.  **Transport System**: Overview of metro, bus, taxi apps.
 
 **CRITICAL REQUIREMENT**:
-For every key piece of information (especially Visa rules, Official Health warnings, and Transport maps), you MUST provide a direct, clickable URL to an official or reliable source.
-Format: `[Source Name](URL)`
+For every key piece of information (especially Visa rules, Official Health warnings, and Transport maps), you MUST provide a direct URL to an official or reliable source.
 """
 
-research_agent = LlmAgent(
-    name="ResearchAgent",
-    model=get_model(),
-    instruction=research_instruction,
-    tools=[google_search],
-)
+@agent_factory("research_agent")
+def build_research_agent():
+    return build_specialist("ResearchAgent", research_instruction)
 
 # 2. Logistics Agent
 # Handles: Booking (Flights, Accommodation) and Arrival/Settling
@@ -70,15 +97,11 @@ For a given destination, duration, and budget, you must identify:
 
 **CRITICAL REQUIREMENT**:
 You MUST provide booking links or official websites for every recommendation (Airlines, Hotels, Transport passes).
-Format: `[Book Here](URL)` or `[Official Site](URL)`
 """
 
-logistics_agent = LlmAgent(
-    name="LogisticsAgent",
-    model=get_model(),
-    instruction=logistics_instruction,
-    tools=[google_search],
-)
+@agent_factory("logistics_agent")
+def build_logistics_agent():
+    return build_specialist("LogisticsAgent", logistics_instruction)
 
 # 3. Finance Agent
 # Handles: Finances (Budget, Costs)
@@ -94,15 +117,11 @@ For a given destination and duration, you must:
 
 **CRITICAL REQUIREMENT**:
 Provide links to current exchange rate sources (e.g., XE.com), official tax information, or banking tips.
-Format: `[Source](URL)`
 """
 
-finance_agent = LlmAgent(
-    name="FinanceAgent",
-    model=get_model(),
-    instruction=finance_instruction,
-    tools=[google_search],
-)
+@agent_factory("finance_agent")
+def build_finance_agent():
+    return build_specialist("FinanceAgent", finance_instruction)
 
 # 4. Attractions Agent
 # Handles: Detailed attraction research, hidden gems, and context-specific recommendations.
@@ -121,15 +140,11 @@ For a given destination and purpose:
 
 **CRITICAL REQUIREMENT**:
 For every attraction, provide a link to the official website or a reliable booking/info page.
-Format: `[Visit Site](URL)`
 """
 
-attractions_agent = LlmAgent(
-    name="AttractionsAgent",
-    model=get_model(),
-    instruction=attractions_instruction,
-    tools=[google_search],
-)
+@agent_factory("attractions_agent")
+def build_attractions_agent():
+    return build_specialist("AttractionsAgent", attractions_instruction)
 
 # 5. Packing Agent
 # Handles: Clothing and prep based on season and destination.
@@ -145,12 +160,8 @@ For a given destination and season (or specific travel dates):
 
 **CRITICAL REQUIREMENT**:
 Provide links to weather reports, and example links for specific specialized gear (e.g., "Universal Adapter" on Amazon/REI/Local store) so the user sees exactly what to buy.
-Format: `[Example Item](URL)` or `[Weather Report](URL)`
 """
 
-packing_agent = LlmAgent(
-    name="PackingAgent",
-    model=get_model(),
-    instruction=packing_instruction,
-    tools=[google_search],
-)
+@agent_factory("packing_agent")
+def build_packing_agent():
+    return build_specialist("PackingAgent", packing_instruction)
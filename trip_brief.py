@@ -0,0 +1,358 @@
+import re
+
+# ==========================================
+# TRIP BRIEF SLOTS
+# ==========================================
+# Pulls the planning slots (destination, month, duration, budget, purpose)
+# out of free-text trip briefs with plain regular expressions, so they can be
+# used as cache keys without another model call.
+
+# Session state key holding the current brief's slots (TripBrief.to_dict()).
+BRIEF_STATE_KEY = "trip_brief"
+
+# Dependency slots (as in slot_key()) and the brief fields behind each one.
+SLOT_FIELDS = {
+    "destination": ("destination",),
+    "month": ("month",),
+    "duration": ("duration_days",),
+    "budget": ("budget_amount", "budget_currency"),
+    "purpose": ("purpose",),
+}
+
+# Slots the planner cannot work without (checklist.md: every trip starts
+# from a destination, a budget and its purpose), then the ones that are
+# only asked about alongside them.
+REQUIRED_SLOTS = ("destination", "budget", "purpose")
+OPTIONAL_SLOTS = ("month", "duration")
+
+SLOT_QUESTIONS = {
+    "destination": "Where would you like to go (city and country)?",
+    "budget": "What is your total budget, and in which currency?",
+    "purpose": "Is this trip for Work, Study, or Travel?",
+    "month": "When are you travelling (dates or month)?",
+    "duration": "How long will you stay?",
+}
+
+MONTHS = [
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december",
+]
+MONTH_ABBREVIATIONS = {month[:3]: month for month in MONTHS}
+MONTH_ABBREVIATIONS["sept"] = "september"
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+UNIT_DAYS = {"day": 1, "night": 1, "week": 7, "fortnight": 14, "month": 30, "year": 365}
+
+CURRENCY_SYMBOLS = {"$": "USD", "£": "GBP", "€": "EUR", "¥": "JPY", "₹": "INR"}
+CURRENCY_CODES = {"usd", "gbp", "eur", "jpy", "aud", "cad", "sgd", "myr", "inr", "cny", "krw", "thb", "idr"}
+# Currencies written out after the amount ("2000 dollars", "3k euros").
+CURRENCY_WORDS = {
+    "us dollars": "USD", "dollars": "USD", "dollar": "USD", "bucks": "USD",
+    "euros": "EUR", "euro": "EUR", "pounds": "GBP", "pound": "GBP", "quid": "GBP",
+    "yen": "JPY", "rupees": "INR", "rupee": "INR", "rupiah": "IDR", "baht": "THB", "won": "KRW",
+}
+
+# Purposes follow checklist.md: Work, Study or Travel.
+PURPOSE_KEYWORDS = [
+    ("Work", ["work", "business", "conference", "remote", "coworking", "co-working",
+              "client", "job", "internship", "meeting"]),
+    ("Study", ["study", "studies", "studying", "university", "college", "course", "semester",
+               "exchange student", "school", "campus", "ucl"]),
+    ("Travel", ["vacation", "holiday", "leisure", "sightseeing", "honeymoon", "backpacking",
+                "tour", "getaway", "travel"]),
+]
+# Endings a purpose keyword may carry: "travelling", "vacations", "toured".
+KEYWORD_ENDINGS = r"(?:s|es|ed|er|ers|ing|led|ler|lers|ling|ist|ists)?"
+
+# Words that look like places after "to"/"in" but are not destinations.
+NOT_DESTINATIONS = set(MONTHS) | set(MONTH_ABBREVIATIONS) | {
+    "i", "my", "the", "a", "an", "budget", "usd", "gbp", "eur", "spring", "summer",
+    "autumn", "fall", "winter", "plan", "please", "also", "work", "study", "travel",
+}
+
+# Common words after "going to"/"trip to" that are not places, for the
+# lowercase patterns below ("going to spend a week", "trip to see family").
+NOT_LOWERCASE_DESTINATIONS = NOT_DESTINATIONS | {
+    "go", "see", "do", "be", "get", "have", "spend", "book", "need", "want", "stay", "take",
+    "make", "visit", "explore", "try", "use", "leave", "move", "fly", "start", "attend",
+    "meet", "buy", "find", "check", "for", "in", "on", "at", "with", "next", "this", "and",
+    "or", "from", "by", "during", "over", "until", "around", "about", "soon", "later",
+    "alone", "together", "again", "early", "late", "last", "some", "somewhere", "there",
+    "me", "us", "our", "your", "his", "her", "their", "it", "family", "friends",
+}
+
+DESTINATION_PATTERN = re.compile(
+    r"\b(?:to|in|visit|visiting|around|at)\s+"
+    r"((?:[A-Z][\w'\-]*)(?:(?:\s+|,\s*)[A-Z][\w'\-]*)*)"
+)
+# Once a destination is known, only "to X" / "visit X" changes it: "stay in
+# Shinjuku" narrows the trip rather than moving it.
+FOLLOW_UP_DESTINATION_PATTERN = re.compile(
+    r"\b(?:to|visit|visiting)\s+"
+    r"((?:[A-Z][\w'\-]*)(?:(?:\s+|,\s*)[A-Z][\w'\-]*)*)"
+)
+# Names typed in lowercase ("going to tokyo") only count after a travel
+# word, since "to"/"in" alone are followed by all kinds of words. The name
+# is matched in a lookahead so "going to visit paris" still finds "paris".
+LOWERCASE_DESTINATION_PATTERN = re.compile(
+    r"\b(?:(?:trip|travel\w*|go|going|goes|fly\w*|flight\w*|head\w*|mov\w*|relocat\w*"
+    r"|holiday\w*|vacation\w*)\s+to|(?:study\w*|work\w*|liv\w*|stay\w*|holiday\w*|vacation\w*"
+    r"|days?|nights?|weeks?|months?)\s+in|visit|visiting)"
+    r"\s+(?=([a-z][\w'\-]*(?:\s+[a-z][\w'\-]*)?))",
+    re.IGNORECASE,
+)
+FOLLOW_UP_LOWERCASE_DESTINATION_PATTERN = re.compile(
+    r"\b(?:(?:trip|travel\w*|go|going|goes|fly\w*|flight\w*|head\w*|mov\w*|relocat\w*"
+    r"|holiday\w*|vacation\w*)\s+to|visit|visiting)"
+    r"\s+(?=([a-z][\w'\-]*(?:\s+[a-z][\w'\-]*)?))",
+    re.IGNORECASE,
+)
+DURATION_PATTERN = re.compile(
+    r"\b(\d+|a|an|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve)"
+    r"[\s-]*(day|night|week|fortnight|month|year)s?\b",
+    re.IGNORECASE,
+)
+BUDGET_PATTERN = re.compile(
+    r"(?P<symbol>[$£€¥₹])\s?(?P<amount>\d[\d,]*(?:\.\d+)?)\s*(?P<k>k\b)?"
+    r"(?:\s*(?P<code_after>[A-Za-z]{3})\b)?"
+    r"|\b(?P<code>[A-Za-z]{3})\s?(?P<amount2>\d[\d,]*(?:\.\d+)?)\s*(?P<k2>k\b)?"
+    r"|(?P<amount3>\d[\d,]*(?:\.\d+)?)\s*(?P<k3>k\b)?\s*"
+    r"(?P<code3>" + "|".join(sorted(CURRENCY_WORDS, key=len, reverse=True)) + r"|[A-Za-z]{3})\b",
+    re.IGNORECASE,
+)
+
+
+def canonical_destination(destination):
+    """Destination reduced to its first component: "Tokyo, Japan" -> "tokyo"."""
+    if not destination:
+        return None
+    return destination.split(",")[0].strip().lower()
+
+
+class TripBrief:
+    """Planning slots extracted from a user's trip request.
+
+    Any slot that could not be found is None.
+    """
+
+    SLOTS = ("destination", "month", "duration_days", "budget_amount", "budget_currency", "purpose")
+
+    def __init__(self, destination=None, month=None, duration_days=None,
+                 budget_amount=None, budget_currency=None, purpose=None):
+        self.destination = destination
+        self.month = month
+        self.duration_days = duration_days
+        self.budget_amount = budget_amount
+        self.budget_currency = budget_currency
+        self.purpose = purpose
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.SLOTS}
+
+    @classmethod
+    def from_dict(cls, slots):
+        return cls(**{slot: (slots or {}).get(slot) for slot in cls.SLOTS})
+
+    def merged(self, update):
+        """This brief with every slot `update` fills in replaced."""
+        slots = self.to_dict()
+        slots.update({k: v for k, v in update.to_dict().items() if v is not None})
+        return TripBrief.from_dict(slots)
+
+    def changed_slots(self, other):
+        """Dependency slots ("budget", "month", ...) whose exact values differ."""
+        changed = set()
+        for slot, fields in SLOT_FIELDS.items():
+            mine = tuple(getattr(self, field) for field in fields)
+            theirs = tuple(getattr(other, field) for field in fields)
+            if slot == "destination":
+                mine, theirs = (self.destination_key,), (other.destination_key,)
+            if mine != theirs:
+                changed.add(slot)
+        return changed
+
+    def missing_slots(self, slots=REQUIRED_SLOTS):
+        """Dependency slots in `slots` that have no value yet."""
+        return [slot for slot in slots if getattr(self, SLOT_FIELDS[slot][0]) is None]
+
+    def describe(self):
+        """The known slots as one line, e.g. "Destination: Tokyo; Budget: 2,000 USD"."""
+        parts = []
+        if self.destination:
+            parts.append(f"Destination: {self.destination}")
+        if self.month:
+            parts.append(f"Month: {self.month.capitalize()}")
+        if self.duration_days:
+            parts.append(f"Duration: {self.duration_days} days")
+        if self.budget_amount is not None:
+            budget = f"{self.budget_amount:,.0f}"
+            parts.append(f"Budget: {budget} {self.budget_currency}" if self.budget_currency else f"Budget: {budget}")
+        if self.purpose:
+            parts.append(f"Purpose: {self.purpose}")
+        return "; ".join(parts)
+
+    def __eq__(self, other):
+        return isinstance(other, TripBrief) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        filled = ", ".join(f"{k}={v!r}" for k, v in self.to_dict().items() if v is not None)
+        return f"TripBrief({filled})"
+
+    @property
+    def destination_key(self):
+        return canonical_destination(self.destination)
+
+    @property
+    def duration_bucket(self):
+        days = self.duration_days
+        if days is None:
+            return None
+        if days <= 4:
+            return "short"
+        if days <= 10:
+            return "week"
+        if days <= 21:
+            return "fortnight"
+        return "long"
+
+    @property
+    def budget_bucket(self):
+        if self.budget_amount is None:
+            return None
+        currency = self.budget_currency or "USD"
+        for limit, label in [(1000, "<1k"), (3000, "1k-3k"), (10000, "3k-10k")]:
+            if self.budget_amount < limit:
+                return f"{currency}:{label}"
+        return f"{currency}:10k+"
+
+    def slot_key(self):
+        """Canonical slot tuple used to recognise repeat briefs."""
+        return {
+            "destination": self.destination_key,
+            "month": self.month,
+            "duration": self.duration_bucket,
+            "budget": self.budget_bucket,
+            "purpose": self.purpose,
+        }
+
+
+def _find_lowercase_destination(text, pattern=LOWERCASE_DESTINATION_PATTERN):
+    for match in pattern.finditer(text):
+        kept = []
+        for word in match.group(1).split():
+            if word.lower() in NOT_LOWERCASE_DESTINATIONS:
+                break
+            kept.append(word)
+        if kept:
+            return " ".join(word.capitalize() for word in kept)
+    return None
+
+
+def _find_destination(text, pattern=DESTINATION_PATTERN):
+    for match in pattern.finditer(text):
+        parts = [part.strip() for part in re.split(r",", match.group(1))]
+        words = []
+        for part in parts:
+            kept = []
+            for word in part.split():
+                if word.lower() in NOT_DESTINATIONS:
+                    break
+                kept.append(word)
+            if kept:
+                words.append(" ".join(kept))
+            if len(kept) < len(part.split()):
+                break
+        if words:
+            return ", ".join(words)
+    return None
+
+
+def _find_month(text):
+    for word in re.findall(r"[A-Za-z]+", text):
+        lowered = word.lower()
+        # "may" is only a month when capitalised ("in May", not "I may go").
+        if lowered == "may" and word != "May":
+            continue
+        if lowered in MONTHS:
+            return lowered
+        if lowered in MONTH_ABBREVIATIONS:
+            return MONTH_ABBREVIATIONS[lowered]
+    return None
+
+
+def _find_duration(text):
+    match = DURATION_PATTERN.search(text)
+    if not match:
+        return None
+    count, unit = match.group(1).lower(), match.group(2).lower()
+    count = int(count) if count.isdigit() else NUMBER_WORDS[count]
+    return count * UNIT_DAYS[unit]
+
+
+def _find_budget(text):
+    for match in BUDGET_PATTERN.finditer(text):
+        groups = match.groupdict()
+        amount = groups["amount"] or groups["amount2"] or groups["amount3"]
+        code = groups["code_after"] or groups["code"] or groups["code3"]
+        if code and code.lower() in CURRENCY_WORDS:
+            code = CURRENCY_WORDS[code.lower()]
+        elif code and code.lower() not in CURRENCY_CODES:
+            if not groups["symbol"]:
+                continue
+            code = None
+        currency = code.upper() if code else CURRENCY_SYMBOLS.get(groups["symbol"])
+        value = float(amount.replace(",", ""))
+        if groups["k"] or groups["k2"] or groups["k3"]:
+            value *= 1000
+        return value, currency
+    return None, None
+
+
+def _find_purpose(text):
+    lowered = text.lower()
+    for purpose, keywords in PURPOSE_KEYWORDS:
+        if any(re.search(rf"\b{re.escape(keyword)}{KEYWORD_ENDINGS}\b", lowered) for keyword in keywords):
+            return purpose
+    return None
+
+
+def parse_brief(text, follow_up=False):
+    """Extracts a TripBrief from free text. `follow_up` is for a message
+    that changes a brief whose destination is already known."""
+    amount, currency = _find_budget(text)
+    if follow_up:
+        destination = (_find_destination(text, FOLLOW_UP_DESTINATION_PATTERN)
+                       or _find_lowercase_destination(text, FOLLOW_UP_LOWERCASE_DESTINATION_PATTERN))
+    else:
+        destination = _find_destination(text) or _find_lowercase_destination(text)
+    return TripBrief(
+        destination=destination,
+        month=_find_month(text),
+        duration_days=_find_duration(text),
+        budget_amount=amount,
+        budget_currency=currency,
+        purpose=_find_purpose(text),
+    )
+
+
+def clarifying_questions(brief, missing):
+    """The reply asking for the `missing` slots of `brief`."""
+    lines = []
+    if brief.describe():
+        lines.append(f"Here is what I have so far: {brief.describe()}.\n")
+    lines.append("To plan your trip I need a few more details:")
+    lines.extend(f"- {SLOT_QUESTIONS[slot]}" for slot in missing)
+    lines.extend(f"- {SLOT_QUESTIONS[slot]} (if you know)" for slot in brief.missing_slots(OPTIONAL_SLOTS))
+    return "\n".join(lines)
+
+
+def parse_conversation(messages):
+    """Brief for a whole conversation: later messages override earlier slots
+    ("actually make the budget $2000")."""
+    brief = TripBrief()
+    for message in messages:
+        brief = brief.merged(parse_brief(message, follow_up=brief.destination is not None))
+    return brief
@@ -1,44 +1,13 @@
 import asyncio
-from api.api import API_Key
 import os
 
-# Ensure API Key is set
-try:
-    os.environ["GOOGLE_API_KEY"] = API_Key
-    print("Google API Key set successfully.")
-except KeyError:
-    print("API Key not found in api.api")
-
-from google.adk.agents import LlmAgent
-from google.adk.models.google_llm import Gemini
-from google.adk.tools import AgentTool
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from google.genai import types
-
-# Import agents
-from trip_agents import (
-    research_agent, 
-    logistics_agent, 
-    finance_agent, 
-    attractions_agent, 
-    packing_agent
-)
-
-# Retry config
-retry_config = types.HttpRetryOptions(
-    attempts=5,
-    exp_base=7,
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504],
-)
-
-# Common model for orchestrators
-def get_model():
-    return Gemini(
-        model="gemini-2.5-flash-lite",
-        retry_options=retry_config
-    )
+# Agents are built on first use (see agent_registry.py); importing this
+# module does not import google.adk.
+from agent_registry import agent_factory, get_agent
+# Shared model instance for all agents (one pooled client per event loop)
+from model_registry import get_model
+# Registers the specialist factories
+import trip_agents
 
 # ==========================================
 # HIERARCHICAL AGENTS
@@ -46,89 +15,217 @@ def get_model():
 
 # 1. Research Instruction Agent
 # Manages the specialists
-research_instruction_agent = LlmAgent(
-    name="ResearchInstructionAgent",
-    model=get_model(),
-    instruction="""
+research_instruction_agent_instruction = """
     You are the **Research Instruction Agent**.
     
     Your goal is to execute the research phase of the trip planning process.
     1.  Receive a trip outline or criteria from the Planner Agent.
-    2.  Break this down into specific research tasks.
-    3.  Delegate these tasks to your specialist tools:
+    2.  Turn it into one complete trip brief: destination, dates or month, duration,
+        budget (with currency), purpose (Work, Study, or Travel) and any special interests.
+    3.  Call `dispatch_specialists` ONCE with that brief. It runs all of the specialists
+        at the same time:
         - `ResearchAgent`: General info, visa, safety.
         - `LogisticsAgent`: Flights, hotels, transport.
         - `FinanceAgent`: Budget, currency.
         - `AttractionsAgent`: Sightseeing.
         - `PackingAgent`: Clothing, gear.
-    4.  Collect their responses.
-    5.  Return the aggregated raw research findings.
-    """,
-    tools=[
-        AgentTool(research_agent),
-        AgentTool(logistics_agent),
-        AgentTool(finance_agent),
-        AgentTool(attractions_agent),
-        AgentTool(packing_agent)
-    ],
-)
+    4.  `dispatch_specialists` delivers the full findings to the InteractiveAgent itself and
+        returns only a digest. Return that digest briefly. If any specialist is listed under
+        `missing`, say which sections are missing instead of inventing them.
+    """
+
+
+@agent_factory("research_instruction_agent")
+def build_research_instruction_agent():
+    from google.adk.agents import LlmAgent
+    # Concurrent fan-out to the specialist agents
+    from research_stage import dispatch_specialists
+
+    return LlmAgent(
+        name="ResearchInstructionAgent",
+        model=get_model(),
+        instruction=research_instruction_agent_instruction,
+        tools=[
+            dispatch_specialists
+        ],
+    )
+
 
 # 2. Planner Agent
 # Drafts outline and coordinates the Research
-# Updated: Removed Compiler and Edit Agents as per request. Returns raw findings to Interactive Agent.
-planner_agent = LlmAgent(
-    name="PlannerAgent",
-    model=get_model(),
-    instruction="""
+# Updated: Removed Compiler and Edit Agents as per request. Findings reach the Interactive Agent through session state.
+planner_agent_instruction = """
     You are the **Planner Agent**. You act as the central strategist for the trip planning workflow.
     
     **Workflow**:
     1.  **Draft Outline**: Analyze the user's request (from InteractiveAgent) to define the destination, dates, constraints, and key interests.
     2.  **Research**: Call `ResearchInstructionAgent` to gather detailed information based on your outline.
-    3.  **Verify**: Ensure the research findings are sufficient to answer the user's request. If significant info is missing, refine your request to the ResearchInstructionAgent.
-    4.  **Return**: Return the *comprehensive raw research findings* directly to the InteractiveAgent. Do not summarize them excessively; provide the full details needed for the final report.
-    """,
-    tools=[
-        AgentTool(research_instruction_agent)
-    ],
-)
+    3.  **Verify**: The ResearchInstructionAgent returns a digest of what each specialist found. If significant info is missing, refine your request to the ResearchInstructionAgent, unless the digest says `time_limit_reached`: then go on with what was found.
+    4.  **Return**: The full findings are delivered to the InteractiveAgent directly. Return a one-paragraph summary of your outline and of any missing sections; do not restate the findings.
+    """
+
+
+@agent_factory("planner_agent")
+def build_planner_agent():
+    from google.adk.agents import LlmAgent
+    from google.adk.tools import AgentTool
+
+    return LlmAgent(
+        name="PlannerAgent",
+        model=get_model(),
+        instruction=planner_agent_instruction,
+        tools=[
+            AgentTool(get_agent("research_instruction_agent"))
+        ],
+    )
+
+# Report formatting rules shared by the InteractiveAgent and the fast-path compiler
+report_format_instruction = """
+    **MANDATORY FORMATTING REQUIREMENTS for the Final Report**:
+    1.  **Narrative Sections**: Clear, engaging descriptions for Trip Overview, Logistics, Sightseeing, etc.
+    2.  **MASTER PLAN TABLE**: 
+        - This is MANDATORY for every report, but do NOT write the table yourself.
+        - After writing the report, call `record_plan_rows` once with one row per category:
+          Visa, Flights, Accommodation, Top Attractions, Packing Essentials, Budget Est.
+        - Keep cells short and set each row's `source` to the number of its source in the findings.
+        - The table is rendered from your rows and appended to the report automatically.
+    3.  **Links**: The findings cite sources as `[n]`, numbered in their **Sources** list. Turn every
+        citation you use into a clickable Markdown link `[Title](URL)`.
+"""
 
 # 3. Interactive Agent (Entry Point)
 # User -> Interactive -> Planner
 # Updated: Handles compilation and formatting (previously done by EditAgent)
-interactive_agent = LlmAgent(
-    name="InteractiveAgent",
-    model=get_model(),
-    instruction="""
+interactive_agent_instruction = """
     You are the **Interactive Agent**, the user's direct point of contact and final report generator.
     
     **Responsibilities**:
     1.  **Understand**: Clarify the user's request (Destination, Budget, Purpose, etc.).
-    2.  **Delegate**: Once you have enough information, pass the request to the `PlannerAgent`.
+    2.  **Delegate**: Once you have enough information, pass the request to the `PlannerAgent`,
+        starting from the trip brief below (already extracted from the conversation).
     3.  **Compile & Format**: 
-        - Receive the raw research findings from the `PlannerAgent`.
+        - Once the `PlannerAgent` returns, the research findings appear below.
         - **Synthesize** this information into a cohesive, beautiful Markdown report.
         - **Reconcile** any inconsistencies (e.g., budget vs costs) in your narrative.
+        - If a specialist section says it has no findings, mention that the section is missing.
+    4.  **Follow-ups**: If a plan was already researched and the user only changes its budget,
+        dates, duration or purpose, call `update_research` instead of the `PlannerAgent`. It re-runs
+        only the affected specialists; then compile the full report again from the findings below.
+    """ + report_format_instruction + """
+    Do not invent new information. Only format the information in the research findings.
     
-    **MANDATORY FORMATTING REQUIREMENTS for the Final Report**:
-    1.  **Narrative Sections**: Clear, engaging descriptions for Trip Overview, Logistics, Sightseeing, etc.
-    2.  **MASTER PLAN TABLE**: 
-        - This is a MANDATORY final section.
-        - Create a comprehensive Markdown table summarizing the entire trip.
-        - Columns must be: **Category**, **Recommendation/Action**, **Details**, **Link/Source**.
-        - Rows should cover: Visa, Flights, Accommodation, Top Attractions, Packing Essentials, Budget Est.
-        - Ensure every row has a valid link in the Link/Source column.
-    3.  **Links**: Ensure all links provided in the research are preserved and clickable.
+    **TRIP BRIEF**:
+    {trip_brief_prefill?}
+    
+    **RESEARCH FINDINGS**:
+    {research_findings?}
+    """
+
+
+@agent_factory("interactive_agent")
+def build_interactive_agent():
+    from google.adk.agents import LlmAgent
+    from google.adk.tools import AgentTool
+    from brief_precheck import clarify_brief
+    from plan_table import append_plan_table, record_plan_rows
+    from replanning import update_research
+
+    return LlmAgent(
+        name="InteractiveAgent",
+        model=get_model(),
+        instruction=interactive_agent_instruction,
+        tools=[
+            AgentTool(get_agent("planner_agent")),
+            update_research,
+            record_plan_rows
+        ],
+        # Incomplete briefs are answered locally, without a model call
+        before_agent_callback=clarify_brief,
+        after_agent_callback=append_plan_table,
+    )
+
+# ==========================================
+# FAST-PATH ORCHESTRATION
+# ==========================================
+# Planner and ResearchInstruction layers replaced by Python (see fast_path.py).
+# The compiler keeps the InteractiveAgent role but receives the findings
+# through session state instead of through a PlannerAgent tool call.
+interactive_compiler_instruction = """
+    You are the **Interactive Agent**, the user's direct point of contact and final report generator.
     
-    Do not invent new information. Only format the information provided by the PlannerAgent.
-    """,
-    tools=[
-        AgentTool(planner_agent)
-    ],
-)
+    **Responsibilities**:
+    1.  **Understand**: If the research findings below are empty, the user's request is missing
+        key details. Ask for the destination, budget and purpose (Work, Study, or Travel).
+    2.  **Compile & Format**: 
+        - **Synthesize** the research findings below into a cohesive, beautiful Markdown report.
+        - **Reconcile** any inconsistencies (e.g., budget vs costs) in your narrative.
+        - If a specialist section says it has no findings, mention that the section is missing.
+    """ + report_format_instruction + """
+    Do not invent new information. Only format the information in the research findings.
+    
+    **RESEARCH FINDINGS**:
+    {research_findings?}
+    """
+
+
+@agent_factory("interactive_compiler")
+def build_interactive_compiler():
+    from google.adk.agents import LlmAgent
+    from plan_table import append_plan_table, record_plan_rows
+
+    return LlmAgent(
+        name="InteractiveAgent",
+        model=get_model(),
+        instruction=interactive_compiler_instruction,
+        tools=[
+            record_plan_rows
+        ],
+        after_agent_callback=append_plan_table,
+    )
 
-# Export the main entry point as trip_coordinator for compatibility with main.py and tests
-trip_coordinator = interactive_agent
+
+@agent_factory("fast_coordinator")
+def build_fast_coordinator():
+    from fast_path import FastPathCoordinator
+
+    return FastPathCoordinator(
+        name="TripCoordinator",
+        compiler=get_agent("interactive_compiler"),
+        description="Runs the specialists directly and compiles their findings.",
+    )
+
+
+# Orchestration modes selectable from main.py and the tests, by the
+# registry key of their root agent
+ORCHESTRATION_MODES = {
+    "hierarchical": "interactive_agent",
+    "fast": "fast_coordinator",
+}
+DEFAULT_MODE = os.environ.get("TRIP_PLANNER_MODE", "hierarchical")
+
+AGENT_ATTRIBUTES = {
+    "research_instruction_agent": "research_instruction_agent",
+    "planner_agent": "planner_agent",
+    "interactive_agent": "interactive_agent",
+    # The main entry point, kept under its old name for compatibility
+    "trip_coordinator": "interactive_agent",
+    "interactive_compiler": "interactive_compiler",
+    "fast_coordinator": "fast_coordinator",
+}
+
+
+def __getattr__(name):
+    # The agents used to be module attributes; they are built on first access.
+    if name in AGENT_ATTRIBUTES:
+        return get_agent(AGENT_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_coordinator(mode=DEFAULT_MODE):
+    """Returns the root agent for an orchestration mode, building it on first use."""
+    if mode not in ORCHESTRATION_MODES:
+        raise ValueError(f"Unknown orchestration mode '{mode}'. Choose from: {', '.join(ORCHESTRATION_MODES)}")
+    return get_agent(ORCHESTRATION_MODES[mode])
 
 async def main():
     print("✈️ Trip Planner AI System Initialized (Streamlined Architecture)")
@@ -139,10 +236,13 @@ async def main():
     print(f"\n📝 Processing Request: {user_query}\n")
     print("...Delegating tasks to Interactive -> Planner -> Research Agents...")
 
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+
     # Setup Runner
     session_service = InMemorySessionService()
     runner = Runner(
-        agent=trip_coordinator,
+        agent=get_coordinator(),
         session_service=session_service,
         app_name="trip_planner"
     )